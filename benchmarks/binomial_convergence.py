@@ -0,0 +1,32 @@
+"""
+Error against the BlackScholesPricer price vs wall time of every BinomialTreePricer method.
+
+    python -m benchmarks.binomial_convergence
+"""
+
+import time
+
+from options.option import Option, OptionType
+from options.pricing.binomial_trees import BinomialTreePricer
+from options.pricing.black_scholes import BlackScholesPricer
+
+
+def run(steps_list=(25, 50, 100, 200, 400, 800, 1600, 3200), repeat=5):
+    option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option')
+    reference = BlackScholesPricer().price_option(option, round_digit=None)
+
+    print('{:<16}{:>8}{:>14}{:>14}'.format('method', 'steps', 'abs error', 'seconds'))
+    for method in BinomialTreePricer.METHODS:
+        for richardson in (False, True):
+            name = method + (' richardson' if richardson else '')
+            for steps in steps_list:
+                pricer = BinomialTreePricer(steps, method=method, richardson=richardson)
+                t0 = time.time()
+                for i in range(repeat):
+                    price = pricer.price_option(option, round_digit=12)
+                t = (time.time() - t0) / repeat
+                print('{:<16}{:>8}{:>14.2e}{:>14.6f}'.format(name, steps, abs(price - reference), t))
+
+
+if __name__ == '__main__':
+    run()
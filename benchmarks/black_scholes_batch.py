@@ -0,0 +1,47 @@
+"""
+Throughput of BlackScholesPricer.price_options against the scalar price_option loop.
+
+    python -m benchmarks.black_scholes_batch
+"""
+
+import time
+
+import numpy as np
+
+from options.option import Option, OptionType
+from options.pricing.black_scholes import BlackScholesPricer
+
+
+def random_book(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return dict(types=rng.integers(0, 2, size),
+                spots=rng.uniform(50, 150, size),
+                strikes=rng.uniform(50, 150, size),
+                rates=rng.uniform(0, 0.1, size),
+                expiries=rng.uniform(0.05, 3, size),
+                vols=rng.uniform(0.1, 0.6, size),
+                cost_of_carry=rng.uniform(-0.05, 0.1, size))
+
+
+def run(size=500000, scalar_size=50000):
+    pricer = BlackScholesPricer()
+    book = random_book(size)
+
+    t0 = time.time()
+    prices = pricer.price_options(**book)
+    t_batch = time.time() - t0
+
+    options = [Option(OptionType(book['types'][i]), book['spots'][i], book['strikes'][i], book['rates'][i],
+                      book['expiries'][i], book['vols'][i], cost_of_carry=book['cost_of_carry'][i])
+               for i in range(scalar_size)]
+    t0 = time.time()
+    scalar_prices = [pricer.price_option(option, round_digit=12) for option in options]
+    t_scalar = time.time() - t0
+
+    print('batch : {:>10.0f} options/s ({} options in {:.3f}s)'.format(size / t_batch, size, t_batch))
+    print('scalar: {:>10.0f} options/s ({} options in {:.3f}s)'.format(scalar_size / t_scalar, scalar_size, t_scalar))
+    print('max abs difference: {:.2e}'.format(np.max(np.abs(prices[:scalar_size] - scalar_prices))))
+
+
+if __name__ == '__main__':
+    run()
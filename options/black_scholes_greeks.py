@@ -1,4 +1,6 @@
 """
+Greeks of the generalized Black-Scholes formula (see options/pricing/black_scholes.py)
+
 Delta: changes in the underlying asset price
 
     delta_call = exp((b - r) * T) * N(d1)         > 0
@@ -7,25 +9,118 @@ Delta: changes in the underlying asset price
     where 
         b: is cost of carry
         r: risk free interest rate
+
+Gamma: changes in delta when the underlying asset price changes, the same for call and put
+
+    gamma = exp((b - r) * T) * n(d1) / (S * vol * sqrt(T))
+
+    where
+        n(x): the standard normal probability density function
+
+Vega: changes in the volatility, the same for call and put
+
+    vega = S * exp((b - r) * T) * n(d1) * sqrt(T)
+
+Theta: time decay, i.e. changes in the option price as time to expiration T decreases
+
+    theta_call = - S * exp((b - r) * T) * n(d1) * vol / (2 * sqrt(T))
+                 - (b - r) * S * exp((b - r) * T) * N(d1) - r * X * exp(-r * T) * N(d2)
+    theta_put  = - S * exp((b - r) * T) * n(d1) * vol / (2 * sqrt(T))
+                 + (b - r) * S * exp((b - r) * T) * N(-d1) + r * X * exp(-r * T) * N(-d2)
+
+Rho: changes in the risk free interest rate
+
+    when the cost of carry moves together with r (b = r, r - q or r - rf, options without a product):
+        rho_call = T * X * exp(-r * T) * N(d2)
+        rho_put  = - T * X * exp(-r * T) * N(-d2)
+    when b is fixed at 0 (futures_option and margined_futures_option products):
+        rho_call = - T * c
+        rho_put  = - T * p
+    The case is decided by the product (get_rate_coefficients), not by the value of b: a stock option
+    at r = 0 has b = 0 too, but its b still moves with r.
+
+Vanna: changes in delta when the volatility changes, the same for call and put
+
+    vanna = - exp((b - r) * T) * n(d1) * d2 / vol
+
+Volga: changes in vega when the volatility changes, the same for call and put
+
+    volga = vega * d1 * d2 / vol
+
+Using put-call supersymmetry with z = 1 for call and z = -1 for put, d1, d2, the discount 
+factors and n(d1), N(z * d1), N(z * d2) are computed once and shared by all greeks.
 """
 
 from math import exp
 
-from options.functions import cdf
-from options.option import OptionType
+import numpy as np
+
+from options.functions import cdf, cdf_array, pdf_array
+from options.option import OptionBook, OptionType, get_rate_coefficients, get_type_signs, resolve_cost_of_carry
 from options.pricing.black_scholes import BlackScholesPricer
 
 
+GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho', 'vanna', 'volga')
+
+
 class BlackScholesGreeks:
     def __init__(self, option):
+        """option: an Option, or an OptionBook for batch mode"""
         self.pricer = BlackScholesPricer()
         self.option = option
     
     def get_delta_greeks(self, round_digit=4):
-        d1 = self.pricer.get_d1_d2(self.option.spot, self.option.strike, self.option.expiry, self.option.vol, self.option.cost_of_carry)[0]
+        coc = resolve_cost_of_carry(self.option.cost_of_carry, self.option.rate)
+        d1 = self.pricer.get_d1_d2(self.option.spot, self.option.strike, self.option.expiry, self.option.vol, coc)[0]
         if self.option.type == OptionType.CALL:
-            delta = exp((self.option.cost_of_carry - self.option.rate) * self.option.expiry) * cdf(d1)
+            delta = exp((coc - self.option.rate) * self.option.expiry) * cdf(d1)
         else:
-            delta = exp((self.option.cost_of_carry - self.option.rate) * self.option.expiry) * (cdf(d1) - 1)
+            delta = exp((coc - self.option.rate) * self.option.expiry) * (cdf(d1) - 1)
 
         return round(delta, round_digit)
+
+    def get_greeks(self, round_digit=4):
+        """Return a dict of all greeks in GREEKS computed in a single pass.
+        For an OptionBook the values are arrays. If round_digit is None, values are not rounded.
+        """
+        opt = self.option
+        otype = opt.type if isinstance(opt, OptionBook) else opt.type.value
+        greeks = get_greeks_array(otype, opt.spot, opt.strike, opt.rate, opt.expiry, opt.vol,
+                                  resolve_cost_of_carry(opt.cost_of_carry, opt.rate), opt.product)
+        if not isinstance(opt, OptionBook):
+            greeks = {name: float(value) for name, value in greeks.items()}
+            return greeks if round_digit is None else {name: round(value, round_digit) for name, value in greeks.items()}
+        return greeks if round_digit is None else {name: np.round(value, round_digit) for name, value in greeks.items()}
+
+
+def get_greeks_array(types, spots, strikes, rates, expiries, vols, cost_of_carry, products=''):
+    """Return a dict of arrays of all greeks in GREEKS for columns of options.
+    types: OptionType members or their values
+    products: product names or OptionBook codes, which decide whether b moves with r in rho
+    """
+    z = get_type_signs(types)
+    spots, strikes, rates, expiries, vols, coc = (np.asarray(col, dtype=float)
+                                                  for col in (spots, strikes, rates, expiries, vols, cost_of_carry))
+
+    sqrt_t = np.sqrt(expiries)
+    d1 = (np.log(spots / strikes) + (coc + vols ** 2 / 2) * expiries) / (vols * sqrt_t)
+    d2 = d1 - vols * sqrt_t
+    carry_df = np.exp((coc - rates) * expiries)
+    rate_df = np.exp(- rates * expiries)
+    n_d1 = pdf_array(d1)
+    cdf_d1 = cdf_array(z * d1)
+    cdf_d2 = cdf_array(z * d2)
+
+    spot_term = spots * carry_df * cdf_d1
+    strike_term = strikes * rate_df * cdf_d2
+    price = z * (spot_term - strike_term)
+    vega = spots * carry_df * n_d1 * sqrt_t
+
+    return {'delta': z * carry_df * cdf_d1,
+            'gamma': carry_df * n_d1 / (spots * vols * sqrt_t),
+            'vega': vega,
+            'theta': - vega * vols / (2 * expiries) - z * (coc - rates) * spot_term - z * rates * strike_term,
+            'rho': np.where(get_rate_coefficients(products) != 0, z * expiries * strike_term, - expiries * price),
+            'vanna': - carry_df * n_d1 * d2 / vols,
+            'volga': vega * d1 * d2 / vols,
+            }
@@ -1,5 +1,31 @@
 import math
 
+import numpy as np
+
+
+# Coefficients of Hart algorithm used by cdf and cdf_array
+_CDF_A = (0.0352624965998911, 0.700383064443688,
+          6.37396220353165,   33.912866078383,
+          112.079291497871,   221.213596169931,
+          220.206867912376)
+_CDF_B = (0.0883883476483184, 1.75566716318264,
+          16.064177579207,    86.7807322029461,
+          296.564248779674,   637.333633378831,
+          793.826512519948,   440.413735824752)
+
+# Coefficients of Acklam's rational approximations used by norminv and norminv_array
+_NORMINV_A = (-3.969683028665376e+01,  2.209460984245205e+02,
+              -2.759285104469687e+02,  1.383577518672690e+02,
+              -3.066479806614716e+01,  2.506628277459239e+00)
+_NORMINV_B = (-5.447609879822406e+01,  1.615858368580409e+02,
+              -1.556989798598866e+02,  6.680131188771972e+01,
+              -1.328068155288572e+01)
+_NORMINV_C = (-7.784894002430293e-03, -3.223964580411365e-01,
+              -2.400758277161838e+00, -2.549732539343734e+00,
+               4.374664141464968e+00,  2.938163982698783e+00)
+_NORMINV_D = ( 7.784695709041462e-03,  3.224671290700398e-01,
+               2.445134137142996e+00,  3.754408661907416e+00)
+
 
 def cdf(x):
     """Calculate approximation of Cumulative Distribution Function by using Hart Algorithms
@@ -44,15 +70,8 @@ def cdf(x):
     y = math.fabs(x)
 
     if y < 7.07106781186547:
-        a = (0.0352624965998911, 0.700383064443688,
-             6.37396220353165,   33.912866078383,
-             112.079291497871,   221.213596169931,
-             220.206867912376
-            )
-        b = (0.0883883476483184, 1.75566716318264,
-             16.064177579207,    86.7807322029461,
-             296.564248779674,   637.333633378831,
-             793.826512519948,   440.413735824752)
+        a = _CDF_A
+        b = _CDF_B
 
         aa = (((((a[0] * y + a[1]) * y + a[2]) * y + a[3]) * y + a[4]) * y + a[5]) * y + a[6]
         bb = ((((((b[0] * y + b[1]) * y + b[2]) * y + b[3]) * y + b[4]) * y + b[5]) * y + b[6]) * y + b[7]
@@ -96,17 +115,7 @@ def norminv(p):
         raise ValueError( "Argument %f must be in open interval (0,1)" % p )
 
     # Coefficients in rational approximations.
-    a = (-3.969683028665376e+01,  2.209460984245205e+02,
-         -2.759285104469687e+02,  1.383577518672690e+02,
-         -3.066479806614716e+01,  2.506628277459239e+00)
-    b = (-5.447609879822406e+01,  1.615858368580409e+02,
-         -1.556989798598866e+02,  6.680131188771972e+01,
-         -1.328068155288572e+01 )
-    c = (-7.784894002430293e-03, -3.223964580411365e-01,
-         -2.400758277161838e+00, -2.549732539343734e+00,
-          4.374664141464968e+00,  2.938163982698783e+00)
-    d = ( 7.784695709041462e-03,  3.224671290700398e-01,
-          2.445134137142996e+00,  3.754408661907416e+00)
+    a, b, c, d = _NORMINV_A, _NORMINV_B, _NORMINV_C, _NORMINV_D
 
     # Define break-points.
     plow  = 0.02425
@@ -123,4 +132,66 @@ def norminv(p):
         r = q*q
         ret = (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
 
-    return ret
\ No newline at end of file
+    return ret
+
+def cdf_array(x):
+    """Array version of cdf: evaluate the same Hart approximation element-wise
+    on an array of any shape and return an array of the same shape.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.abs(x)
+    n = np.zeros_like(y)
+
+    central = y < 7.07106781186547
+    yc = y[central]
+    aa = (((((_CDF_A[0] * yc + _CDF_A[1]) * yc + _CDF_A[2]) * yc + _CDF_A[3]) * yc + _CDF_A[4]) * yc + _CDF_A[5]) * yc + _CDF_A[6]
+    bb = ((((((_CDF_B[0] * yc + _CDF_B[1]) * yc + _CDF_B[2]) * yc + _CDF_B[3]) * yc + _CDF_B[4]) * yc + _CDF_B[5]) * yc + _CDF_B[6]) * yc + _CDF_B[7]
+    n[central] = np.exp(- yc * yc / 2) * (aa / bb)
+
+    tail = ~central & (y <= 37)
+    if tail.any():
+        yt = y[tail]
+        c = yt + 1 / (yt + 2 / (yt + 3 / (yt + 4 / (yt + 0.65))))
+        n[tail] = np.exp(- yt * yt / 2) / (2.506628274631 * c)
+
+    # y > 37 (and nan) stay 0 as in cdf
+    n = np.where(x > 0, 1 - n, n)
+    return n[()] if n.ndim == 0 else n
+
+
+def norminv_array(p):
+    """Array version of norminv: evaluate the same Acklam approximation element-wise
+    on an array of any shape and return an array of the same shape.
+    """
+    p = np.asarray(p, dtype=float)
+    if not np.all((p > 0) & (p < 1)):
+        bad = p[~((p > 0) & (p < 1))].flat[0]
+        raise ValueError("Argument %f must be in open interval (0,1)" % bad)
+
+    a, b, c, d = _NORMINV_A, _NORMINV_B, _NORMINV_C, _NORMINV_D
+    plow = 0.02425
+    phigh = 1 - plow
+    ret = np.empty_like(p)
+
+    central = (p >= plow) & (p <= phigh)
+    q = p[central] - 0.5
+    r = q * q
+    ret[central] = (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+
+    low = p < plow
+    if low.any():
+        q = np.sqrt(-2 * np.log(p[low]))
+        ret[low] = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+
+    high = p > phigh
+    if high.any():
+        q = np.sqrt(-2 * np.log(1 - p[high]))
+        ret[high] = -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+
+    return ret[()] if ret.ndim == 0 else ret
+
+
+def pdf_array(x):
+    """Standard normal probability density function, element-wise on an array of any shape"""
+    x = np.asarray(x, dtype=float)
+    return np.exp(- x * x / 2) / 2.5066282746310002
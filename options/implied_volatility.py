@@ -0,0 +1,153 @@
+"""
+Implied volatility: the volatility which makes the generalized Black-Scholes price equal to
+a given option price (see options/pricing/black_scholes.py)
+
+Working with forward F = S * exp(b * T) and discount factor D = exp(-r * T):
+
+    c = D * (F * N(d1) - X * N(d2))
+    p = D * (X * N(-d2) - F * N(-d1))
+    where:
+        d1 = (ln(F/X) + vol*vol/2 * T) / (vol * sqrt(T))
+        d2 = d1 - vol * sqrt(T)
+
+1. No-arbitrage bounds
+    D * max(F - X, 0) < c < D * F
+    D * max(X - F, 0) < p < D * X
+    Prices outside of the bounds have no implied volatility.
+
+2. Initial guess (Corrado-Miller rational approximation), with put prices turned into
+   call prices by put-call parity c = p + D * (F - X):
+
+    vol * sqrt(T) = sqrt(2 * pi) / (F + X) * (c' - (F - X) / 2 + sqrt((c' - (F - X) / 2)**2 - (F - X)**2 / pi))
+    where:
+        c' = c / D
+
+3. Refinement with Halley's method on the out of the money option, i.e. in the money options
+   are turned into out of the money options of the other type by put-call parity, and on the
+   log of its price which is much closer to linear in vol than the price itself:
+
+    f(vol) = ln(price(vol)) - ln(target)
+    vol_new = vol - f / f' / (1 - f * f'' / (2 * f'**2))
+    where:
+        f'  = vega / price
+        f'' = volga / price - f'**2
+        vega  = D * F * n(d1) * sqrt(T)
+        volga = vega * d1 * d2 / vol
+
+    As the price increases with vol, every iteration also narrows a bracket [lo, hi] of the
+    solution. A step which leaves the bracket is replaced by bisection, so every row converges.
+"""
+
+import numpy as np
+
+from options.functions import cdf_array, pdf_array
+from options.option import get_type_signs, resolve_cost_of_carry
+
+
+class ImpliedVolatilityStatus(object):
+    CONVERGED = 0
+    MAX_ITERATIONS = 1  # not converged within max_iter iterations, the last estimate is returned
+    BELOW_LOWER_BOUND = 2  # price <= intrinsic value, no implied volatility
+    ABOVE_UPPER_BOUND = 3  # price >= D * F for call or D * X for put, no implied volatility
+
+
+class ImpliedVolatilitySolver:
+    def __init__(self, tol=1e-10, max_iter=50, vol_max=10.0):
+        """tol: a row is converged when the volatility changes less than tol in one iteration
+        max_iter: the maximum number of iterations
+        vol_max: the upper end of the initial bracket of the solution
+        """
+        self.tol = tol
+        self.max_iter = max_iter
+        self.vol_max = vol_max
+
+    def solve_book(self, prices, book):
+        """Solve implied volatilities of the options of an OptionBook given their prices"""
+        return self.solve(prices, book.type, book.spot, book.strike, book.rate, book.expiry,
+                          resolve_cost_of_carry(book.cost_of_carry, book.rate))
+
+    def solve(self, prices, types, spots, strikes, rates, expiries, cost_of_carry):
+        """Solve implied volatilities of columns of options given their prices.
+
+        types: OptionType members or their values
+        Return three arrays:
+            vols: implied volatilities, nan if the price is out of the no-arbitrage bounds
+            status: ImpliedVolatilityStatus of each row
+            iterations: the number of iterations of each row
+        """
+        z = get_type_signs(types)
+        prices, spots, strikes, rates, expiries, coc = np.broadcast_arrays(
+            *(np.asarray(col, dtype=float) for col in (prices, spots, strikes, rates, expiries, cost_of_carry)))
+        z = np.broadcast_to(z, prices.shape)
+
+        forward = spots * np.exp(coc * expiries)
+        discount = np.exp(- rates * expiries)
+        sqrt_t = np.sqrt(expiries)
+
+        vols = np.full(prices.shape, np.nan)
+        status = np.full(prices.shape, ImpliedVolatilityStatus.MAX_ITERATIONS, dtype=np.int8)
+        iterations = np.zeros(prices.shape, dtype=np.int32)
+
+        # No-arbitrage bounds
+        undiscounted = prices / discount
+        lower = np.maximum(z * (forward - strikes), 0)
+        upper = np.where(z == 1, forward, strikes)
+        below = undiscounted <= lower
+        above = undiscounted >= upper
+        status[below] = ImpliedVolatilityStatus.BELOW_LOWER_BOUND
+        status[above] = ImpliedVolatilityStatus.ABOVE_UPPER_BOUND
+
+        # Out of the money option of the same strike by put-call parity
+        itm = z * (forward - strikes) > 0
+        otm_z = np.where(itm, -z, z)
+        otm_target = undiscounted - itm * z * (forward - strikes)
+
+        # Corrado-Miller initial guess
+        call = undiscounted + (z == -1) * (forward - strikes)
+        half_moneyness = (forward - strikes) / 2
+        excess = call - half_moneyness
+        root = np.sqrt(np.maximum(excess ** 2 - 4 * half_moneyness ** 2 / np.pi, 0))
+        guess = np.sqrt(2 * np.pi) / (forward + strikes) * (excess + root) / sqrt_t
+
+        active = np.flatnonzero(~(below | above))
+        vol = np.clip(np.nan_to_num(guess[active], nan=0.2), 1e-4, self.vol_max / 2)
+        lo = np.zeros(len(active))
+        hi = np.full(len(active), self.vol_max)
+
+        # Only still active rows are carried from one iteration to the next
+        f_, x_, z_, sq_, target = (a[active] for a in (forward, strikes, otm_z, sqrt_t, otm_target))
+        log_fx = np.log(f_ / x_)
+        for it in range(1, self.max_iter + 1):
+            vol_sqrt_t = vol * sq_
+            d1 = (log_fx + vol_sqrt_t ** 2 / 2) / vol_sqrt_t
+            d2 = d1 - vol_sqrt_t
+            price = z_ * (f_ * cdf_array(z_ * d1) - x_ * cdf_array(z_ * d2))
+            vega = f_ * pdf_array(d1) * sq_
+            volga = vega * d1 * d2 / vol
+
+            diff = price - target
+            hi = np.where(diff > 0, vol, hi)
+            lo = np.where(diff < 0, vol, lo)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f = np.log(price / target)
+                f1 = vega / price
+                f2 = volga / price - f1 ** 2
+                newton = f / f1
+                step = newton / (1 - np.clip(newton * f2 / (2 * f1), -0.5, 0.5))
+                new_vol = vol - step
+            outside = ~((new_vol > lo) & (new_vol < hi))
+            new_vol[outside] = (lo[outside] + hi[outside]) / 2
+
+            done = (np.abs(new_vol - vol) < self.tol) | (diff == 0)
+            vol = new_vol
+            iterations[active] = it
+            vols[active] = vol
+            status[active[done]] = ImpliedVolatilityStatus.CONVERGED
+
+            keep = ~done
+            if not keep.any():
+                break
+            active, vol, lo, hi = active[keep], vol[keep], lo[keep], hi[keep]
+            f_, x_, z_, sq_, target, log_fx = (a[keep] for a in (f_, x_, z_, sq_, target, log_fx))
+
+        return vols, status, iterations
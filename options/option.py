@@ -1,9 +1,32 @@
 from enum import Enum
 
+import numpy as np
+
+
+# Cost of carry rate b of each product as (coefficient of rate, coefficient of dividend):
+#     b = r           stock option model
+#     b = r - q       stock option model with dividend yield q
+#     b = 0           futures option model
+#     b = r = 0       margined futures option model
+#     b = r - rf      currency option model
+#
+# The cost of carry of an option is unset when it is None (nan in an OptionBook). An unset cost of
+# carry is decided by the product when the product is known, and is b = r (stock option model) when
+# there is no product, see resolve_cost_of_carry. An explicit cost of carry, including 0, is always kept.
+PRODUCT_COC = {
+    'stock_option': (1, 0),
+    'stock_option_with_dividend': (1, -1),
+    'futures_option': (0, 0),
+    'margined_futures_option': (0, 0),
+    'currency_option': (1, -1),
+}
+
 
 class Option:
     """One option object"""
-    def __init__(self, type, spot, strike, rate, expiry, vol, dividend=0, cost_of_carry=0, product=''):
+    __slots__ = ('type', 'spot', 'strike', 'rate', 'expiry', 'vol', 'dividend', 'cost_of_carry', 'product')
+
+    def __init__(self, type, spot, strike, rate, expiry, vol, dividend=0, cost_of_carry=None, product=''):
         self.type = type
         self.spot = spot
         self.strike = strike
@@ -14,15 +37,8 @@ class Option:
         self.cost_of_carry = cost_of_carry
         self.product = product
 
-        product_coc_map = {
-            'stock_option': rate,
-            'stock_option_with_dividend': rate - dividend,
-            'futures_option': 0,
-            'margined_futures_option': 0,
-            'currency_option': rate - dividend,
-        }
-        if not self.cost_of_carry and product in product_coc_map:
-            self.cost_of_carry = product_coc_map[product]
+        if self.cost_of_carry is None and product in PRODUCT_COC:
+            self.cost_of_carry = get_cost_of_carry(product, rate, dividend)
 
     def overwrite(self, **kwargs):
         for attr, value in kwargs.items():
@@ -30,6 +46,82 @@ class Option:
                 setattr(self, attr, value)
 
 
+class OptionBook:
+    """Many options stored column by column (struct of arrays) instead of one Option object each.
+
+    Every column is a contiguous NumPy array named after the Option attribute it holds, so
+    book.spot, book.strike etc. can be used wherever option.spot, option.strike are.
+    "type" holds OptionType values and "product" holds indexes into PRODUCTS.
+
+    Slicing a book (book[10:20]) returns a book of views on the same columns without copying;
+    filtering with a boolean mask or an index array (book[book.expiry > 1]) copies the selected rows.
+    """
+    __slots__ = COLUMNS = ('type', 'spot', 'strike', 'rate', 'expiry', 'vol', 'dividend', 'cost_of_carry', 'product')
+    DTYPES = ('i1', 'f8', 'f8', 'f8', 'f8', 'f8', 'f8', 'f8', 'i1')
+    PRODUCTS = ('',) + tuple(PRODUCT_COC)
+
+    def __init__(self, type, spot, strike, rate, expiry, vol, dividend=0, cost_of_carry=None, product=''):
+        """Build a book from columns. Scalars are broadcast to the length of the book.
+        type accepts OptionType members or their values, product accepts names or their codes.
+        As in Option, an unset cost of carry (None or nan) is decided by the product when the product
+        is known; the other unset rows are kept as nan, see resolve_cost_of_carry.
+        """
+        type = np.asarray(type)
+        if type.dtype == object:
+            type = np.array([t.value if isinstance(t, OptionType) else t for t in type.ravel()]).reshape(type.shape)
+        product = np.asarray(product)
+        if product.dtype.kind in 'US':  # unknown products are stored as -1
+            product = np.array([self.PRODUCTS.index(p) if p in self.PRODUCTS else -1 for p in product.ravel()]).reshape(product.shape)
+
+        cost_of_carry = np.array(cost_of_carry, dtype=float)  # None is stored as nan
+        columns = np.broadcast_arrays(type, spot, strike, rate, expiry, vol, dividend, cost_of_carry, product)
+        for name, dtype, column in zip(self.COLUMNS, self.DTYPES, columns):
+            setattr(self, name, np.array(column, dtype=dtype, ndmin=1))
+
+        unset = np.isnan(self.cost_of_carry) & (self.product > 0)
+        if unset.any():
+            products = np.array(self.PRODUCTS)[self.product[unset]]
+            self.cost_of_carry[unset] = get_cost_of_carry(products, self.rate[unset], self.dividend[unset])
+
+    @classmethod
+    def _from_columns(cls, columns):
+        book = cls.__new__(cls)
+        for name, column in zip(cls.COLUMNS, columns):
+            setattr(book, name, column)
+        return book
+
+    @classmethod
+    def from_options(cls, options):
+        """Build a book from a sequence of Option objects"""
+        return cls(*[[getattr(option, name) if name != 'type' else option.type.value for option in options]
+                     for name in cls.COLUMNS])
+
+    def to_options(self):
+        """Return a list of Option objects, one per row"""
+        return [self[i] for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.spot)
+
+    def __getitem__(self, key):
+        """An integer returns that row as an Option object; slices return a book of views;
+        boolean masks and index arrays return a book of copies
+        """
+        if isinstance(key, (int, np.integer)):
+            option = Option.__new__(Option)
+            for name in self.COLUMNS:
+                setattr(option, name, getattr(self, name)[key].item())
+            option.type = OptionType(option.type)
+            option.product = self.PRODUCTS[option.product] if option.product >= 0 else ''
+            if np.isnan(option.cost_of_carry):
+                option.cost_of_carry = None
+            return option
+        return self._from_columns([getattr(self, name)[key] for name in self.COLUMNS])
+
+    def copy(self):
+        return self._from_columns([getattr(self, name).copy() for name in self.COLUMNS])
+
+
 class OptionType(Enum):
     CALL = 0
     PUT = 1
@@ -40,3 +132,52 @@ class OptionTypeError(Exception):
         return 'Unknown option type. It must be OptionType.CALL or OptionType.PUT'
 
 
+def get_cost_of_carry(product, rate, dividend=0):
+    """Return the cost of carry rate of a product, or of an array of products row by row"""
+    if np.ndim(product) == 0:
+        rate_coef, dividend_coef = PRODUCT_COC[product]
+    else:
+        names = np.array(sorted(PRODUCT_COC))
+        product = np.asarray(product)
+        idx = np.minimum(np.searchsorted(names, product), len(names) - 1)
+        unknown = names[idx] != product
+        if unknown.any():
+            raise KeyError(product[unknown][0])
+        coefs = np.array([PRODUCT_COC[name] for name in names])
+        rate_coef, dividend_coef = coefs[idx, 0], coefs[idx, 1]
+    return rate_coef * rate + dividend_coef * dividend
+
+
+def resolve_cost_of_carry(cost_of_carry, rate):
+    """Return the cost of carry rate b to price with, element-wise: an unset cost of carry (None or nan),
+    left when there is no product to decide it, is the rate as in the stock option model b = r
+    """
+    if cost_of_carry is None:
+        return rate
+    if np.ndim(cost_of_carry) == 0 and np.ndim(rate) == 0:
+        return rate if np.isnan(cost_of_carry) else cost_of_carry
+    cost_of_carry = np.asarray(cost_of_carry, dtype=float)
+    return np.where(np.isnan(cost_of_carry), rate, cost_of_carry)
+
+
+def get_rate_coefficients(products):
+    """Return how much the cost of carry moves with the rate (db/dr) of each product, element-wise over
+    product names or OptionBook codes: 0 for the futures option models, whose b is fixed at 0, and 1 for
+    every other product, including options without a product, whose b is r or an explicit r - q
+    """
+    products = np.asarray(products)
+    if products.dtype.kind in 'US':
+        products = np.array([OptionBook.PRODUCTS.index(p) if p in OptionBook.PRODUCTS else -1
+                             for p in products.ravel()]).reshape(products.shape)
+    fixed = [OptionBook.PRODUCTS.index(p) for p in PRODUCT_COC if PRODUCT_COC[p] == (0, 0)]
+    return np.where(np.isin(products, fixed), 0, 1)
+
+
+def get_type_signs(types):
+    """Return 1 for calls and -1 for puts, element-wise over an array of OptionType or their values"""
+    types = np.asarray(types)
+    if types.dtype == object:
+        types = np.array([t.value if isinstance(t, OptionType) else t for t in types.ravel()]).reshape(types.shape)
+    if not np.isin(types, (OptionType.CALL.value, OptionType.PUT.value)).all():
+        raise OptionTypeError
+    return np.where(types == OptionType.CALL.value, 1, -1)
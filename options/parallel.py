@@ -0,0 +1,125 @@
+"""
+Parallel map over the rows of numpy arrays with a reused pool of worker processes
+
+The input columns and the output array are placed in multiprocessing.shared_memory blocks. A task only
+pickles the names, shapes and dtypes of the blocks with its row range [start, stop), the worker attaches
+to the blocks and writes the result of its rows straight into the output, so neither the inputs nor the
+outputs are pickled and the rows come back in order whatever the order in which the tasks finish.
+"""
+
+import atexit
+from multiprocessing import Pool, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from options.option import OptionBook
+
+
+_pools = {}
+
+
+def get_pool(processes):
+    """Return the pool of the given number of worker processes, started on first use and then reused"""
+    if processes not in _pools:
+        # workers share the resource tracker of this process, which unlinks leaked shared memory blocks
+        resource_tracker.ensure_running()
+        _pools[processes] = Pool(processes)
+    return _pools[processes]
+
+
+def close_pools():
+    """Terminate the worker processes of all pools"""
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.terminate()
+        pool.join()
+
+
+atexit.register(close_pools)
+
+
+def _attach(name):
+    """Attach to a shared memory block created by another process, which owns and unlinks it"""
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # before Python 3.13 attaching registers the block again with the shared resource tracker, which
+        # keeps a set of names, so it is still unregistered once when the owner unlinks it
+        return SharedMemory(name=name)
+
+
+def _run_slice(task):
+    """Run func on rows [start, stop) of the shared input columns and write its result to the shared output"""
+    func, inputs, output, start, stop = task
+    blocks = [_attach(name) for name, _, _ in inputs + [output]]
+    try:
+        arrays = [np.ndarray(shape, dtype, buffer=block.buf) for block, (_, shape, dtype) in zip(blocks, inputs + [output])]
+        arrays[-1][start:stop] = func(*(array[start:stop] for array in arrays[:-1]))
+    finally:
+        # the views must be released before the blocks are closed
+        arrays = None
+        for block in blocks:
+            block.close()
+
+
+def parallel_map(func, columns, out_shape=(), out_dtype=float, processes=4, chunk_size=None):
+    """Apply func to the rows of columns in chunks and return the results of all rows in order.
+
+    func: called as func(*slices) with rows [start, stop) of every column, returns an array of shape
+          (stop - start,) + out_shape. It is pickled with every task, so it must be a module level
+          function or a method of a picklable object.
+    columns: arrays with the same number of rows n
+    out_shape: the shape of the result of one row
+    processes: the number of worker processes, 0 to run in the calling process
+    chunk_size: the number of rows of one task, by default the rows are split evenly over the processes
+    Return an array of shape (n,) + out_shape
+    """
+    columns = [np.ascontiguousarray(column) for column in columns]
+    n = len(columns[0])
+    out_shape = (n,) + tuple(out_shape)
+    chunk_size = chunk_size or max(-(-n // max(processes, 1)), 1)
+
+    if not processes:
+        out = np.empty(out_shape, out_dtype)
+        for start in range(0, n, chunk_size):
+            out[start:start + chunk_size] = func(*(column[start:start + chunk_size] for column in columns))
+        return out
+
+    arrays = columns + [np.empty(out_shape, out_dtype)]
+    blocks, specs = [], []
+    try:
+        for array in arrays:
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            specs.append((block.name, array.shape, array.dtype.str))
+
+        tasks = [(func, specs[:-1], specs[-1], start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+        get_pool(processes).map(_run_slice, tasks)
+        return np.ndarray(out_shape, out_dtype, buffer=blocks[-1].buf).copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+class _BookPricer:
+    """Price the rows of an OptionBook given as columns, a picklable func of parallel_map"""
+    def __init__(self, pricer, kwargs):
+        self.pricer = pricer
+        self.kwargs = kwargs
+
+    def __call__(self, *columns):
+        return self.pricer.price_option(OptionBook._from_columns(columns), **self.kwargs)
+
+
+def parallel_price(pricer, book, processes=4, chunk_size=None, **kwargs):
+    """Price an OptionBook with pricer.price_option(book_slice, **kwargs) on slices of the book in parallel
+    and return the array of prices in the order of the book.
+
+    The pricer is pickled to the worker processes, which are daemonic and can't start processes of
+    their own, so a MonteCarloPricer must run in vectorized mode or with ps_num = 0.
+    """
+    columns = [getattr(book, name) for name in OptionBook.COLUMNS]
+    return parallel_map(_BookPricer(pricer, kwargs), columns, processes=processes, chunk_size=chunk_size)
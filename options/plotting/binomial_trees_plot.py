@@ -1,6 +1,3 @@
-from math import ceil
-from multiprocessing import Process, Queue
-
 import matplotlib.pyplot as plt
 from options.pricing.binomial_trees import BinomialTreePricer
 from options.option import OptionType, Option
@@ -19,48 +16,21 @@ class OptionPricePlotter:
         self.pricer.set_steps(steps)
         return self.pricer.price_option(self.option)
 
-    def _ps_slice(self, steps_list_slice, resultq, idx):
-        prices = [self.get_price(steps=steps) for steps in steps_list_slice]
-        resultq.put((idx, prices))
-        resultq.close()
-
-    def plot_price_vs_steps(self, start, end, step, ps_num=16):
+    def plot_price_vs_steps(self, start, end, step, ps_num=0):
         """ps_num: run in multiprocess mode with ps_num processes
         To run in single process mode, ps_num = 0
         """
-        steps_list = range(start, end, step)
-
-        if ps_num:
-            # Multi processing
-            resultq = Queue()
-            slice_len = int(ceil(len(steps_list) * 1.0 / ps_num))
-            processes = [Process(target=self._ps_slice, args=(steps_list[i*slice_len : (i+1)*slice_len], resultq, i)) for i in range(ps_num)]
-            for p in processes:
-                p.start()
-            for p in processes:
-                p.join()
-            
-            # Make sure to concatenate lists in order
-            dict = {}
-            while not resultq.empty():
-                key, value = resultq.get()
-                dict[key] = value
-            
-            prices = []
-            for k in sorted(dict.keys()):
-                prices += dict[k]
-                
-        else:
-            # Single processing
-            prices = [self.get_price(steps=steps) for steps in steps_list]
+        sweep = self.pricer.sweep_steps(self.option, range(start, end, step), processes=ps_num)
+        steps_list = sweep['steps']
 
         fig = plt.figure()
-        plt.plot(steps_list, prices)
+        plt.plot(steps_list, sweep['price'])
+        plt.fill_between(steps_list, sweep['lower'], sweep['upper'], alpha=0.3)
+        plt.axhline(sweep['limit'], color='r', linestyle='--')
 
         plt.xlabel('Number of steps for Binomial Tree')
         plt.ylabel('Option Price')
         #plt.axis([0, 300, 6, 8])
-        print(prices[-1])
         return fig
 
 
@@ -71,12 +41,9 @@ def get_bt_plot():
 
     # plt.subplot(2, 1, 2)
     # opp.plot_price_vs_steps(200, 300, 3)
-    import time
-    t0 = time.time()
-    fig = opp.plot_price_vs_steps(6, 300, 1, 4)
-    # (6, 900, 3): M5: 90  M10: 77  M20: 65  M30: 77  S: 171
-    # (6, 400, 1): S: 42
-    # (6, 300, 1): S: 18  M4: 13  M10: 14
+    fig = opp.plot_price_vs_steps(6, 300, 1)
+    # European trees of all steps are summed in one sweep: (6, 2000, 1) takes about 0.1s,
+    # American trees are priced one by one, see BinomialTreePricer.sweep_steps
     return fig
 
 
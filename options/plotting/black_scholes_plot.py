@@ -1,25 +1,35 @@
 import matplotlib.pyplot as plt
 import numpy as np
 from options.option import OptionType, Option
+from options.plotting.surface import curve
 from options.pricing.black_scholes import BlackScholesPricer
 
 
 class OptionPricePlotter:
-    def get_price(self, otype=OptionType.CALL, product='stock_option', 
-                  spot=60, strike=65, rate=0.08, expiry=0.25, vol=0.3):
+    def get_option(self, otype=OptionType.CALL, product='stock_option',
+                   spot=60, strike=65, rate=0.08, expiry=0.25, vol=0.3):
+        """The option of the plots, with the attributes of get_price"""
+        return Option(otype, spot, strike, rate, expiry, vol, product=product)
+
+    def get_price(self, **kwargs):
         """Q:  (Vanilla option)
             A European call option, 3 month to expiry, stock price is 60, the strike
             price is 65, risk free interest rate is 8% per year, volatility is 30% per year
         A:
             2.1334
+        kwargs: otype, product, spot, strike, rate, expiry and vol, see get_option for their defaults
         """
-        option = Option(otype, spot, strike, rate, expiry, vol, product=product)
+        option = self.get_option(**kwargs)
         pricer = BlackScholesPricer()
         return pricer.price_option(option)
 
+    def get_prices(self, axis, values):
+        """Prices of the option of get_price with the attribute axis taking all values, in one vectorized call"""
+        return curve(self.get_option(), (axis, values))
+
     def plot_price_vs_expiry(self):
         months_to_expiry = np.arange(1, 800, 1)
-        prices = [self.get_price(expiry=m * 1.0 / 12) for m in months_to_expiry]
+        prices = self.get_prices('expiry', months_to_expiry / 12.0)
 
         plt.plot(months_to_expiry, prices, # blue 
                  months_to_expiry, [60] * len(months_to_expiry), 'r--'  # red dash
@@ -30,7 +40,7 @@ class OptionPricePlotter:
 
     def plot_price_vs_strike(self):
         k_prices = np.arange(0.1, 90, 1)
-        prices = [self.get_price(strike=k) for k in k_prices]
+        prices = self.get_prices('strike', k_prices)
 
         plt.plot(k_prices, prices,
                  k_prices, [0] * len(k_prices), 'r--')
@@ -40,7 +50,7 @@ class OptionPricePlotter:
 
     def plot_price_vs_spot(self):
         s_prices = np.arange(30, 90, 1)
-        prices = [self.get_price(spot=s) for s in s_prices]
+        prices = self.get_prices('spot', s_prices)
 
         plt.plot(s_prices, prices,
                  s_prices, [0] * len(s_prices), 'r--')
@@ -53,7 +63,7 @@ class OptionPricePlotter:
         the price of option tends to spot price of underlying asset. 
         """
         vols = np.arange(0.1, 15, 0.1)
-        prices = [self.get_price(vol=v) for v in vols]
+        prices = self.get_prices('vol', vols)
 
         plt.plot(vols, prices,
                  vols, [60] * len(vols), 'r--')
@@ -0,0 +1,119 @@
+"""
+Cache of rendered plots as PNG bytes
+
+A plot is identified by its name, the keyword arguments of its render function and the version of the
+cache, so the key of a plot is
+    sha256 of the JSON of (version, name, sorted parameters)
+It is also used as the ETag of the image: the same key always means the same image.
+
+In memory, the least recently used images are evicted once their total size is more than max_bytes.
+With a directory, every image is also stored in <directory>/<key>.png. The file is written to a
+temporary file and renamed, so the processes sharing the directory (e.g. the workers of gunicorn) never
+read a partial image, and an image rendered by one of them is read by the others instead of being
+rendered again. Bump the version when a plot changes to leave the stale files behind.
+
+Rendering is serialized by a lock: pyplot keeps global state and isn't thread safe, and a plot which is
+requested again while it is rendered is rendered once.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+
+class PlotCache:
+    def __init__(self, max_bytes=32 * 2**20, directory=None, version=1):
+        """max_bytes: the maximum total size of the images kept in memory
+        directory: the directory of the images on disk, None to keep them in memory only
+        version: part of every key, see the module docstring
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.version = version
+        self.images = OrderedDict()  # key: PNG bytes, least recently used first
+        self.size = 0
+        self.lock = threading.RLock()
+        self.render_lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, name, params=None):
+        """Return the key of a plot, see the module docstring"""
+        text = json.dumps([self.version, name, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, name, render, params=None):
+        """Return the key and the PNG bytes of a plot, rendering it with render(**params) on a miss.
+        render returns a matplotlib figure, which is closed once it is encoded.
+        """
+        key = self.get_key(name, params)
+        image = self._load(key)
+        if image is None:
+            with self.render_lock:
+                image = self._load(key)  # rendered while waiting for the lock
+                if image is None:
+                    image = self._render(render, params or {})
+                    self._write(key, image)
+                    self._store(key, image)
+        return key, image
+
+    def warm_up(self, plots):
+        """Render the plots of a dict {name: render function} which aren't cached yet"""
+        for name, render in plots.items():
+            self.get(name, render)
+
+    def _render(self, render, params):
+        import matplotlib.pyplot as plt
+        fig = render(**params)
+        try:
+            buffer = BytesIO()
+            fig.savefig(buffer, format='png')
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+
+    def _load(self, key):
+        """Return the image of key from memory or from disk, None if it isn't cached"""
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+        if not self.directory:
+            return None
+        try:
+            with open(self._get_path(key), 'rb') as f:
+                image = f.read()
+        except FileNotFoundError:
+            return None
+        self._store(key, image)
+        return image
+
+    def _store(self, key, image):
+        """Keep an image in memory and evict the least recently used ones beyond max_bytes"""
+        with self.lock:
+            if key in self.images:
+                return
+            self.images[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes and self.images:
+                _, evicted = self.images.popitem(last=False)
+                self.size -= len(evicted)
+
+    def _write(self, key, image):
+        if not self.directory:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image)
+            os.replace(tmp, self._get_path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + '.png')
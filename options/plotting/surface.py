@@ -0,0 +1,62 @@
+"""
+Curves and surfaces of Black-Scholes prices and greeks over grids of option parameters
+
+An axis is a pair (name, values) of an Option attribute ('spot', 'strike', 'rate', 'expiry', 'vol',
+'dividend' or 'cost_of_carry') and the values it takes. The other attributes come from an option template.
+All points of a curve or surface are one OptionBook priced by one vectorized call:
+
+    BlackScholesPricer.price_options   for the quantity 'price'
+    get_greeks_array                   for the quantities in GREEKS
+
+When the cost of carry of the template is decided by its product (b = r, r - q, ...), it is decided again
+at every point, so that it follows the rate and the dividend along their axes.
+"""
+
+import numpy as np
+
+from options.black_scholes_greeks import GREEKS, get_greeks_array
+from options.option import OptionBook, PRODUCT_COC, get_cost_of_carry, resolve_cost_of_carry
+from options.pricing.black_scholes import BlackScholesPricer
+
+
+AXES = ('spot', 'strike', 'rate', 'expiry', 'vol', 'dividend', 'cost_of_carry')
+QUANTITIES = ('price',) + GREEKS
+
+
+def curve(option_template, axis, quantity='price'):
+    """Return the array of quantity at every value of axis, see the module docstring"""
+    name, values = axis
+    return _evaluate(option_template, {name: np.asarray(values, dtype=float)}, quantity)
+
+
+def surface(option_template, axis_x, axis_y, quantity='price'):
+    """Return the meshgrid arrays X, Y of the values of axis_x and axis_y and the array Z of quantity at
+    every point, all of shape (len(axis_y values), len(axis_x values)) as for plot_surface
+    """
+    (name_x, values_x), (name_y, values_y) = axis_x, axis_y
+    assert name_x != name_y, 'the axes must be different attributes; received: {} twice'.format(name_x)
+    x, y = np.meshgrid(np.asarray(values_x, dtype=float), np.asarray(values_y, dtype=float))
+    return x, y, _evaluate(option_template, {name_x: x, name_y: y}, quantity)
+
+
+def _evaluate(option_template, columns, quantity):
+    """Evaluate quantity of the template with some attributes replaced by arrays of the same shape"""
+    assert quantity in QUANTITIES, 'quantity must be one of {}; received: {}'.format(QUANTITIES, quantity)
+    for name in columns:
+        assert name in AXES, 'axis must be one of {}; received: {}'.format(AXES, name)
+
+    shape = np.shape(next(iter(columns.values())))
+    opt = option_template
+    params = {name: columns.get(name, getattr(opt, name)) for name in AXES}
+    if 'cost_of_carry' not in columns and opt.product in PRODUCT_COC and \
+            opt.cost_of_carry == get_cost_of_carry(opt.product, opt.rate, opt.dividend):
+        params['cost_of_carry'] = None  # decided by the product at every point
+    book = OptionBook(np.full(shape, opt.type.value).ravel(), *(np.broadcast_to(params[name], shape).ravel() for name in AXES),
+                      product=opt.product if opt.product in PRODUCT_COC else '')
+
+    if quantity == 'price':
+        values = BlackScholesPricer().price_option(book, round_digit=None)
+    else:
+        values = get_greeks_array(book.type, book.spot, book.strike, book.rate, book.expiry, book.vol,
+                                  resolve_cost_of_carry(book.cost_of_carry, book.rate), book.product)[quantity]
+    return values.reshape(shape)
@@ -81,12 +81,29 @@ Standard Barrier Options
     payoff = max(X - S, 0) if S >= H before T else K at hit
         X > H: p = B - D + F
         X < H: p = A - C + F
+
+3. Batch pricing (get_barrier_prices)
+    Every payoff above is a sum of the terms A, B, C, D, E, F with coefficients 0, 1 or -1, listed in
+    COEFFICIENTS for the 16 cases of barrier type, option type, barrier direction and strike. For
+    arrays of barrier options the shared factors
+        exp((b - r) * T), exp(-r * T), vol * sqrt(T), (H / S)**2u, (H / S)**(2u + 2), (H / S)**(u +- la)
+    are computed once per option, the six terms once per option with its own ita and fi, and the
+    price is the dot product of the terms with the coefficients of the case of the option.
+
+4. Greeks (get_barrier_greeks)
+    delta = dV/dS, gamma = d2V/dS2, vega = dV/dvol and theta = - dV/dT are propagated in forward mode
+    through the same evaluation: every intermediate (u, la, x1, ..., the powers of H / S, the six terms)
+    carries its derivatives, which the chain rule updates once per operation. There is no bump, so
+    the greeks stay accurate next to the barrier, where gamma is large and bumped prices would cross
+    the barrier.
 """
 
 from math import exp, log, sqrt
 
-from options.functions import cdf
-from options.option import OptionType
+import numpy as np
+
+from options.functions import cdf, cdf_array, pdf_array
+from options.option import OptionType, get_type_signs
 
 
 class BarrierType(object):
@@ -99,6 +116,20 @@ class BarrierTypeError(Exception):
         return 'Unknown barrier type. It must be BarrierType.IN or BarrierType.OUT'
 
 
+# Coefficients of A, B, C, D, E, F indexed by
+# [barrier type (IN, OUT), option type (CALL, PUT), direction (down S > H, up), strike (X > H, X <= H)]
+COEFFICIENTS = np.array([
+    [[[(0, 0, 1, 0, 1, 0), (1, -1, 0, 1, 1, 0)],        # down-and-in call
+      [(1, 0, 0, 0, 1, 0), (0, 1, -1, 1, 1, 0)]],       # up-and-in call
+     [[(0, 1, -1, 1, 1, 0), (1, 0, 0, 0, 1, 0)],        # down-and-in put
+      [(1, -1, 0, 1, 1, 0), (0, 0, 1, 0, 1, 0)]]],      # up-and-in put
+    [[[(1, 0, -1, 0, 0, 1), (0, 1, 0, -1, 0, 1)],       # down-and-out call
+      [(0, 0, 0, 0, 0, 1), (1, -1, 1, -1, 0, 1)]],      # up-and-out call
+     [[(1, -1, 1, -1, 0, 1), (0, 0, 0, 0, 0, 1)],       # down-and-out put
+      [(0, 1, 0, -1, 0, 1), (1, 0, -1, 0, 0, 1)]]],     # up-and-out put
+], dtype=float)
+
+
 class BarrierOption:
     
     def __init__(self, spot, strike, rate, expiry, vol, coc, rebate, bar):
@@ -222,7 +253,169 @@ class BarrierOption:
         
         return round(payoff, 4)
 
-        
+    def get_greeks(self, opt_type, bar_type, round_digit=4):
+        """Return a dict of price, delta, gamma, vega and theta, see get_barrier_greeks.
+        If round_digit is None, values are not rounded.
+        """
+        greeks = get_barrier_greeks(opt_type.value, bar_type, self.spot, self.strike, self.rate, self.expiry, self.vol,
+                                    self.coc, self.rebate, self.bar)
+        greeks = {name: float(value) for name, value in greeks.items()}
+        return greeks if round_digit is None else {name: round(value, round_digit) for name, value in greeks.items()}
+
+
+
+def get_barrier_prices(opt_types, bar_types, spots, strikes, rates, expiries, vols, cocs, rebates, bars):
+    """Return an array of unrounded prices of barrier options given as columns, see the module docstring.
+    opt_types: OptionType members or their values
+    bar_types: BarrierType.IN or BarrierType.OUT
+    The other columns are the arguments of BarrierOption, scalars are broadcast.
+    """
+    return _get_barrier_values(opt_types, bar_types, spots, strikes, rates, expiries, vols, cocs, rebates, bars)
+
+
+def get_barrier_greeks(opt_types, bar_types, spots, strikes, rates, expiries, vols, cocs, rebates, bars):
+    """Return a dict of arrays of unrounded price, delta, gamma, vega and theta of barrier options given as
+    columns like get_barrier_prices, see the module docstring. theta is the time decay - dV / dT.
+    """
+    shape = np.broadcast(*(np.asarray(col) for col in (opt_types, bar_types, spots, strikes, rates, expiries, vols,
+                                                      cocs, rebates, bars))).shape
+    spots, vols, expiries = (np.broadcast_to(np.asarray(col, dtype=float), shape) for col in (spots, vols, expiries))
+    zero = np.zeros_like(spots)
+    seeds = [_Jet(col, np.stack([np.ones_like(spots) if i == j else zero for j in range(3)]), zero)
+             for i, col in enumerate((spots, vols, expiries))]
+    value = _get_barrier_values(opt_types, bar_types, seeds[0], strikes, rates, seeds[2], seeds[1], cocs, rebates, bars)
+    return {'price': value.value, 'delta': value.grad[0], 'gamma': value.gamma, 'vega': value.grad[1],
+            'theta': - value.grad[2]}
+
+
+def _get_barrier_values(opt_types, bar_types, spots, strikes, rates, expiries, vols, cocs, rebates, bars):
+    """The prices of get_barrier_prices, or their _Jet when spots, expiries and vols are _Jet objects"""
+    fi = get_type_signs(opt_types)
+    bar_types = np.asarray(bar_types)
+    if not np.isin(bar_types, (BarrierType.IN, BarrierType.OUT)).all():
+        raise BarrierTypeError
+    spot_values, expiry_values, vol_values = (_get_value(col) for col in (spots, expiries, vols))
+    strikes, rates, cocs, rebates, bars = (np.asarray(col, dtype=float) for col in (strikes, rates, cocs, rebates, bars))
+    shape = np.broadcast(fi, bar_types, spot_values, strikes, rates, expiry_values, vol_values, cocs, rebates, bars).shape
+    down = np.broadcast_to(spot_values > bars, shape)
+    ita = np.where(down, 1, -1)
+
+    # Shared factors
+    vol_t = vols * _sqrt(expiries)
+    df = _exp(- rates * expiries)
+    spot_term = spots * _exp(cocs * expiries) * df
+    strike_term = strikes * df
+    var = vols * vols
+    u = (cocs - var / 2) / var
+    la = _sqrt(u * u + 2 * rates / var)
+    log_hs = _log(bars / spots)
+    log_sx = _log(spots / strikes)
+    hs_2u = _exp(2 * u * log_hs)
+    hs_2u2 = hs_2u * _exp(2 * log_hs)
+    drift = (1 + u) * vol_t
+
+    x1 = log_sx / vol_t + drift
+    x2 = - log_hs / vol_t + drift
+    y1 = (2 * log_hs + log_sx) / vol_t + drift
+    y2 = log_hs / vol_t + drift
+    z = log_hs / vol_t + la * vol_t
+
+    terms = [
+        fi * (spot_term * _cdf(fi * x1) - strike_term * _cdf(fi * (x1 - vol_t))),
+        fi * (spot_term * _cdf(fi * x2) - strike_term * _cdf(fi * (x2 - vol_t))),
+        fi * (spot_term * hs_2u2 * _cdf(ita * y1) - strike_term * hs_2u * _cdf(ita * (y1 - vol_t))),
+        fi * (spot_term * hs_2u2 * _cdf(ita * y2) - strike_term * hs_2u * _cdf(ita * (y2 - vol_t))),
+        rebates * df * (_cdf(ita * (x2 - vol_t)) - hs_2u * _cdf(ita * (y2 - vol_t))),
+        rebates * (_exp((u + la) * log_hs) * _cdf(ita * z) + _exp((u - la) * log_hs) * _cdf(ita * (z - 2 * la * vol_t))),
+    ]
+    coefficients = COEFFICIENTS[np.broadcast_to(bar_types, shape), np.broadcast_to(fi == -1, shape).astype(int),
+                                (~down).astype(int), np.broadcast_to(strikes <= bars, shape).astype(int)]
+    return sum(coefficients[..., k] * term for k, term in enumerate(terms))
+
+
+class _Jet:
+    """An array of values with their derivatives with respect to spot, vol and expiry (grad, stacked on the
+    first axis) and their second derivatives with respect to spot (gamma), propagated in forward mode.
+    Every operation applies the chain rule once to the intermediates of the single evaluation.
+    """
+    __slots__ = ('value', 'grad', 'gamma')
+    __array_ufunc__ = None  # numpy arrays defer their arithmetic operators to _Jet
+
+    def __init__(self, value, grad, gamma):
+        self.value = value
+        self.grad = grad
+        self.gamma = gamma
+
+    def apply(self, f, f1, f2):
+        """Return the _Jet of g(self) with g = f, g' = f1, g'' = f2 at self.value"""
+        return _Jet(f, f1 * self.grad, f2 * self.grad[0] * self.grad[0] + f1 * self.gamma)
+
+    def __add__(self, other):
+        if isinstance(other, _Jet):
+            return _Jet(self.value + other.value, self.grad + other.grad, self.gamma + other.gamma)
+        return _Jet(self.value + other, self.grad, self.gamma)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Jet(- self.value, - self.grad, - self.gamma)
+
+    def __sub__(self, other):
+        return self + (- other)
+
+    def __rsub__(self, other):
+        return (- self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, _Jet):
+            return _Jet(self.value * other.value, self.grad * other.value + self.value * other.grad,
+                        self.gamma * other.value + 2 * self.grad[0] * other.grad[0] + self.value * other.gamma)
+        return _Jet(self.value * other, self.grad * other, self.gamma * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, _Jet):
+            return self * other.__rtruediv__(1)
+        return self * (1 / np.asarray(other, dtype=float))
+
+    def __rtruediv__(self, other):
+        inverse = 1 / self.value
+        return self.apply(inverse, - inverse * inverse, 2 * inverse * inverse * inverse) * other
+
+
+def _get_value(x):
+    return x.value if isinstance(x, _Jet) else x
+
+
+def _exp(x):
+    if isinstance(x, _Jet):
+        value = np.exp(x.value)
+        return x.apply(value, value, value)
+    return np.exp(x)
+
+
+def _log(x):
+    if isinstance(x, _Jet):
+        inverse = 1 / x.value
+        return x.apply(np.log(x.value), inverse, - inverse * inverse)
+    return np.log(x)
+
+
+def _sqrt(x):
+    if isinstance(x, _Jet):
+        value = np.sqrt(x.value)
+        return x.apply(value, 0.5 / value, - 0.25 / (value * x.value))
+    return np.sqrt(x)
+
+
+def _cdf(x):
+    if isinstance(x, _Jet):
+        density = pdf_array(x.value)
+        return x.apply(cdf_array(x.value), density, - x.value * density)
+    return cdf_array(x)
+
+
 if __name__ == '__main__':
     
     bo = BarrierOption(100, 90, 0.08, 0.5, 0.25, 0.04, 3, 95)
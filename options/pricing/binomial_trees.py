@@ -8,8 +8,10 @@ Calculate option price using Binomial trees:
     p = (a - d) / (u - d)
     
     where 
-        a = exp(rate * delta_t)
+        a = exp(b * delta_t)
         delta_t = expiry / steps
+        b: cost of carry rate, see the generalized Black-Scholes formula in black_scholes.py
+           (b = rate when the cost of carry is unset and there is no product, see options/option.py)
         p: the probability of an up movement in a risk neutral world 
         u: how much the price move up.      e.g. u=1.2 means the price will be 1.2 * spot   
         d: how much the price move down.    e.g. d=0.8 means the price will be 0.8 * spot
@@ -17,42 +19,425 @@ Calculate option price using Binomial trees:
         
 if for step N the value of option is x(up) and y(down), 
 then for previous step N - 1 the value of option is:
-    (x * p + y * (1 - p)) / a
+    (x * p + y * (1 - p)) * exp(-rate * delta_t)
+
+American options can be exercised at any node, so the value of a node is
+    max((x * p + y * (1 - p)) * exp(-rate * delta_t), intrinsic value at the node)
+    where
+        intrinsic value = max(spot - strike, 0) for call, max(strike - spot, 0) for put
+
+The early exercise boundary at a step is the highest spot price at which an American put is
+exercised, or the lowest one for an American call.
+
+Faster converging alternatives to the Cox-Ross-Rubinstein (CRR) tree above:
+
+    Leisen-Reimer (LR) tree with an odd number of steps n:
+        p = h(d2)
+        u = a * h(d1) / p
+        d = (a - p * u) / (1 - p)
+        where
+            d1, d2: as in the generalized Black-Scholes formula
+            h(z) = 1/2 + sign(z) * 1/2 * sqrt(1 - exp(-(z / (n + 1/3 + 0.1 / (n + 1)))**2 * (n + 1/6)))
+                   (Peizer-Pratt method 2 inversion)
+
+    Black-Scholes smoothed (BBS) tree: a CRR tree whose values at the last but one step are the
+    Black-Scholes prices with delta_t to expiry (the max of those and the intrinsic values for
+    American options) instead of being calculated from the payoffs at the last step.
+
+    Richardson extrapolation of the prices P(n) and P(n/2) from trees of n and n/2 steps:
+        P = 2 * P(n) - P(n/2)               for CRR and BBS trees, whose error is O(1/n)
+        P = (4 * P(n) - P(n/2)) / 3         for LR trees, whose error is O(1/n**2)
+    BBS with Richardson extrapolation is known as BBSR.
+
+Greeks from the same lattice (get_price_and_greeks), with f the value at the root, f_u, f_d the
+values at level 1 and f_uu, f_ud, f_dd the values at level 2:
+
+    delta = (f_u - f_d) / (S * u - S * d)
+    gamma = ((f_uu - f_ud) / (S * u**2 - S * u * d) - (f_ud - f_dd) / (S * u * d - S * d**2))
+            / ((S * u**2 - S * d**2) / 2)
+    theta = (f_ud - f - delta * (S * u * d - S) - gamma / 2 * (S * u * d - S)**2) / (2 * delta_t)
+        the middle node of level 2 has the spot price S * u * d two steps later, S itself for
+        CRR trees, the delta and gamma terms correct for the move of the other trees
+
+    Vega and rho are central differences of prices with the volatility and the risk free rate bumped
+    up and down (the cost of carry moves with the rate unless the product is a futures option, as in
+    black_scholes_greeks.py).
+    The bumped options are added to the book as extra rows, so an option and its four bumps go through
+    one vectorized backward induction. Richardson extrapolation applies to the greeks as to the prices.
+
+Convergence sweep over the number of steps n (sweep_steps):
+
+    The value of a European option on a tree of n steps is the sum over the nodes of the last level
+        exp(-rate * n * delta_t) * sum(C(n, j) * p**(n - j) * (1 - p)**j * payoff(S * u**(n - j) * d**j), j = 0..n)
+    (the Black-Scholes values of the last but one level for BBS trees), so all trees of a range of steps
+    are summed as one trees x nodes array, with the log factorials of C(n, j) computed once, in O(n) per
+    tree instead of the O(n**2) of the backward induction. American options are priced by backward
+    induction, one tree per number of steps.
+
+    The prices of CRR trees oscillate between odd and even numbers of steps. The envelope of the
+    oscillation is the min and max of the prices of two consecutive numbers of steps, and the limit is
+    extrapolated from the middles M of the envelope at the most steps n and at about n / 2 steps m:
+        limit = (n**k * M(n) - m**k * M(m)) / (n**k - m**k)
+        with k = 1 for an error of O(1 / n), k = 2 for LR trees or Richardson extrapolated prices
         
         
 Note:
     As we assume there is no arbitrage oppotunities, option value is the same as option price
 """
 
-from math import sqrt, exp
 
-from options.option import OptionType
+import copy
+
+import numpy as np
+
+from options.option import OptionBook, OptionType, PRODUCT_COC, get_rate_coefficients, resolve_cost_of_carry
+from options.parallel import parallel_map
+from options.pricing.black_scholes import BlackScholesPricer
 
 
 class BinomialTreePricer:
-    def __init__(self, steps=30):
+    METHODS = ('crr', 'lr', 'bbs')
+
+    def __init__(self, steps=30, american=False, exercise_boundary=False, method='crr', richardson=False, debug=False):
+        """american: price American options, otherwise European options
+        exercise_boundary: for American options, keep the early exercise boundary of every step
+                           from 0 to steps - 1 in self.exercise_boundary (nan if not exercised at a step)
+        method: 'crr' Cox-Ross-Rubinstein tree, 'lr' Leisen-Reimer tree or
+                'bbs' Cox-Ross-Rubinstein tree with Black-Scholes values at the last but one step
+        richardson: two-point Richardson extrapolation of the prices with steps and steps // 2
+        debug: build the whole tree of TreeNode objects (self.tree) like the original implementation.
+               It takes O(steps**2) memory and is slow, use it only to inspect the nodes.
+               BBS and Richardson extrapolation are not applied in debug mode.
+        """
         assert type(steps) == int and steps > 0, 'Type and value of steps are {} {}'.format(type(steps), steps)
+        assert method in self.METHODS, 'Unknown method {}, it must be one of {}'.format(method, self.METHODS)
         self.steps = steps
+        self.american = american
+        self.keep_boundary = exercise_boundary
+        self.method = method
+        self.richardson = richardson
+        self.debug = debug
+        self.exercise_boundary = None
 
     def set_steps(self, steps):
         assert type(steps) == int and steps > 0, 'Type and value of steps are {} {}'.format(type(steps), steps)
         self.steps = steps
 
     def price_option(self, option, round_digit=4):
+        """Price an Option, or every option of an OptionBook into an array.
+        All options of a book go through the same vectorized backward induction, an options x nodes
+        array per level, with their own u, d, p, discount factor, payoff type and exercise.
+        For a book, self.exercise_boundary has one row per option.
+        If round_digit is None, prices are not rounded.
+        """
+        book, coc = self._get_book(option)
+        steps = self._get_steps()
+
+        if self.debug and not isinstance(option, OptionBook):
+            self.strike = option.strike
+            u, d = self._set_parameters(option, coc[0], steps)
+            price = self._price_with_tree(option, u, d, steps)
+            return price if round_digit is None else round(price, round_digit)
+
+        prices = self._price_in_chunks(book, coc, steps)
+        if self.richardson:
+            boundary = self.exercise_boundary
+            prices = self._extrapolate(prices, self._price_in_chunks(book, coc, self._get_half_steps(steps)))
+            self.exercise_boundary = boundary
+
+        if isinstance(option, OptionBook):
+            return prices if round_digit is None else np.round(prices, round_digit)
+        if self.exercise_boundary is not None:
+            self.exercise_boundary = self.exercise_boundary[0]
+        return float(prices[0]) if round_digit is None else round(float(prices[0]), round_digit)
+
+    def get_price_and_greeks(self, option, vol_bump=0.01, rate_bump=0.0001):
+        """Return a dict of price, delta, gamma, theta, vega and rho of an Option, or of arrays for an
+        OptionBook, from one backward induction of the options and their bumps, see the module docstring.
+        vol_bump, rate_bump: the bumps of the volatility and the risk free rate for vega and rho
+        """
+        book, coc = self._get_book(option)
+        steps = self._get_steps()
+        assert (steps - 1 if self.method == 'bbs' else steps) >= 2, 'greeks need a lattice of at least 2 levels'
+
+        # rows of the options, then the volatility bumped up and down, then the rate bumped up and down
+        n = len(book)
+        bumped = book[np.tile(np.arange(n), 5)]
+        bumped_coc = np.tile(coc, 5)
+        bumped.vol[n:3 * n] += np.repeat([vol_bump, -vol_bump], n)
+        bumped.rate[3 * n:] += np.repeat([rate_bump, -rate_bump], n)
+        bumped_coc[3 * n:] += np.repeat([rate_bump, -rate_bump], n) * np.tile(get_rate_coefficients(book.product), 2)
+
+        greeks = self._get_greeks(bumped, bumped_coc, steps, n, vol_bump, rate_bump)
+        boundary = self.exercise_boundary
+        if self.richardson:
+            half_greeks = self._get_greeks(bumped, bumped_coc, self._get_half_steps(steps), n, vol_bump, rate_bump)
+            greeks = {name: self._extrapolate(value, half_greeks[name]) for name, value in greeks.items()}
+        if boundary is not None:
+            boundary = boundary[:n] if isinstance(option, OptionBook) else boundary[0]
+        self.exercise_boundary = boundary
 
-        self.strike = option.strike
+        if isinstance(option, OptionBook):
+            return greeks
+        return {name: float(value[0]) for name, value in greeks.items()}
 
-        # Calculate delta_t, u, d, a and p
-        delta_t = option.expiry * 1.0 / self.steps
-        u = exp(option.vol * sqrt(delta_t))
-        d = 1 / u
-        self.a = exp(option.rate * delta_t)
-        self.p = (self.a - d) / (u - d)
+    def sweep_steps(self, option, steps_list, processes=0, chunk_size=None):
+        """Price an Option on trees of every number of steps in steps_list and return a dict of
+            steps: the array of steps_list
+            price: the unrounded prices
+            lower, upper: the envelope of the odd/even oscillation of the prices, see the module docstring
+            limit: the limit of the prices extrapolated from the middle of the envelope
+        processes, chunk_size: price the chunks of steps_list in the pool of options/parallel.py,
+                               0 processes to run in the calling process
+
+        Only European trees share work across the numbers of steps: they are summed together in O(n) per
+        tree, and a sweep of 6..2000 steps takes well under a second. American trees share nothing, every
+        number of steps is a full O(n**2) backward induction, and the same sweep takes about 30 seconds
+        even with 4 processes.
+        """
+        steps = np.asarray(steps_list, dtype=int)
+        assert len(steps) > 1 and (np.diff(steps) > 0).all(), 'steps_list must be increasing'
+        prices = parallel_map(_StepsPricer(self, option), [steps], processes=processes, chunk_size=chunk_size)
+
+        pairs = np.stack((prices[:-1], prices[1:]))
+        lower = np.append(pairs.min(axis=0), pairs[:, -1].min())
+        upper = np.append(pairs.max(axis=0), pairs[:, -1].max())
+        middle = (lower + upper) / 2
+        # Richardson extrapolation of the middles at the most steps n and the steps closest to n / 2
+        order = 2 if self.method == 'lr' or self.richardson else 1
+        half = np.argmin(np.abs(steps - steps[-1] / 2.0))
+        n, m = float(steps[-1]) ** order, float(steps[half]) ** order
+        limit = (n * middle[-1] - m * middle[half]) / (n - m) if half != len(steps) - 1 else middle[-1]
+        return {'steps': steps, 'price': prices, 'lower': lower, 'upper': upper, 'limit': float(limit)}
+
+    def _price_steps(self, option, steps):
+        """Return the unrounded prices of an Option on trees of every number of steps of an array"""
+        if self.american or self.debug:
+            pricer = copy.copy(self)
+            prices = []
+            for n in steps:
+                pricer.set_steps(int(n))
+                prices.append(pricer.price_option(option, None))
+            return np.array(prices)
+
+        book, coc = self._get_book(option)
+        prices = self._sum_last_level(book, coc, steps)
+        if self.richardson:
+            prices = self._extrapolate(prices, self._sum_last_level(book, coc, self._get_half_steps(
+                np.where(steps % 2 == 0, steps + 1, steps) if self.method == 'lr' else steps)))
+        return prices
+
+    def _sum_last_level(self, book, coc, steps, max_nodes=2 ** 17):
+        """Return the European prices of the option of a book of one option on trees of every number of steps
+        of an array, from the binomial sums over the nodes of the last level, see the module docstring
+        """
+        if self.method == 'lr':
+            steps = np.where(steps % 2 == 0, steps + 1, steps)  # Leisen-Reimer trees have an odd number of steps
+        spot, strike, rate, expiry, vol, coc = (float(col[0]) for col in (book.spot, book.strike, book.rate, book.expiry,
+                                                                          book.vol, coc))
+        z = 1 if book.type[0] == OptionType.CALL.value else -1
+        last = steps - 1 if self.method == 'bbs' else steps
+        log_factorials = np.concatenate(([0.], np.cumsum(np.log(np.arange(1, last.max() + 1)))))
+
+        # Trees of the most steps first, in chunks of trees with at most max_nodes nodes at the last level
+        prices = np.empty(len(steps))
+        order = np.argsort(- last, kind='stable')
+        start = 0
+        while start < len(order):
+            width = last[order[start]] + 1
+            rows = order[start:start + max(1, max_nodes // width)]
+            start += len(rows)
+
+            n = last[rows][:, None]
+            j = np.arange(width)
+            valid = j <= n
+            down = np.where(valid, j, 0)
+            up = np.where(valid, n - j, 0)
+            u, d, p, a, df = self._get_parameters(spot, strike, rate, expiry, vol, coc, steps[rows][:, None])
+            log_weights = np.where(valid, log_factorials[n] - log_factorials[up] - log_factorials[down] +
+                                   up * np.log(p) + down * np.log1p(- p) + n * np.log(df), - np.inf)
+            spots = spot * np.exp(up * np.log(u) + down * np.log(d))
+            if self.method == 'bbs':
+                values = BlackScholesPricer().price_options(np.broadcast_to(book.type[0], spots.shape), spots, strike, rate,
+                                                            np.broadcast_to(expiry / steps[rows][:, None], spots.shape), vol, coc)
+            else:
+                values = np.maximum(z * (spots - strike), 0)
+            prices[rows] = (np.exp(log_weights) * values).sum(axis=1)
+        return prices
+
+    def _get_book(self, option):
+        """Return an OptionBook of the option (the book itself for an OptionBook) and the cost of carry of its rows"""
+        if isinstance(option, OptionBook):
+            book = option
+        else:
+            book = OptionBook(option.type.value, option.spot, option.strike, option.rate, option.expiry, option.vol,
+                              cost_of_carry=option.cost_of_carry,
+                              product=option.product if option.product in PRODUCT_COC else '')
+        return book, resolve_cost_of_carry(book.cost_of_carry, book.rate)
+
+    def _get_steps(self):
+        if self.method == 'lr' and self.steps % 2 == 0:
+            return self.steps + 1  # Leisen-Reimer trees have an odd number of steps
+        return self.steps
+
+    def _get_half_steps(self, steps):
+        """Return the steps of the coarser tree of Richardson extrapolation, element-wise over an array of steps"""
+        return np.maximum(steps // 2 if self.method != 'lr' else (steps // 2) | 1, 1)
+
+    def _extrapolate(self, values, half_values):
+        """Richardson extrapolation of values of the trees of steps and half steps.
+        The error of the CRR and BBS trees is O(1 / steps), the error of the LR tree is O(1 / steps**2)
+        """
+        order = 2 if self.method == 'lr' else 1
+        return (2 ** order * values - half_values) / (2 ** order - 1)
+
+    def _get_greeks(self, bumped, coc, steps, n, vol_bump, rate_bump):
+        """Return the dict of greeks of the first n rows of a book of options and their bumps"""
+        prices, level1, level2 = self._price_in_chunks(bumped, coc, steps, levels=True)
+        spot, strike, rate, expiry, vol, coc = (col[:n] for col in (bumped.spot, bumped.strike, bumped.rate,
+                                                                  bumped.expiry, bumped.vol, coc))
+        u, d = self._get_parameters(spot, strike, rate, expiry, vol, coc, steps)[:2]
+        price = prices[:n]
+        f_u, f_d = level1[:n].T
+        f_uu, f_ud, f_dd = level2[:n].T
+
+        delta = (f_u - f_d) / (spot * (u - d))
+        gamma = ((f_uu - f_ud) / (spot * u * (u - d)) - (f_ud - f_dd) / (spot * d * (u - d))) / (spot * (u * u - d * d) / 2)
+        move = spot * (u * d - 1)
+        theta = (f_ud - price - delta * move - gamma / 2 * move * move) / (2 * expiry / steps)
+        return {'price': price, 'delta': delta, 'gamma': gamma, 'theta': theta,
+                'vega': (prices[n:2 * n] - prices[2 * n:3 * n]) / (2 * vol_bump),
+                'rho': (prices[3 * n:4 * n] - prices[4 * n:]) / (2 * rate_bump)}
+
+    def _get_parameters(self, spot, strike, rate, expiry, vol, coc, steps):
+        """Return u, d, p, a and the discount factor of one step, element-wise over arrays of options"""
+        delta_t = expiry * 1.0 / steps
+        a = np.exp(coc * delta_t)
+        df = np.exp(- rate * delta_t)
+
+        if self.method == 'lr':
+            d1, d2 = BlackScholesPricer().get_d1_d2_array(spot, strike, expiry, vol, coc)
+            p = peizer_pratt_inversion(d2, steps)
+            u = a * peizer_pratt_inversion(d1, steps) / p
+            d = (a - p * u) / (1 - p)
+        else:
+            u = np.exp(vol * np.sqrt(delta_t))
+            d = 1 / u
+            p = (a - d) / (u - d)
+        return u, d, p, a, df
+
+    def _set_parameters(self, option, coc, steps):
+        """Set self.a, self.df and self.p of the tree of one option and return u and d"""
+        u, d, p, a, df = self._get_parameters(option.spot, option.strike, option.rate, option.expiry, option.vol, coc, steps)
+        self.a, self.df, self.p = float(a), float(df), float(p)
         # print 'u is {}, d is {}, a is {}, p is {}'.format(u, d, self.a, self.p)
+        return float(u), float(d)
+
+    def _price_in_chunks(self, book, coc, steps, max_nodes=2 ** 21, levels=False):
+        """Price a book in chunks of options so that an options x nodes array has at most max_nodes nodes.
+        levels: also return the values of the nodes of levels 1 and 2, one row per option
+        """
+        chunk = max(1, max_nodes // (steps + 1))
+        prices = np.empty(len(book))
+        boundaries = np.full((len(book), steps), np.nan) if self.american and self.keep_boundary else None
+        level1, level2 = np.empty((len(book), 2)), np.empty((len(book), 3))
+        for start in range(0, len(book), chunk):
+            rows = slice(start, start + chunk)
+            prices[rows] = self._price(book[rows], coc[rows], steps)
+            if boundaries is not None:
+                boundaries[rows] = self.exercise_boundary
+            if levels:
+                level1[rows], level2[rows] = self._levels
+        self.exercise_boundary = boundaries
+        return (prices, level1, level2) if levels else prices
+
+    def _price(self, book, coc, steps):
+        """Price the options of a book with an options x nodes array lattice of the given steps"""
+        # Parameters of each option as columns
+        spot, strike, rate, expiry, vol, coc = (col[:, None] for col in (book.spot, book.strike, book.rate, book.expiry, book.vol, coc))
+        z = np.where(book.type == OptionType.CALL.value, 1, -1)[:, None]
+        u, d, p, a, df = self._get_parameters(spot, strike, rate, expiry, vol, coc, steps)
+
+        # Node j at the level lv is reached by j down moves, its spot price is spot * u**(lv - j) * d**j
+        last_lv = steps - 1 if self.method == 'bbs' else steps
+        spots = spot * np.exp(np.arange(last_lv, -1, -1) * np.log(u) + np.arange(last_lv + 1) * np.log(d))
+        if self.method == 'bbs':
+            # Black-Scholes values of the last step replace the payoffs
+            shape = spots.shape
+            values = BlackScholesPricer().price_options(np.broadcast_to(book.type[:, None], shape), spots,
+                                                        *np.broadcast_arrays(strike, rate, expiry / steps, vol, coc, spots)[:-1])
+        else:
+            values = np.maximum(z * (spots - strike), 0)
+
+        # Backward induction in place: level lv only uses the first lv + 1 columns of values
+        up_df = p * df
+        down_df = (1 - p) * df
+        inverse_u = 1 / u
+        z_strike = z * strike  # intrinsic value = z * spot - z * strike
+        if len(book) == 1:
+            # numpy is faster with 1-d arrays and scalars than with one row and columns of one row
+            values, spots = values[0], spots[0]
+            up_df, down_df, inverse_u, z_strike = up_df.item(), down_df.item(), inverse_u.item(), z_strike.item()
+        down_values = np.empty_like(values)
+        self._levels = [None, None]
+        if not self.american:
+            self._keep_level(values, last_lv)
+            for lv in range(last_lv, 0, -1):
+                np.multiply(values[..., 1:lv + 1], down_df, out=down_values[..., :lv])
+                np.multiply(values[..., :lv], up_df, out=values[..., :lv])
+                np.add(values[..., :lv], down_values[..., :lv], out=values[..., :lv])
+                self._keep_level(values, lv - 1)
+            return np.array(values[..., 0], ndmin=1)
+
+        intrinsic = down_values
+        boundary = np.full((len(book), steps), np.nan) if self.keep_boundary else None
+        z_spots = z.reshape(np.shape(z)[:spots.ndim - 1] + (1,)) * spots
+        if self.method == 'bbs':
+            # Early exercise at the last but one step
+            last_intrinsic = z_spots - z_strike
+            if boundary is not None:
+                boundary[:, last_lv] = self._get_boundary(spots, (last_intrinsic > values) & (last_intrinsic > 0), z)
+            np.maximum(values, last_intrinsic, out=values)
+
+        self._keep_level(values, last_lv)
+        for lv in range(last_lv, 0, -1):
+            np.multiply(values[..., 1:lv + 1], down_df, out=intrinsic[..., :lv])
+            np.multiply(values[..., :lv], up_df, out=values[..., :lv])
+            np.add(values[..., :lv], intrinsic[..., :lv], out=values[..., :lv])
+
+            # Spot prices and intrinsic values of level lv - 1
+            np.multiply(z_spots[..., :lv], inverse_u, out=z_spots[..., :lv])
+            np.subtract(z_spots[..., :lv], z_strike, out=intrinsic[..., :lv])
+            if boundary is not None:
+                exercised = (intrinsic[..., :lv] > values[..., :lv]) & (intrinsic[..., :lv] > 0)
+                boundary[:, lv - 1] = self._get_boundary(z_spots[..., :lv] * z.reshape(-1, 1)[0 if len(book) == 1 else slice(None)],
+                                                         exercised, z)
+            np.maximum(values[..., :lv], intrinsic[..., :lv], out=values[..., :lv])
+            self._keep_level(values, lv - 1)
+
+        self.exercise_boundary = boundary
+        return np.array(values[..., 0], ndmin=1)
+
+    def _keep_level(self, values, lv):
+        """Keep the values of the nodes of level 1 or 2 in self._levels, one row per option"""
+        if lv in (1, 2):
+            self._levels[lv - 1] = np.array(values[..., :lv + 1], ndmin=2)
+
+    @staticmethod
+    def _get_boundary(spots, exercised, z):
+        """Return the highest exercised spot of each put or the lowest one of each call, nan if none is exercised"""
+        spots, exercised = np.atleast_2d(spots), np.atleast_2d(exercised)
+        # spots decrease with the node index
+        size = exercised.shape[1]
+        idx = np.where(z[:, 0] == -1, np.argmax(exercised, axis=1), size - 1 - np.argmax(exercised[:, ::-1], axis=1))
+        return np.where(exercised.any(axis=1), spots[np.arange(len(spots)), idx], np.nan)
+
+    def _price_with_tree(self, option, u, d, steps):
+        """Price the option with a full tree of TreeNode objects in self.tree"""
 
         # Construct a tree
         self.tree = []  # TODO: replace list with custom tree container which can print it's content
-        for lv in range(self.steps + 1):
+        for lv in range(steps + 1):
             # The root is level 0; at level i there are i + 1 nodes
             # Calculate spot price for nodes from root to bottom
             if lv == 0:
@@ -75,10 +460,12 @@ class BinomialTreePricer:
                     node.opt = self.get_opt_4_last_step(node.spot, option.type)
                 else:  # not bottom level, calculate option price from next level
                     node.opt = self.get_opt_4_prev_step(self.tree[i - 1][j].opt, self.tree[i - 1][j + 1].opt)
+                    if self.american:
+                        node.opt = max(node.opt, self.get_opt_4_last_step(node.spot, option.type))
 
                     # print 'spot price =', node.spot, 'option price =', node.opt
 
-        return round(self.tree[i][j].opt, round_digit)
+        return self.tree[i][j].opt
 
     def get_opt_4_last_step(self, spot, otype):
         """Get option price for the last step:
@@ -99,7 +486,25 @@ class BinomialTreePricer:
         """Get option price for the previous step:
         Input 2 option prices at step N and return the option price at step N - 1
         """
-        return (self.p * up_opt + (1 - self.p) * down_opt) / self.a
+        return (self.p * up_opt + (1 - self.p) * down_opt) * self.df
+
+
+class _StepsPricer:
+    """Price an Option on trees of every number of steps of a slice of steps_list, a picklable func of parallel_map"""
+    def __init__(self, pricer, option):
+        self.pricer = pricer
+        self.option = option
+
+    def __call__(self, steps):
+        return self.pricer._price_steps(self.option, steps)
+
+
+def peizer_pratt_inversion(z, steps):
+    """Peizer-Pratt method 2 inversion used by Leisen-Reimer trees, approximating the
+    binomial probability which matches N(z) on a tree of odd steps, element-wise over an array
+    """
+    x = z / (steps + 1.0 / 3 + 0.1 / (steps + 1))
+    return 0.5 + np.where(z >= 0, 1, -1) * 0.5 * np.sqrt(1 - np.exp(- x * x * (steps + 1.0 / 6)))
 
 
 class TreeNode(object):
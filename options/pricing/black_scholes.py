@@ -93,9 +93,12 @@
 
 from math import exp, log, sqrt
 
-from options.functions import cdf
+import numpy as np
+
+from options.functions import cdf, cdf_array
 # from scipy.stats import norm  # much slower than cdf
-from options.option import OptionType, OptionTypeError
+from options.option import OptionBook, OptionType, OptionTypeError, PRODUCT_COC, get_cost_of_carry, get_type_signs, \
+    resolve_cost_of_carry
 
 
 class BlackScholesPricer:
@@ -104,31 +107,71 @@ class BlackScholesPricer:
         d2 = d1 - vol * sqrt(expiry)
         return d1, d2
 
+    def get_d1_d2_array(self, spot, strike, expiry, vol, cost_of_carry):
+        """Array version of get_d1_d2 for columns of options"""
+        vol_sqrt_t = vol * np.sqrt(expiry)
+        d1 = (np.log(spot / strike) + (cost_of_carry + vol ** 2 / 2) * expiry) / vol_sqrt_t
+        d2 = d1 - vol_sqrt_t
+        return d1, d2
+
     def price_option(self, option, round_digit=4):
-        self.product_coc_map = {'stock_option': option.rate,
-                                'stock_option_with_dividend': option.rate - option.dividend,
-                                'futures_option': 0,
-                                'margined_futures_option': 0,
-                                'currency_option': option.rate - option.dividend,
-                                }
-        if option.cost_of_carry is None:
+        """Price an Option, or every option of an OptionBook into an array.
+        If round_digit is None, the price is not rounded.
+        """
+        if isinstance(option, OptionBook):
+            prices = self.price_options(option.type, option.spot, option.strike, option.rate, option.expiry, option.vol,
+                                        cost_of_carry=resolve_cost_of_carry(option.cost_of_carry, option.rate))
+            return prices if round_digit is None else np.round(prices, round_digit)
+
+        coc = option.cost_of_carry
+        if coc is None:
             if option.product is None:
                 raise Exception('Both "product" and "cost_of_carry" are None. Cannot decide "cost of carry" rate')
-            elif option.product in self.product_coc_map:
-                option.cost_of_carry = self.product_coc_map[option.product]
+            elif not option.product:
+                coc = resolve_cost_of_carry(coc, option.rate)
+            elif option.product in PRODUCT_COC:
+                coc = get_cost_of_carry(option.product, option.rate, option.dividend)
             else:
                 raise Exception('Unknow product type: "{}". Cannot decide "cost of carry" rate.'.format(option.product))
 
         # This is the generalized Black_Scholes formula
-        d1, d2 = self.get_d1_d2(option.spot, option.strike, option.expiry, option.vol, option.cost_of_carry)
+        d1, d2 = self.get_d1_d2(option.spot, option.strike, option.expiry, option.vol, coc)
 
         if option.type == OptionType.CALL:
-            price = option.spot * exp((option.cost_of_carry - option.rate) * option.expiry) * cdf(d1) - option.strike * exp(- option.rate * option.expiry) * cdf(d2)
+            price = option.spot * exp((coc - option.rate) * option.expiry) * cdf(d1) - option.strike * exp(- option.rate * option.expiry) * cdf(d2)
             # price = self.spot * exp((self.cost_of_carry - self.rate) * self.expiry) * norm.cdf(d1) - self.strike * exp(- self.rate * self.expiry) * norm.cdf(d2)
         elif option.type == OptionType.PUT:
-            price = option.strike * exp(- option.rate * option.expiry) * cdf(-d2) - option.spot * exp((option.cost_of_carry - option.rate) * option.expiry) * cdf(-d1)
+            price = option.strike * exp(- option.rate * option.expiry) * cdf(-d2) - option.spot * exp((coc - option.rate) * option.expiry) * cdf(-d1)
             # price = self.strike * exp(- self.rate * self.expiry) * norm.cdf(-d2) - self.spot * exp((self.cost_of_carry - self.rate) * self.expiry) * norm.cdf(-d1)
         else:
             raise OptionTypeError
 
-        return round(price, round_digit)
+        return price if round_digit is None else round(price, round_digit)
+
+    def price_options(self, types, spots, strikes, rates, expiries, vols, cost_of_carry=None, products=None, dividends=0):
+        """Price a book of options given as columns and return an array of unrounded prices.
+
+        types: OptionType members or their values
+        cost_of_carry: rate b of each row; rows that are nan (or all rows if None) are
+                       decided by "products" and "dividends" as in price_option
+        """
+        z = get_type_signs(types)
+        spots, strikes, rates, expiries, vols = (np.asarray(col, dtype=float) for col in (spots, strikes, rates, expiries, vols))
+        coc = np.full(np.shape(z), np.nan) if cost_of_carry is None else np.array(cost_of_carry, dtype=float)
+        coc = np.broadcast_to(coc, np.broadcast(z, spots, coc).shape).copy()
+
+        missing = np.isnan(coc)
+        if missing.any():
+            if products is None:
+                raise Exception('Both "products" and "cost_of_carry" are None. Cannot decide "cost of carry" rate')
+            products = np.broadcast_to(np.asarray(products), coc.shape)
+            try:
+                coc[missing] = get_cost_of_carry(products[missing], np.broadcast_to(rates, coc.shape)[missing],
+                                                 np.broadcast_to(dividends, coc.shape)[missing])
+            except KeyError as e:
+                raise Exception('Unknow product type: "{}". Cannot decide "cost of carry" rate.'.format(e.args[0]))
+
+        # This is the generalized Black_Scholes formula with put-call supersymmetry
+        d1, d2 = self.get_d1_d2_array(spots, strikes, expiries, vols, coc)
+        return z * (spots * np.exp((coc - rates) * expiries) * cdf_array(z * d1) -
+                    strikes * np.exp(- rates * expiries) * cdf_array(z * d2))
@@ -0,0 +1,236 @@
+"""
+Calculate option price by solving the generalized Black-Scholes PDE with finite differences.
+
+1. PDE in time to expiration tau:
+
+    V_tau = 1/2 * vol**2 * S**2 * V_SS + b * S * V_S - r * V = L V
+
+    where:
+        b: cost of carry rate, see the generalized Black-Scholes formula in black_scholes.py
+        V(S, 0): payoff at expiration, max(S - X, 0) for call, max(X - S, 0) for put
+
+2. Non-uniform spot grid S_0 < S_1 < ... < S_N:
+    Nodes are concentrated near the strike, the barrier and the spot price. The density of
+    nodes is proportional to
+        1 + c * sum(1 / (1 + ((S - P) / w)**2))  for P in (strike, barrier, spot)
+    and the node closest to the spot price is moved onto it.
+    With h- = S_i - S_i-1 and h+ = S_i+1 - S_i:
+        V_S  = (- h+ / (h- * (h- + h+))) * V_i-1 + ((h+ - h-) / (h- * h+)) * V_i + (h- / (h+ * (h- + h+))) * V_i+1
+        V_SS = (2 / (h- * (h- + h+))) * V_i-1 - (2 / (h- * h+)) * V_i + (2 / (h+ * (h- + h+))) * V_i+1
+    so L is a tridiagonal matrix.
+
+3. Crank-Nicolson time stepping with Rannacher start-up:
+    (I - dtau / 2 * L) V(tau + dtau) = (I + dtau / 2 * L) V(tau)
+    The kink of the payoff makes Crank-Nicolson oscillate, so the first step is replaced by
+    implicit Euler half steps (I - dtau / 2 * L) V(tau + dtau / 2) = V(tau).
+    Each step solves a tridiagonal system with the Thomas algorithm.
+
+4. Boundaries:
+    S_0 = 0 (or the barrier of down barrier options), V = 0 for call, X * exp(-r * tau) for put
+    S_N = max(S, X) * exp(std_devs * vol * sqrt(T)) (or the barrier of up barrier options),
+          V = S * exp((b - r) * tau) - X * exp(-r * tau) for call, 0 for put
+    For knock-out options the barrier is an absorbing boundary where the rebate is paid at hit.
+
+    Knock-in options use in-out parity: paying the rebate at expiration if the barrier is never
+    hit, their value is the vanilla value minus the solution on the knock-out domain with
+    payoff (vanilla payoff - rebate) and 0 at the barrier.
+
+5. American exercise:
+    Every time step is a linear complementarity problem A V >= rhs, V >= payoff, one of them
+    being an equality at every node. It is solved by policy iteration: nodes where V < payoff
+    are set to the payoff, nodes where holding is worth more are released, until the set of
+    exercised nodes does not change.
+
+6. Greeks come from the same solution:
+    delta, gamma: the V_S and V_SS formulas above at the spot node
+    theta: (V(S, T - dtau) - V(S, T)) / dtau, the time decay as in black_scholes_greeks.py
+"""
+
+from math import exp, sqrt
+
+import numpy as np
+
+from options.option import OptionBook, OptionType, resolve_cost_of_carry
+from options.pricing.barrier_options import BarrierType, BarrierTypeError
+
+
+class FiniteDifferencePricer:
+    def __init__(self, space_steps=200, time_steps=200, rannacher_steps=2, american=False,
+                 std_devs=5, concentration=10.0):
+        """space_steps: the number of intervals of the spot grid
+        time_steps: the number of time steps
+        rannacher_steps: the number of implicit Euler half steps replacing the first Crank-Nicolson steps, must be even
+        american: price American options, otherwise European options
+        std_devs: the spot grid ends std_devs standard deviations above the larger of spot and strike
+        concentration: how much denser the grid is near the strike, the barrier and the spot price
+        """
+        assert rannacher_steps % 2 == 0, 'rannacher_steps must be even, received {}'.format(rannacher_steps)
+        assert rannacher_steps // 2 < time_steps, 'rannacher_steps must be less than 2 * time_steps'
+        self.space_steps = space_steps
+        self.time_steps = time_steps
+        self.rannacher_steps = rannacher_steps
+        self.american = american
+        self.std_devs = std_devs
+        self.concentration = concentration
+
+    def price_option(self, option, round_digit=4):
+        """Price an Option, or every option of an OptionBook into an array"""
+        if isinstance(option, OptionBook):
+            return np.array([self.price_option(opt, round_digit) for opt in option.to_options()])
+        return round(self.get_price_and_greeks(option)['price'], round_digit)
+
+    def get_price_and_greeks(self, option):
+        """Return a dict of price, delta, gamma and theta of an Option from a single solve"""
+        coc = resolve_cost_of_carry(option.cost_of_carry, option.rate)
+        z = 1 if option.type == OptionType.CALL else -1
+        return self._solve(option.spot, option.strike, option.rate, option.expiry, option.vol, coc, z)
+
+    def price_barrier(self, barrier_option, opt_type, bar_type, round_digit=4):
+        """Price a BarrierOption with the same arguments as BarrierOption.get_payoff"""
+        return round(self.get_barrier_price_and_greeks(barrier_option, opt_type, bar_type)['price'], round_digit)
+
+    def get_barrier_price_and_greeks(self, barrier_option, opt_type, bar_type):
+        """Return a dict of price, delta, gamma and theta of a BarrierOption.
+        Knock-out options take a single solve, knock-in options take two (the vanilla option and the parity term).
+        """
+        bo = barrier_option
+        z = 1 if opt_type == OptionType.CALL else -1
+        down = bo.spot > bo.bar
+        if bar_type == BarrierType.OUT:
+            if bo.spot == bo.bar:
+                return {'price': bo.rebate, 'delta': 0.0, 'gamma': 0.0, 'theta': 0.0}
+            return self._solve(bo.spot, bo.strike, bo.rate, bo.expiry, bo.vol, bo.coc, z, bo.bar, down, bo.rebate)
+        elif bar_type == BarrierType.IN:
+            assert not self.american, 'American knock-in options are not supported'
+            vanilla = self._solve(bo.spot, bo.strike, bo.rate, bo.expiry, bo.vol, bo.coc, z)
+            if bo.spot == bo.bar:
+                return vanilla
+            parity = self._solve(bo.spot, bo.strike, bo.rate, bo.expiry, bo.vol, bo.coc, z, bo.bar, down, 0,
+                                 payoff_shift=bo.rebate)
+            return {name: vanilla[name] - parity[name] for name in vanilla}
+        else:
+            raise BarrierTypeError
+
+    def get_grid(self, spot, strike, expiry, vol, bar=None, down=True):
+        """Return the non-uniform spot grid, concentrated near the strike, the barrier and the spot"""
+        lower = bar if bar is not None and down else 0.0
+        upper = bar if bar is not None and not down else max(spot, strike) * exp(self.std_devs * vol * sqrt(expiry))
+
+        width = 0.1 * (upper - lower)
+        centers = [p for p in (strike, bar, spot) if p is not None and lower <= p <= upper]
+        fine = np.linspace(lower, upper, 20 * self.space_steps + 1)
+        density = 1 + self.concentration * sum(1 / (1 + ((fine - p) / width) ** 2) for p in centers)
+        cumulative = np.concatenate([[0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(fine))])
+        grid = np.interp(np.linspace(0, cumulative[-1], self.space_steps + 1), cumulative, fine)
+        grid[0], grid[-1] = lower, upper
+
+        # Put the spot price on the grid
+        idx = np.clip(np.argmin(np.abs(grid - spot)), 1, self.space_steps - 1)
+        grid[idx] = spot
+        return grid
+
+    def _solve(self, spot, strike, rate, expiry, vol, coc, z, bar=None, down=True, rebate=0, payoff_shift=0):
+        """Solve the PDE and return a dict of price, delta, gamma and theta at the spot price.
+        With a barrier, the grid ends at the barrier where the value is the rebate.
+        payoff_shift is subtracted from the payoff (used by knock-in options).
+        """
+        grid = self.get_grid(spot, strike, expiry, vol, bar, down)
+        k = int(np.argmin(np.abs(grid - spot)))
+        h = np.diff(grid)
+        h_minus, h_plus = h[:-1], h[1:]
+        s = grid[1:-1]
+
+        # Tridiagonal L on interior nodes
+        first = (- h_plus / (h_minus * (h_minus + h_plus)), (h_plus - h_minus) / (h_minus * h_plus), h_minus / (h_plus * (h_minus + h_plus)))
+        second = (2 / (h_minus * (h_minus + h_plus)), - 2 / (h_minus * h_plus), 2 / (h_plus * (h_minus + h_plus)))
+        diffusion = vol ** 2 * s ** 2 / 2
+        lower = diffusion * second[0] + coc * s * first[0]
+        diag = diffusion * second[1] + coc * s * first[1] - rate
+        upper = diffusion * second[2] + coc * s * first[2]
+
+        payoff = np.maximum(z * (grid - strike), 0)
+        values = payoff - payoff_shift
+        exercise = payoff[1:-1] if self.american else None
+
+        def boundary_values(tau):
+            if bar is not None:
+                far = grid[-1] if down else grid[0]
+                vanilla = max(z * (far * exp((coc - rate) * tau) - strike * exp(- rate * tau)), 0)
+                if self.american:
+                    vanilla = max(vanilla, z * (far - strike))
+                vanilla -= payoff_shift * exp(- rate * tau)
+                return (rebate, vanilla) if down else (vanilla, rebate)
+            values_at = [max(z * (x * exp((coc - rate) * tau) - strike * exp(- rate * tau)), 0) for x in (grid[0], grid[-1])]
+            if self.american:
+                values_at = [max(v, z * (x - strike)) for v, x in zip(values_at, (grid[0], grid[-1]))]
+            return values_at
+
+        dtau = expiry / self.time_steps
+        steps = [(dtau / 2, 1.0)] * self.rannacher_steps + [(dtau, 0.5)] * (self.time_steps - self.rannacher_steps // 2)
+        tau = 0.0
+        previous = values
+        for step, theta in steps:
+            tau_next = tau + step
+            v0, vn = boundary_values(tau)
+            w0, wn = boundary_values(tau_next)
+            explicit = (1 - theta) * step
+            rhs = values[1:-1] + explicit * (lower * values[:-2] + diag * values[1:-1] + upper * values[2:])
+            implicit = theta * step
+            rhs[0] += implicit * lower[0] * w0
+            rhs[-1] += implicit * upper[-1] * wn
+
+            a = - implicit * lower
+            b = 1 - implicit * diag
+            c = - implicit * upper
+            if exercise is None:
+                interior = solve_tridiagonal(a, b, c, rhs)
+            else:
+                interior = self._solve_exercise(a, b, c, rhs, exercise)
+
+            previous = values
+            values = np.concatenate([[w0], interior, [wn]])
+            tau = tau_next
+
+        price = values[k]
+        delta = first[0][k - 1] * values[k - 1] + first[1][k - 1] * values[k] + first[2][k - 1] * values[k + 1]
+        gamma = second[0][k - 1] * values[k - 1] + second[1][k - 1] * values[k] + second[2][k - 1] * values[k + 1]
+        theta = (previous[k] - values[k]) / steps[-1][0]
+        return {'price': float(price), 'delta': float(delta), 'gamma': float(gamma), 'theta': float(theta)}
+
+    @staticmethod
+    def _solve_exercise(a, b, c, rhs, exercise, max_iter=50):
+        """Solve the linear complementarity problem of one time step by policy iteration"""
+        exercised = np.zeros(len(rhs), dtype=bool)
+        for i in range(max_iter):
+            values = solve_tridiagonal(np.where(exercised, 0, a), np.where(exercised, 1, b),
+                                       np.where(exercised, 0, c), np.where(exercised, exercise, rhs))
+            # Residual of the PDE row at exercised nodes: negative means holding is worth more
+            residual = b * values - rhs
+            residual[1:] += a[1:] * values[:-1]
+            residual[:-1] += c[:-1] * values[1:]
+            new_exercised = np.where(exercised, residual >= 0, values < exercise)
+            if np.array_equal(new_exercised, exercised):
+                break
+            exercised = new_exercised
+        return np.maximum(values, exercise)
+
+
+def solve_tridiagonal(a, b, c, d):
+    """Solve a tridiagonal system with the Thomas algorithm.
+    a: sub-diagonal (a[0] unused), b: diagonal, c: super-diagonal (c[-1] unused), d: right hand side
+    """
+    n = len(d)
+    a, b, c, d = a.tolist(), b.tolist(), c.tolist(), d.tolist()
+    cp = [0.0] * n
+    dp = [0.0] * n
+    cp[0] = c[0] / b[0]
+    dp[0] = d[0] / b[0]
+    for i in range(1, n):
+        m = b[i] - a[i] * cp[i - 1]
+        cp[i] = c[i] / m
+        dp[i] = (d[i] - a[i] * dp[i - 1]) / m
+    x = [0.0] * n
+    x[-1] = dp[-1]
+    for i in range(n - 2, -1, -1):
+        x[i] = dp[i] - cp[i] * x[i + 1]
+    return np.array(x)
@@ -0,0 +1,203 @@
+"""
+American and Bermudan options by Least-Squares Monte Carlo (Longstaff and Schwartz)
+
+The option can be exercised at the dates t1 < ... < tn = T (n equal steps by default, which approaches
+the American option as n grows).
+
+1. Training pass
+    train_num paths are simulated and stored, one row of spot prices per date. Going backward from T
+    with V = payoff(S(T)), at every date t_i:
+        V = V * exp(-rate * (t_(i+1) - t_i))
+        the continuation value of the in the money paths is estimated by regressing V on basis functions
+        of x = S(t_i) / X:
+            beta_i = argmin sum((V - basis(x) * beta)**2) over the paths with payoff(S(t_i)) > 0
+        and they are exercised if payoff(S(t_i)) >= basis(x) * beta_i, in which case V = payoff(S(t_i))
+    mean(V) * exp(-rate * t1) is the in sample price. Its exercise decisions have seen the paths they
+    are valued on, so it has no valid error estimate.
+
+2. Pricing pass
+    simu_num new independent paths are exercised at the first date where payoff > 0 and
+    payoff >= basis(x) * beta_i. The price of this exercise policy is biased low and its error estimate
+    is the one of MonteCarloPricer. The paths are simulated date by date in chunks, so they aren't stored.
+
+    The option is exercised at once if its intrinsic value is more than the price.
+
+Basis functions:
+    polynomial: 1, x, x**2, ..., x**degree
+    laguerre: 1, exp(-x/2) * L_k(x) for k < degree, with the Laguerre polynomials
+              L_0 = 1, L_1 = 1 - x, L_(k+1) = ((2k + 1 - x) * L_k - k * L_(k-1)) / (k + 1)
+    or a function of an array x returning a (len(x), k) matrix
+
+When the training paths take more than max_memory bytes they are stored in a temporary memory mapped
+file, which is removed after the training pass.
+"""
+
+import tempfile
+from math import exp, log, sqrt
+
+import numpy as np
+
+from options.option import OptionBook, OptionType
+from options.pricing.monte_carlo import MonteCarloPricer, RunningMoments
+
+
+class LongstaffSchwartzPricer(MonteCarloPricer):
+    BASES = ('polynomial', 'laguerre')
+
+    def __init__(self, steps=50, times=None, train_num=100000, basis='polynomial', degree=3,
+                 max_memory=2**28, spill_dir=None, **kwargs):
+        """steps: the number of equally spaced exercise dates
+        times: the exercise dates as times to expiration, the last one is the expiry (steps is ignored)
+        train_num: the number of paths of the training pass
+        basis: 'polynomial', 'laguerre' or a function, see the module docstring
+        degree: the degree of the polynomial or the number of Laguerre polynomials
+        max_memory: the number of bytes of training paths kept in memory
+        spill_dir: the directory of the memory mapped file, None for the default temporary directory
+        kwargs: the arguments of MonteCarloPricer for the pricing pass, except qmc
+        """
+        assert callable(basis) or basis in self.BASES, 'basis must be one of {} or a function; received: {}'.format(self.BASES, basis)
+        MonteCarloPricer.__init__(self, **kwargs)
+        assert not self.qmc, 'American options are not priced with qmc'
+        self.steps = steps
+        self.times = times
+        self.train_num = train_num
+        self.basis = basis
+        self.degree = degree
+        self.max_memory = max_memory
+        self.spill_dir = spill_dir
+        self.coefficients = None
+
+    def get_times(self):
+        """Return the exercise dates of the option"""
+        if self.times is not None:
+            return np.asarray(self.times, dtype=float)
+        return self.expiry * np.arange(1, self.steps + 1) / self.steps
+
+    def get_basis(self, x):
+        """Return the matrix of basis functions of x = S / X, one row per path"""
+        if callable(self.basis):
+            return self.basis(x)
+        if self.basis == 'polynomial':
+            return np.vander(x, self.degree + 1, increasing=True)
+
+        columns = [np.ones_like(x)]
+        weight = np.exp(-x / 2)
+        prev, cur = np.zeros_like(x), np.ones_like(x)
+        for k in range(self.degree):
+            columns.append(weight * cur)
+            prev, cur = cur, ((2 * k + 1 - x) * cur - k * prev) / (k + 1)
+        return np.column_stack(columns)
+
+    def simulate_paths(self, num, rng, out):
+        """Simulate num paths date by date and write the spot prices of date i to out[i]"""
+        x = np.full(num, log(self.spot))
+        t0 = 0.
+        for i, t in enumerate(self.get_times()):
+            dt = t - t0
+            x += (self.cost_of_carry - self.vol**2 / 2) * dt + self.vol * sqrt(dt) * rng.standard_normal(num)
+            out[i] = np.exp(x)
+            t0 = t
+
+    def train(self, z):
+        """Run the training pass: set self.coefficients, the regression coefficients of every exercise date
+        but the last one (None where there are too few paths in the money), and return the in sample price
+        """
+        times = self.get_times()
+        shape = (len(times), self.train_num)
+        spill = np.dtype(float).itemsize * shape[0] * shape[1] > self.max_memory
+        if spill:
+            tmp = tempfile.TemporaryFile(dir=self.spill_dir)
+            paths = np.memmap(tmp, dtype=float, mode='w+', shape=shape)
+        else:
+            paths = np.empty(shape)
+
+        try:
+            # the training paths draw from a stream of their own, independent of the chunks of the pricing pass
+            seed = np.random.SeedSequence(self.seed)
+            rng = np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=(1 << 32,)))
+            for start in range(0, self.train_num, self.chunk_size):
+                stop = min(start + self.chunk_size, self.train_num)
+                self.simulate_paths(stop - start, rng, paths[:, start:stop])
+
+            value = np.maximum(z * (paths[-1] - self.strike), 0)
+            self.coefficients = [None] * (len(times) - 1)
+            for i in range(len(times) - 2, -1, -1):
+                value *= exp(- self.rate * (times[i + 1] - times[i]))
+                spot = np.asarray(paths[i])
+                payoff = np.maximum(z * (spot - self.strike), 0)
+                itm = np.flatnonzero(payoff > 0)
+                basis = self.get_basis(spot[itm] / self.strike)
+                if len(itm) <= basis.shape[1]:
+                    continue
+                beta = np.linalg.lstsq(basis, value[itm], rcond=None)[0]
+                self.coefficients[i] = beta
+                exercise = itm[payoff[itm] >= basis @ beta]
+                value[exercise] = payoff[exercise]
+        finally:
+            if spill:
+                del paths
+                tmp.close()
+
+        return float(value.mean()) * exp(- self.rate * times[0])
+
+    def get_chunk_moments(self, z, num, seed):
+        """Exercise a chunk of num new samples with the trained policy and return their RunningMoments"""
+        rng = np.random.default_rng(seed)
+        n = 2 * num if self.antithetic else num
+        times = self.get_times()
+        x = np.full(n, log(self.spot))
+        value = np.zeros(n)  # exercise values compounded to expiration
+        alive = np.ones(n, dtype=bool)
+
+        t0 = 0.
+        for i, t in enumerate(times):
+            dt = t - t0
+            rand = rng.standard_normal(num)
+            if self.antithetic:
+                rand = np.concatenate((rand, -rand))
+            x += (self.cost_of_carry - self.vol**2 / 2) * dt + self.vol * sqrt(dt) * rand
+            spot = np.exp(x)
+            payoff = np.maximum(z * (spot - self.strike), 0)
+            if i == len(times) - 1:
+                value[alive] = payoff[alive]
+            elif self.coefficients[i] is not None:
+                candidates = np.flatnonzero(alive & (payoff > 0))
+                continuation = self.get_basis(spot[candidates] / self.strike) @ self.coefficients[i]
+                exercise = candidates[payoff[candidates] >= continuation]
+                value[exercise] = payoff[exercise] * exp(self.rate * (self.expiry - t))
+                alive[exercise] = False
+            t0 = t
+
+        control = {'black_scholes': np.maximum(z * (spot - self.strike), 0), 'spot': spot}.get(self.control_variate)
+        if self.antithetic:
+            value = (value[:num] + value[num:]) / 2
+            if control is not None:
+                control = (control[:num] + control[num:]) / 2
+        moments = RunningMoments()
+        moments.add(value, control)
+        return moments
+
+    def get_price_and_error(self, option):
+        """Train the exercise policy and price it on new paths. Return the dict of
+        MonteCarloPricer.get_price_and_error with in_sample_price, the price of the training pass
+        """
+        self._set_option(option)
+        z = 1 if option.type == OptionType.CALL else -1
+        in_sample_price = self.train(z)
+        result = MonteCarloPricer.get_price_and_error(self, option)
+        intrinsic = max(z * (option.spot - option.strike), 0)
+        if intrinsic > result['price']:
+            result.update(price=intrinsic, std_error=0., conf_low=intrinsic, conf_high=intrinsic)
+        result['in_sample_price'] = in_sample_price
+        return result
+
+    def price_option(self, option):
+        """Return the price of the option rounded to 4 digits, an array of prices for an OptionBook"""
+        if isinstance(option, OptionBook):
+            return np.array([self.price_option(opt) for opt in option.to_options()])
+        return round(self.get_price_and_error(option)['price'], 4)
+
+    def get_greeks(self, option, method='pathwise'):
+        """The greeks of MonteCarloPricer are those of the European payoff and don't apply to early exercise"""
+        raise NotImplementedError('greeks of American options are not estimated by simulation; '
+                                  'use BinomialTreePricer.get_price_and_greeks or FiniteDifferencePricer.get_price_and_greeks')
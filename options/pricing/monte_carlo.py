@@ -11,23 +11,172 @@ For each path of simulation, the final price is:
 
 The overall price is:
     sum(each_price) * exp(rate * T) / simu_num
+
+In vectorized mode the random numbers are drawn from numpy's Generator in chunks of chunk_size
+standard normals, and St and each_price of a chunk are evaluated as arrays. Only running moments
+are kept between chunks, so memory is bounded by chunk_size whatever simu_num is.
+
+Error estimate of n samples Y with mean m and sample variance s2:
+    std_error = sqrt(s2 / n)
+    confidence interval = m +- norminv((1 + confidence) / 2) * std_error
+
+Antithetic variates: every normal rand is also used as -rand, and the sample is the average of
+the two payoffs, Y = (each_price(rand) + each_price(-rand)) / 2, i.e. two paths per sample.
+
+Control variate: a quantity X simulated on the same paths whose expectation E[X] is known in closed form
+    Y_cv = Y - beta * (X - E[X])
+    beta = cov(X, Y) / var(X)
+    var(Y_cv) = var(Y) - cov(X, Y)**2 / var(X)
+    spot: X = St, E[X] = spot * exp(b * T)
+    black_scholes: X = the European payoff, E[X] = Black-Scholes price * exp(rate * T). For plain
+        European options X is Y itself, which gives the closed form price with zero error.
+
+Early stopping: with abs_tol, rel_tol or time_budget, the error is checked after every chunk and the
+simulation stops when the half width of the confidence interval is at most abs_tol or rel_tol * price,
+or time_budget seconds have passed, and at the latest after simu_num paths.
+
+Quasi-Monte Carlo: the normals are norminv of scrambled Sobol points (see options/qmc.py) instead of
+pseudo-random numbers, which converges at close to O(1/N) instead of O(1/sqrt(N)) for smooth payoffs.
+The paths are split into replications of 2**k points, each with an independent scrambling, and the
+error is estimated from the spread of the replication prices:
+    price = mean(price_r)
+    std_error = std(price_r) / sqrt(replications)
+With early stopping the error is checked after every replication.
+
+Multiprocess mode: the chunks of paths are simulated by a pool of ps_num worker processes which is
+started on first use and reused by all later calls (see options/parallel.py). Every chunk draws from
+its own stream spawned from seed by numpy's SeedSequence, and the moments of the chunks are merged in
+chunk order, so the result only depends on seed and chunk_size, not on ps_num or on which worker ran
+which chunk.
+
+Greeks are estimated in the same pass as the price from the normals rand of the paths, with
+D = exp(-rate * T), itm = 1 if z * (St - strike) > 0 else 0 and w = rand / (vol * sqrt(T)):
+
+    pathwise (derivatives of each_price along the path, for continuous payoffs):
+        delta = D * z * itm * St / spot
+        vega  = D * z * itm * St * (sqrt(T) * rand - vol * T)
+        gamma = D * z * itm * St / spot**2 * (w - 1)  (likelihood ratio applied to the pathwise delta)
+
+    likelihood_ratio (derivatives of the density of St, for any payoff including discontinuous ones):
+        delta = D * each_price * w / spot
+        vega  = D * each_price * ((rand**2 - 1) / vol - rand * sqrt(T))
+        gamma = D * each_price * (w**2 - w - 1 / (vol**2 * T)) / spot**2
+
+    Every greek is the mean of its samples, with the standard error of its own samples.
 """
 
+import time
+from itertools import islice
 from math import exp, sqrt
-from multiprocessing import Process, Queue
 from random import random
 
-from options.functions import norminv
-from options.option import OptionType
+import numpy as np
+
+from options.functions import norminv, norminv_array
+from options.option import OptionBook, OptionType, resolve_cost_of_carry
+from options.parallel import get_pool
+from options.pricing.black_scholes import BlackScholesPricer
+from options.qmc import SobolSequence
 
 
 # from scipy.stats import norm   # norm.ppf is about 50 times slower than norminv but no obvious accuracy improvement
 
 
+class RunningMoments:
+    """Mean, variance and covariance of samples Y (and control samples X) added chunk by chunk.
+
+    Chunks are merged with the pairwise update of Chan et al. on centered sums, which doesn't lose
+    precision like sum(Y**2) - n * mean**2 does when the variance is small compared to the mean.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean_y = self.mean_x = 0.0
+        self.m2_y = self.m2_x = self.c_xy = 0.0
+
+    def add(self, y, x=None):
+        """Add a chunk of samples y, and the control samples x of the same paths if given"""
+        if not len(y):
+            return
+        chunk = RunningMoments()
+        chunk.n = len(y)
+        chunk.mean_y = float(y.mean())
+        chunk.m2_y = float(np.square(y - chunk.mean_y).sum())
+        if x is not None:
+            chunk.mean_x = float(x.mean())
+            chunk.m2_x = float(np.square(x - chunk.mean_x).sum())
+            chunk.c_xy = float(np.dot(x - chunk.mean_x, y - chunk.mean_y))
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Add the samples of another RunningMoments"""
+        if not other.n:
+            return
+        na, nb = self.n, other.n
+        n = na + nb
+        delta_y = other.mean_y - self.mean_y
+        delta_x = other.mean_x - self.mean_x
+        self.mean_y += delta_y * nb / n
+        self.mean_x += delta_x * nb / n
+        self.m2_y += other.m2_y + delta_y * delta_y * na * nb / n
+        self.m2_x += other.m2_x + delta_x * delta_x * na * nb / n
+        self.c_xy += other.c_xy + delta_x * delta_y * na * nb / n
+        self.n = n
+
+    def estimate(self, control_mean=None):
+        """Return the mean and its standard error, adjusted by the control variate if control_mean is given"""
+        if self.n < 2:
+            return self.mean_y, float('inf')
+        if control_mean is None or self.m2_x <= 0:
+            return self.mean_y, sqrt(self.m2_y / (self.n - 1) / self.n)
+
+        beta = self.c_xy / self.m2_x
+        mean = self.mean_y - beta * (self.mean_x - control_mean)
+        # one more degree of freedom is used by beta
+        var = max(self.m2_y - beta * self.c_xy, 0) / max(self.n - 2, 1)
+        return mean, sqrt(var / self.n)
+
+
 class MonteCarloPricer:
-    def __init__(self, simu_num=1000000, ps_num=10):
+    CONTROL_VARIATES = ('black_scholes', 'spot')
+    GREEK_METHODS = ('pathwise', 'likelihood_ratio')
+    GREEKS = ('price', 'delta', 'gamma', 'vega')
+
+    def __init__(self, simu_num=1000000, ps_num=10, vectorized=False, chunk_size=100000, seed=None,
+                 antithetic=False, control_variate=None, confidence=0.95, abs_tol=None, rel_tol=None, time_budget=None,
+                 qmc=False, replications=16):
+        """ps_num: the number of worker processes, see price_option
+        vectorized: simulate chunk_size paths at a time with numpy arrays in the calling process
+                    (ps_num is ignored), instead of one random() and norminv call per path
+        seed: seed of numpy's SeedSequence in vectorized and multiprocess modes, None for fresh entropy
+        antithetic: use antithetic variates
+        control_variate: None, 'black_scholes' or 'spot', see the module docstring
+        confidence: the level of the confidence interval
+        abs_tol, rel_tol: stop once the half width of the confidence interval is at most abs_tol,
+                    or rel_tol times the price; simu_num is then the maximum number of paths
+        time_budget: stop once the simulation has run for time_budget seconds
+        qmc: use scrambled Sobol points instead of pseudo-random numbers
+        replications: the number of independently scrambled replications in qmc mode, each of the
+                    largest power of 2 paths not above simu_num / replications
+
+        antithetic, control_variate, abs_tol, rel_tol and time_budget imply the numpy chunks of vectorized
+        mode, run by the ps_num worker processes unless vectorized is set or ps_num is zero. qmc always
+        runs in the calling process.
+        """
+        assert control_variate in (None,) + self.CONTROL_VARIATES, \
+            'control_variate must be one of {}; received: {}'.format(self.CONTROL_VARIATES, control_variate)
         self.simu_num = simu_num
         self.ps_num = ps_num
+        self.vectorized = vectorized
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.antithetic = antithetic
+        self.control_variate = control_variate
+        self.confidence = confidence
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+        self.time_budget = time_budget
+        self.qmc = qmc
+        self.replications = replications
 
     def set_ps_num(self, ps_num):
         self.ps_num = ps_num
@@ -38,48 +187,227 @@ class MonteCarloPricer:
         st = self.spot * exp((self.cost_of_carry - self.vol**2 / 2) * self.expiry + self.vol * norminv(random()) * sqrt(self.expiry))
         return max(z * (st - self.strike), 0)
 
-    def _ps_slice(self, z, num, resultq):
-        sum = 0
-        for i in range(int(num)):
-            sum += self.get_price_of_one_run(z)
+    def get_terminal_spots(self, rand):
+        """Turn an array of standard normals into terminal prices St in place and return it"""
+        rand *= self.vol * sqrt(self.expiry)
+        rand += (self.cost_of_carry - self.vol**2 / 2) * self.expiry
+        np.exp(rand, out=rand)
+        rand *= self.spot
+        return rand
+
+    def get_samples(self, z, rand):
+        """Return the payoff samples of a chunk of standard normals, and the control samples of the
+        same paths if a control variate is used. rand is overwritten.
+        """
+        if self.antithetic:
+            anti = self.get_terminal_spots(-rand)
+            st = self.get_terminal_spots(rand)
+            y = (np.maximum(z * (st - self.strike), 0) + np.maximum(z * (anti - self.strike), 0)) / 2
+            if self.control_variate == 'spot':
+                return y, (st + anti) / 2
+        else:
+            st = self.get_terminal_spots(rand)
+            y = np.maximum(z * (st - self.strike), 0)
+            if self.control_variate == 'spot':
+                return y, st
+        return y, (y if self.control_variate == 'black_scholes' else None)
 
-        resultq.put(sum)
-        resultq.close()
+    def get_control_mean(self, option_type):
+        """Return the expectation of the control variate, None without control variate"""
+        if self.control_variate == 'spot':
+            return self.spot * exp(self.cost_of_carry * self.expiry)
+        if self.control_variate == 'black_scholes':
+            price = BlackScholesPricer().price_options(
+                option_type, self.spot, self.strike, self.rate, self.expiry, self.vol, self.cost_of_carry)
+            return float(price) * exp(self.rate * self.expiry)
+        return None
 
-    def price_option(self, option):
+    def get_price_and_error(self, option):
+        """Price the option with numpy chunks of paths and return a dict of
+            price: the estimated price, unrounded
+            std_error: the standard error of the price
+            conf_low, conf_high: the confidence interval of the price at the confidence level
+            paths: the number of simulated paths
         """
-        simu_num: the number of simulation runs, usually > 100000
-        ps_num: If zero, run simulation in single process mode;
-                otherwise run in multiprocess mode with ps_num processes to speed up
+        self._set_option(option)
+        z = 1 if option.type == OptionType.CALL else -1
+        control_mean = self.get_control_mean(option.type)
+        early_stopping = self.abs_tol is not None or self.rel_tol is not None or self.time_budget is not None
+        width = norminv((1 + self.confidence) / 2)
+        df = exp(- self.rate * self.expiry)
+        paths_per_sample = 2 if self.antithetic else 1
+        sample_num = max(self.simu_num // paths_per_sample, 1)
+        if self.qmc:
+            # the control variate is applied within every replication
+            batches, control_mean = self._get_replications(z, sample_num, control_mean), None
+        else:
+            batches = self._get_chunks(z, sample_num)
+
+        t0 = time.perf_counter()
+        moments = RunningMoments()
+        paths = 0
+        for batch, num in batches:
+            moments.merge(batch)
+            paths += num * paths_per_sample
+            if early_stopping:
+                mean, std_error = moments.estimate(control_mean)
+                half_width = width * std_error * df
+                if self.abs_tol is not None and half_width <= self.abs_tol:
+                    break
+                if self.rel_tol is not None and half_width <= self.rel_tol * abs(mean) * df:
+                    break
+                if self.time_budget is not None and time.perf_counter() - t0 >= self.time_budget:
+                    break
+
+        mean, std_error = moments.estimate(control_mean)
+        price, std_error = df * mean, df * std_error
+        return {'price': price, 'std_error': std_error,
+                'conf_low': price - width * std_error, 'conf_high': price + width * std_error,
+                'paths': paths}
+
+    def get_chunk_moments(self, z, num, seed):
+        """Simulate a chunk of num samples from the stream of seed and return their RunningMoments"""
+        moments = RunningMoments()
+        moments.add(*self.get_samples(z, np.random.default_rng(seed).standard_normal(num)))
+        return moments
+
+    def get_chunk_greeks(self, z, num, seed, method='pathwise'):
+        """Simulate a chunk of num samples from the stream of seed and return a dict of the RunningMoments
+        of the undiscounted samples of every greek in GREEKS, estimated by method
+        """
+        rand = np.random.default_rng(seed).standard_normal(num)
+        if self.antithetic:
+            rand = np.concatenate((rand, -rand))
+        sqrt_t = sqrt(self.expiry)
+        st = self.get_terminal_spots(rand.copy())
+        each_price = np.maximum(z * (st - self.strike), 0)
+        w = rand / (self.vol * sqrt_t)
+
+        if method == 'pathwise':
+            itm_st = z * (each_price > 0) * st
+            samples = {'delta': itm_st / self.spot,
+                       'vega': itm_st * (sqrt_t * rand - self.vol * self.expiry),
+                       'gamma': itm_st / self.spot**2 * (w - 1)}
+        else:
+            samples = {'delta': each_price * w / self.spot,
+                       'vega': each_price * ((rand**2 - 1) / self.vol - rand * sqrt_t),
+                       'gamma': each_price * (w**2 - w - 1 / (self.vol**2 * self.expiry)) / self.spot**2}
+        samples['price'] = each_price
+
+        moments = {}
+        for name, y in samples.items():
+            if self.antithetic:
+                y = (y[:num] + y[num:]) / 2
+            moments[name] = RunningMoments()
+            moments[name].add(y)
+        return moments
+
+    def get_greeks(self, option, method='pathwise'):
+        """Estimate the price, delta, gamma and vega of the option in one simulation pass.
+
+        method: 'pathwise' or 'likelihood_ratio', see the module docstring
+        Return two dicts from the names in GREEKS to their values and to the standard errors of their own samples.
+        The simulation runs in chunks like get_price_and_error, with antithetic variates and in the
+        worker pool if set, but without control variates, qmc or early stopping.
+        The estimators are those of the European payoff, which the pricers of other payoffs refuse.
         """
+        assert method in self.GREEK_METHODS, 'method must be one of {}; received: {}'.format(self.GREEK_METHODS, method)
+        self._set_option(option)
+        z = 1 if option.type == OptionType.CALL else -1
+        sample_num = max(self.simu_num // (2 if self.antithetic else 1), 1)
+
+        totals = {name: RunningMoments() for name in self.GREEKS}
+        for batch, _ in self._get_chunks(z, sample_num, 'get_chunk_greeks', (method,)):
+            for name in self.GREEKS:
+                totals[name].merge(batch[name])
+
+        df = exp(- self.rate * self.expiry)
+        greeks, std_errors = {}, {}
+        for name in self.GREEKS:
+            mean, std_error = totals[name].estimate()
+            greeks[name], std_errors[name] = df * mean, df * std_error
+        return greeks, std_errors
+
+    def _get_chunks(self, z, sample_num, method='get_chunk_moments', args=()):
+        """Yield the results of the pricer's method, by default the RunningMoments, of chunks of
+        pseudo-random paths in order, with the number of samples of each chunk. Chunks are sent to the
+        worker processes ps_num at a time, so that early stopping doesn't leave a long queue of work behind.
+        args: the arguments of method after (z, num, seed)
+        """
+        seed = np.random.SeedSequence(self.seed)
+        tasks = ((self, method, z, min(self.chunk_size, sample_num - start), seed.spawn(1)[0], args)
+                 for start in range(0, sample_num, self.chunk_size))
+        if self.vectorized or not self.ps_num:
+            for task in tasks:
+                yield _run_chunk(task), task[3]
+            return
+
+        pool = get_pool(self.ps_num)
+        while True:
+            wave = list(islice(tasks, self.ps_num))
+            if not wave:
+                break
+            for task, result in zip(wave, pool.map(_run_chunk, wave)):
+                yield result, task[3]
+
+    def _get_replications(self, z, sample_num, control_mean):
+        """Yield the prices of randomized QMC replications one at a time, with the number of samples of each"""
+        points = 1 << max((sample_num // self.replications).bit_length() - 1, 0)
+        for seed in np.random.SeedSequence(self.seed).spawn(self.replications):
+            sobol = SobolSequence(self.get_qmc_dim(), seed=seed)
+            rng = np.random.default_rng(seed.spawn(1)[0])
+            moments = RunningMoments()
+            while moments.n < points:
+                moments.add(*self.get_qmc_samples(z, sobol, min(self.chunk_size, points - moments.n), rng))
+            replication = RunningMoments()
+            replication.add(np.array([moments.estimate(control_mean)[0]]))
+            yield replication, points
+
+    def get_qmc_dim(self):
+        """Return the number of dimensions of the Sobol points of one path"""
+        return 1
+
+    def get_qmc_samples(self, z, sobol, num, rng):
+        """Return the samples of get_samples of the next num points of sobol. rng draws the pseudo-random
+        numbers a path may need beyond its Sobol point.
+        """
+        return self.get_samples(z, norminv_array(sobol.random(num)[:, 0]))
+
+    def _set_option(self, option):
         self.spot = option.spot
         self.strike = option.strike
         self.rate = option.rate
         self.expiry = option.expiry
         self.vol = option.vol
-        self.cost_of_carry = option.cost_of_carry or option.rate
+        self.cost_of_carry = resolve_cost_of_carry(option.cost_of_carry, option.rate)
+
+    def price_option(self, option):
+        """
+        simu_num: the number of simulation runs, usually > 100000
+        ps_num: If zero, run simulation in single process mode;
+                otherwise run in multiprocess mode with a reused pool of ps_num processes to speed up
 
+        option can also be an OptionBook, in which case an array of prices is returned
+        """
+        if isinstance(option, OptionBook):
+            return np.array([self.price_option(opt) for opt in option.to_options()])
+
+        if (self.ps_num or self.vectorized or self.qmc or self.antithetic or self.control_variate or
+                self.abs_tol is not None or self.rel_tol is not None or self.time_budget is not None):
+            return round(self.get_price_and_error(option)['price'], 4)
+
+        # single process mode
+        self._set_option(option)
         z = 1 if option.type == OptionType.CALL else -1
 
         sum = 0
-        if self.ps_num:
-            # multiprocess mode
-            if (self.simu_num / self.ps_num <= 1000): # when > 1000, simu_num / ps_num ~= simu_num / ps_num +- simu_num % ps_num
-                assert not self.simu_num % self.ps_num, \
-                    'simu_num must be integer times of ps_num; received simu_num: {}, ps_num: {}'.format(self.simu_num, self.ps_num)
-            resultq = Queue()
-            processes = [Process(target=self._ps_slice, args=(z, self.simu_num / self.ps_num, resultq)) for i in range(self.ps_num)]
-            for p in processes:
-                p.start()
-            for p in processes:
-                p.join()
-
-            while not resultq.empty():
-                sum += resultq.get()
-
-        else:
-            # single process mode
-            for i in range(self.simu_num):
-                sum += self.get_price_of_one_run(z)
+        for i in range(self.simu_num):
+            sum += self.get_price_of_one_run(z)
 
         return round(exp(- self.rate * self.expiry) * sum / self.simu_num, 4)
+
+
+def _run_chunk(task):
+    """Run a (pricer, method, z, num, seed, args) task, i.e. pricer.method(z, num, seed, *args), in a worker process"""
+    pricer, method, z, num, seed, args = task
+    return getattr(pricer, method)(z, num, seed, *args)
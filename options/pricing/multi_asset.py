@@ -0,0 +1,170 @@
+"""
+Options on several correlated assets by Monte Carlo simulation
+
+The terminal prices of the n assets are
+
+    S_i(T) = S_i * exp((b_i - vol_i**2 / 2) * T + vol_i * e_i * sqrt(T))
+    where e = L * rand, rand is a vector of n independent standard normals and L * L' = C, the
+    correlation matrix
+
+The factor L is computed once per option:
+    cholesky: the lower triangular Cholesky factor, C must be positive definite
+    eigen: C = V * diag(lambda) * V', L = D * V * diag(sqrt(max(lambda, 0))), where D rescales the rows
+           of L to unit length. A C which is not positive semi-definite is thereby repaired to the
+           correlation matrix L * L' of the same eigenvectors without the negative eigenvalues.
+
+Payoffs, with z = 1 for calls and -1 for puts:
+    basket: max(z * (sum(w_i * S_i(T)) - X), 0), equal weights w_i = 1 / n by default
+    spread: max(z * (S_1(T) - S_2(T) - X), 0)
+    best_of: max(z * (max(S_i(T)) - X), 0)
+    worst_of: max(z * (min(S_i(T)) - X), 0)
+
+Control variates:
+    spot: sum(w_i * S_i(T)) with expectation sum(w_i * S_i * exp(b_i * T))
+    black_scholes: for a basket of positive weights, the option on the geometric basket
+        G = prod(S_i(T)**(w_i / sum(w))), which is lognormal:
+            m = sum(w_i * (log(S_i) + (b_i - vol_i**2 / 2) * T)) / sum(w)
+            v = w' * cov * w * T / sum(w)**2, where cov_ij = C_ij * vol_i * vol_j
+            E[max(z * (sum(w) * G - X), 0)] = z * (sum(w) * exp(m + v / 2) * N(z * d1) - X * N(z * d2))
+            d1 = (m + log(sum(w) / X) + v) / sqrt(v), d2 = d1 - sqrt(v)
+
+The normals of a chunk are drawn in blocks of at most chunk_size numbers, so memory is bounded by
+chunk_size whatever the number of assets. Antithetic variates, error estimates, early stopping and
+multiprocess mode are the ones of MonteCarloPricer.
+"""
+
+from math import exp, log, sqrt
+
+import numpy as np
+
+from options.functions import cdf
+from options.option import OptionType
+from options.pricing.monte_carlo import MonteCarloPricer, RunningMoments
+
+
+class MultiAssetOption:
+
+    def __init__(self, type, spots, strike, rate, expiry, vols, correlation, weights=None, cost_of_carry=None):
+        """spots, vols: the spot prices and volatilities of the assets
+        correlation: the correlation matrix of the assets
+        weights: the basket weights, 1 / n each by default
+        cost_of_carry: the cost of carry of each asset, the rate by default
+        """
+        self.type = type
+        self.spots = np.asarray(spots, dtype=float)
+        self.strike = strike
+        self.rate = rate
+        self.expiry = expiry
+        self.vols = np.broadcast_to(np.asarray(vols, dtype=float), self.spots.shape)
+        self.correlation = np.asarray(correlation, dtype=float)
+        n = len(self.spots)
+        self.weights = np.full(n, 1. / n) if weights is None else np.asarray(weights, dtype=float)
+        self.cost_of_carry = np.broadcast_to(np.asarray(rate if cost_of_carry is None else cost_of_carry, dtype=float), self.spots.shape)
+
+
+def get_correlation_factor(correlation, method='cholesky'):
+    """Return L with L * L' = correlation, see the module docstring"""
+    if method == 'cholesky':
+        return np.linalg.cholesky(correlation)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    factor = eigenvectors * np.sqrt(np.maximum(eigenvalues, 0))
+    return factor / np.linalg.norm(factor, axis=1, keepdims=True)
+
+
+class MultiAssetPricer(MonteCarloPricer):
+    PAYOFFS = ('basket', 'spread', 'best_of', 'worst_of')
+    FACTORIZATIONS = ('cholesky', 'eigen')
+
+    def __init__(self, payoff='basket', factorization='cholesky', **kwargs):
+        """payoff: one of PAYOFFS
+        factorization: 'cholesky' or 'eigen', see the module docstring
+        kwargs: the arguments of MonteCarloPricer, except qmc
+        """
+        assert payoff in self.PAYOFFS, 'payoff must be one of {}; received: {}'.format(self.PAYOFFS, payoff)
+        assert factorization in self.FACTORIZATIONS, \
+            'factorization must be one of {}; received: {}'.format(self.FACTORIZATIONS, factorization)
+        MonteCarloPricer.__init__(self, **kwargs)
+        assert not self.qmc, 'multi-asset options are not priced with qmc'
+        self.payoff = payoff
+        self.factorization = factorization
+
+    def _set_option(self, option):
+        assert self.payoff != 'spread' or len(option.spots) == 2, 'spread options have two assets'
+        self.spots = option.spots
+        self.strike = option.strike
+        self.rate = option.rate
+        self.expiry = option.expiry
+        self.vols = option.vols
+        self.weights = option.weights
+        self.cost_of_carry = option.cost_of_carry
+        self.correlation = option.correlation
+        self.factor = get_correlation_factor(option.correlation, self.factorization)
+
+    def get_control_mean(self, option_type):
+        """Return the expectation of the control variate, None without control variate"""
+        if self.control_variate == 'spot':
+            return float(self.weights @ (self.spots * np.exp(self.cost_of_carry * self.expiry)))
+        if self.control_variate == 'black_scholes':
+            assert self.payoff == 'basket' and (self.weights > 0).all(), \
+                'the black_scholes control variate is for baskets of positive weights'
+            z = 1 if option_type == OptionType.CALL else -1
+            total = self.weights.sum()
+            m = self.weights @ (np.log(self.spots) + (self.cost_of_carry - self.vols**2 / 2) * self.expiry) / total
+            cov = self.correlation * np.outer(self.vols, self.vols)
+            v = self.weights @ cov @ self.weights * self.expiry / total**2
+            d1 = (m + log(total / self.strike) + v) / sqrt(v)
+            d2 = d1 - sqrt(v)
+            return z * (total * exp(m + v / 2) * cdf(z * d1) - self.strike * cdf(z * d2))
+        return None
+
+    def get_chunk_moments(self, z, num, seed):
+        """Simulate a chunk of num samples from the stream of seed and return their RunningMoments"""
+        rng = np.random.default_rng(seed)
+        n_assets = len(self.spots)
+        drift = np.log(self.spots) + (self.cost_of_carry - self.vols**2 / 2) * self.expiry
+        diffusion = self.vols * sqrt(self.expiry)
+        total = self.weights.sum()
+        block = max(self.chunk_size // (n_assets * (2 if self.antithetic else 1)), 1)
+
+        moments = RunningMoments()
+        for start in range(0, num, block):
+            m = min(block, num - start)
+            rand = rng.standard_normal((m, n_assets))
+            if self.antithetic:
+                rand = np.concatenate((rand, -rand))
+            x = rand @ self.factor.T
+            x *= diffusion
+            x += drift
+            if self.control_variate == 'black_scholes':
+                geometric = total * np.exp(x @ self.weights / total)
+            st = np.exp(x, out=x)
+
+            if self.payoff == 'basket':
+                level = st @ self.weights
+            elif self.payoff == 'spread':
+                level = st[:, 0] - st[:, 1]
+            elif self.payoff == 'best_of':
+                level = st.max(axis=1)
+            else:
+                level = st.min(axis=1)
+            y = np.maximum(z * (level - self.strike), 0)
+
+            control = None
+            if self.control_variate == 'spot':
+                control = st @ self.weights
+            elif self.control_variate == 'black_scholes':
+                control = np.maximum(z * (geometric - self.strike), 0)
+            if self.antithetic:
+                y = (y[:m] + y[m:]) / 2
+                if control is not None:
+                    control = (control[:m] + control[m:]) / 2
+            moments.add(y, control)
+        return moments
+
+    def price_option(self, option):
+        """Return the price of a MultiAssetOption rounded to 4 digits"""
+        return round(self.get_price_and_error(option)['price'], 4)
+
+    def get_greeks(self, option, method='pathwise'):
+        """The greeks of MonteCarloPricer are those of a single asset European payoff"""
+        raise NotImplementedError('greeks of multi-asset options are not estimated by simulation')
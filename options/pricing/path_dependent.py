@@ -0,0 +1,181 @@
+"""
+Path dependent options by Monte Carlo simulation
+
+The paths are simulated date by date over the monitoring dates t1 < ... < tn = T (n equal steps by
+default), and every path only keeps a running state, so memory is bounded by the number of paths of a
+chunk whatever the number of dates:
+
+    x(t_i) = x(t_(i-1)) + (b - vol*vol/2) * dt + vol * sqrt(dt) * rand
+    where x = log(S), dt = t_i - t_(i-1) and rand is a standard normal
+
+1. Arithmetic average (Asian) option, fixed strike
+    A = sum(S(t_i)) / n
+    payoff = max(z * (A - X), 0)
+
+2. Floating strike lookback option
+    call payoff = S(T) - min(S), put payoff = max(S) - S(T)
+   Fixed strike lookback option
+    call payoff = max(max(S) - X, 0), put payoff = max(X - min(S), 0)
+    The extremes include S(0).
+
+3. Barrier option, up or down as in options/pricing/barrier_options.py (down if S > H)
+    out: payoff = vanilla payoff if the barrier is never hit, else the rebate K paid at the hit date
+    in: payoff = vanilla payoff if the barrier is hit, else the rebate K paid at expiration
+    Every path keeps the probability w that it hasn't hit the barrier yet instead of a knocked flag.
+    Discrete monitoring checks the barrier at the dates only.
+
+Continuous monitoring is approximated on the dates by the Brownian bridge between two dates:
+    probability of hitting barrier H between x0 and x1 not beyond it
+        p = exp(-2 * log(S0 / H) * log(S1 / H) / (vol**2 * dt))
+        w = w * (1 - p)
+    minimum and maximum of the bridge, sampled with a uniform random number U
+        min = (x0 + x1 - sqrt((x1 - x0)**2 - 2 * vol**2 * dt * log(U))) / 2
+        max = (x0 + x1 + sqrt((x1 - x0)**2 - 2 * vol**2 * dt * log(U))) / 2
+
+Quasi-Monte Carlo: every path is one Sobol point of n dimensions, turned into normals by norminv and
+into the path W(t1), ..., W(tn) by the Brownian bridge of options/qmc.py, so that the first, best
+distributed dimensions carry most of the variance of the path. The increments of the path give the
+normals of the dates:
+    rand_i = (W(t_i) - W(t_(i-1))) / sqrt(dt)
+The uniform numbers of the continuous extremes are pseudo-random. The replications and their error
+estimate are the ones of MonteCarloPricer.
+
+The 'black_scholes' control variate is the European payoff of the same path, and antithetic variates,
+error estimates, early stopping and multiprocess mode are the ones of MonteCarloPricer.
+"""
+
+from math import exp, log, sqrt
+
+import numpy as np
+
+from options.functions import norminv_array
+from options.option import OptionBook
+from options.pricing.barrier_options import BarrierType, BarrierTypeError
+from options.pricing.monte_carlo import MonteCarloPricer, RunningMoments
+from options.qmc import BrownianBridge
+
+
+class PathDependentPricer(MonteCarloPricer):
+    PRODUCTS = ('asian', 'lookback', 'fixed_lookback', 'barrier')
+
+    def __init__(self, product, steps=52, times=None, barrier=None, bar_type=BarrierType.OUT, rebate=0,
+                 continuous=False, **kwargs):
+        """product: one of PRODUCTS
+        steps: the number of equally spaced monitoring dates
+        times: the monitoring dates as times to expiration, the last one is the expiry (steps is ignored)
+        barrier, bar_type, rebate: the barrier H, BarrierType.IN or BarrierType.OUT and the rebate K
+        continuous: monitor the barrier or the extremes continuously, see the module docstring
+        kwargs: the arguments of MonteCarloPricer; with qmc, the number of dates is at most MAX_DIM
+                of options/qmc.py
+        """
+        assert product in self.PRODUCTS, 'product must be one of {}; received: {}'.format(self.PRODUCTS, product)
+        assert product != 'barrier' or barrier, 'barrier options need a barrier'
+        if product == 'barrier' and bar_type not in (BarrierType.IN, BarrierType.OUT):
+            raise BarrierTypeError
+        MonteCarloPricer.__init__(self, **kwargs)
+        self.product = product
+        self.steps = steps
+        self.times = times
+        self.barrier = barrier
+        self.bar_type = bar_type
+        self.rebate = rebate
+        self.continuous = continuous
+
+    def get_times(self):
+        """Return the monitoring dates of the option"""
+        if self.times is not None:
+            return np.asarray(self.times, dtype=float)
+        return self.expiry * np.arange(1, self.steps + 1) / self.steps
+
+    def get_chunk_moments(self, z, num, seed):
+        """Simulate a chunk of num samples date by date from the stream of seed and return their RunningMoments"""
+        rng = np.random.default_rng(seed)
+        moments = RunningMoments()
+        moments.add(*self.get_path_samples(z, num, (rng.standard_normal(num) for _ in self.get_times()), rng))
+        return moments
+
+    def get_qmc_dim(self):
+        return len(self.get_times())
+
+    def get_qmc_samples(self, z, sobol, num, rng):
+        """Return the samples of the paths of the next num points of sobol, see the module docstring"""
+        times = self.get_times()
+        w = BrownianBridge(times).build(norminv_array(sobol.random(num)))
+        rand = np.diff(w, axis=1, prepend=0) / np.sqrt(np.diff(times, prepend=0))
+        return self.get_path_samples(z, num, rand.T, rng)
+
+    def get_path_samples(self, z, num, rands, rng):
+        """Simulate num samples date by date and return their payoff samples and the control samples of the
+        same paths, None without control variate.
+        rands: the num standard normals of every date in order
+        rng: the generator of the uniform numbers of the continuous extremes
+        """
+        n = 2 * num if self.antithetic else num
+        times = self.get_times()
+        var = self.vol**2
+
+        x = np.full(n, log(self.spot))
+        if self.product == 'asian':
+            total = np.zeros(n)
+        elif self.product == 'barrier':
+            h = log(self.barrier)
+            side = 1 if self.spot > self.barrier else -1  # down or up barrier
+            alive = np.ones(n)
+            rebate_fv = np.zeros(n)  # rebates at hit compounded to expiration
+        else:
+            lo, hi = x.copy(), x.copy()
+
+        t0 = 0.
+        for t, rand in zip(times, rands):
+            dt = t - t0
+            if self.antithetic:
+                rand = np.concatenate((rand, -rand))
+            x1 = x + (self.cost_of_carry - var / 2) * dt + self.vol * sqrt(dt) * rand
+
+            if self.product == 'asian':
+                total += np.exp(x1)
+            elif self.product == 'barrier':
+                d1 = side * (x1 - h)
+                survive = (d1 > 0).astype(float)
+                if self.continuous:
+                    survive *= 1 - np.exp(-2 * np.maximum(side * (x - h), 0) * np.maximum(d1, 0) / (var * dt))
+                rebate_fv += alive * (1 - survive) * exp(self.rate * (self.expiry - t))
+                alive *= survive
+            elif self.continuous:
+                spread = np.sqrt((x1 - x) ** 2 - 2 * var * dt * np.log(1 - rng.random(n)))
+                np.minimum(lo, (x + x1 - spread) / 2, out=lo)
+                np.maximum(hi, (x + x1 + spread) / 2, out=hi)
+            else:
+                np.minimum(lo, x1, out=lo)
+                np.maximum(hi, x1, out=hi)
+            x, t0 = x1, t
+
+        st = np.exp(x)
+        vanilla = np.maximum(z * (st - self.strike), 0)
+        if self.product == 'asian':
+            y = np.maximum(z * (total / len(times) - self.strike), 0)
+        elif self.product == 'lookback':
+            y = st - np.exp(lo) if z == 1 else np.exp(hi) - st
+        elif self.product == 'fixed_lookback':
+            y = np.maximum(np.exp(hi) - self.strike, 0) if z == 1 else np.maximum(self.strike - np.exp(lo), 0)
+        elif self.bar_type == BarrierType.OUT:
+            y = alive * vanilla + self.rebate * rebate_fv
+        else:
+            y = (1 - alive) * vanilla + self.rebate * alive
+
+        control = {'black_scholes': vanilla, 'spot': st}.get(self.control_variate)
+        if self.antithetic:
+            y = (y[:num] + y[num:]) / 2
+            if control is not None:
+                control = (control[:num] + control[num:]) / 2
+        return y, control
+
+    def price_option(self, option):
+        """Return the price of the option rounded to 4 digits, an array of prices for an OptionBook"""
+        if isinstance(option, OptionBook):
+            return np.array([self.price_option(opt) for opt in option.to_options()])
+        return round(self.get_price_and_error(option)['price'], 4)
+
+    def get_greeks(self, option, method='pathwise'):
+        """The greeks of MonteCarloPricer are those of the European payoff and don't apply to path dependent payoffs"""
+        raise NotImplementedError('greeks of path dependent options are not estimated by simulation')
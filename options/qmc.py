@@ -0,0 +1,174 @@
+"""
+Quasi-random numbers for Monte Carlo simulation
+
+1. Sobol sequence (Bratley and Fox, with the direction numbers of Joe and Kuo, new-joe-kuo-6.21201)
+
+    For dimension j with primitive polynomial x**s + a1 * x**(s-1) + ... + a(s-1) * x + 1 and initial
+    numbers m1, ..., ms (odd, mk < 2**k), the direction numbers v_k = m_k / 2**k are extended by
+        m_k = 2*a1*m(k-1) ^ 2**2*a2*m(k-2) ^ ... ^ 2**(s-1)*a(s-1)*m(k-s+1) ^ 2**s*m(k-s) ^ m(k-s)
+    and the points are generated in Gray code order, each from the previous one with a single xor
+        x_0 = 0
+        x_i = x_(i-1) ^ v_c(i)
+        where c(i) is the index of the lowest set bit of i
+    The first dimension is the van der Corput sequence (all m_k = 1).
+
+2. Scrambling (Matousek's random linear scrambling with digital shift)
+
+    Every direction number of dimension j, as a column of 32 bits, is multiplied by a random lower
+    triangular bit matrix L_j with unit diagonal, and every point is xor-ed with a random shift e_j:
+        x_i = e_j ^ (L_j * x_i)
+    Each scrambled point is uniform in [0, 1)**dim while the sequence keeps its low discrepancy, so
+    independent scramblings are independent replications of the same quadrature rule, which gives an
+    error estimate of QMC. Points are returned at the centers of their 2**-32 cells, in (0, 1).
+
+3. Brownian bridge
+
+    A path W(t1), ..., W(tm) is built from the first normal as its end point W(tm) = sqrt(tm) * z0 and
+    then by filling in midpoints, coarse scales first:
+        W(t) = ((tr - t) * W(tl) + (t - tl) * W(tr)) / (tr - tl) + sqrt((t - tl) * (tr - t) / (tr - tl)) * z
+    where tl < t < tr are already built (W(0) = 0). Most of the variance of the path is then carried by
+    the first dimensions, which are the best distributed ones of the Sobol sequence.
+"""
+
+import numpy as np
+
+
+BITS = 32
+
+# (s, a, (m1, ..., ms)) of dimensions 2 and above
+_JOE_KUO = (
+    (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)), (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)), (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)), (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)), (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)), (6, 22, (1, 3, 1, 15, 13, 25)), (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)), (7, 4, (1, 3, 7, 13, 13, 15, 69)), (7, 7, (1, 1, 3, 13, 7, 35, 63)),
+    (7, 8, (1, 3, 5, 9, 1, 25, 53)), (7, 14, (1, 3, 1, 13, 9, 35, 107)), (7, 19, (1, 3, 1, 5, 27, 61, 31)),
+    (7, 21, (1, 1, 5, 11, 19, 41, 61)), (7, 28, (1, 3, 5, 3, 3, 13, 69)), (7, 31, (1, 1, 7, 13, 1, 19, 1)),
+    (7, 32, (1, 3, 7, 5, 13, 19, 59)), (7, 37, (1, 1, 3, 9, 25, 29, 41)), (7, 41, (1, 3, 5, 13, 23, 1, 55)),
+    (7, 42, (1, 3, 7, 3, 13, 59, 17)), (7, 50, (1, 3, 1, 3, 5, 53, 69)), (7, 55, (1, 1, 5, 5, 23, 33, 13)),
+    (7, 56, (1, 1, 7, 7, 1, 61, 123)), (7, 59, (1, 1, 7, 9, 13, 61, 49)), (7, 62, (1, 3, 3, 5, 3, 55, 33)),
+    (8, 14, (1, 3, 1, 15, 31, 13, 49, 245)), (8, 21, (1, 3, 5, 15, 31, 59, 63, 97)),
+    (8, 22, (1, 3, 1, 11, 11, 11, 77, 249)), (8, 38, (1, 3, 1, 11, 27, 43, 71, 9)),
+    (8, 47, (1, 1, 7, 15, 21, 11, 81, 45)), (8, 49, (1, 3, 7, 3, 25, 31, 65, 79)),
+    (8, 50, (1, 3, 1, 1, 19, 11, 3, 205)), (8, 52, (1, 1, 5, 9, 19, 21, 29, 157)),
+    (8, 56, (1, 3, 7, 11, 1, 33, 89, 185)), (8, 67, (1, 3, 3, 3, 15, 9, 79, 71)),
+    (8, 70, (1, 3, 7, 11, 15, 39, 119, 27)), (8, 84, (1, 1, 3, 1, 11, 31, 97, 225)),
+    (8, 97, (1, 1, 1, 3, 23, 43, 57, 177)), (8, 103, (1, 3, 7, 7, 17, 17, 37, 71)),
+    (8, 115, (1, 3, 1, 5, 27, 63, 123, 213)), (8, 122, (1, 1, 3, 5, 11, 43, 53, 133)),
+    (9, 8, (1, 3, 5, 5, 29, 17, 47, 173, 479)), (9, 13, (1, 3, 3, 11, 3, 1, 109, 9, 69)),
+    (9, 16, (1, 1, 1, 5, 17, 39, 23, 5, 343)), (9, 22, (1, 3, 1, 5, 25, 15, 31, 103, 499)),
+    (9, 25, (1, 1, 1, 11, 11, 17, 63, 105, 183)), (9, 44, (1, 1, 5, 11, 9, 29, 97, 231, 363)),
+    (9, 47, (1, 1, 5, 15, 19, 45, 41, 7, 383)), (9, 52, (1, 3, 7, 7, 31, 19, 83, 137, 221)),
+    (9, 55, (1, 1, 1, 3, 23, 15, 111, 223, 83)), (9, 59, (1, 1, 5, 13, 31, 15, 55, 25, 161)),
+    (9, 62, (1, 1, 3, 13, 25, 47, 39, 87, 257)),
+
+)
+
+MAX_DIM = len(_JOE_KUO) + 1
+
+
+def get_direction_numbers(dim):
+    """Return the direction numbers of the first dim dimensions as a (dim, BITS) array of integers"""
+    assert 1 <= dim <= MAX_DIM, 'dim must be between 1 and {}; received: {}'.format(MAX_DIM, dim)
+    directions = np.zeros((dim, BITS), dtype=np.uint64)
+    directions[0] = 1 << np.arange(BITS - 1, -1, -1, dtype=np.uint64)
+    for j, (s, a, m) in enumerate(_JOE_KUO[:dim - 1], 1):
+        v = [m[k] << (BITS - 1 - k) for k in range(s)]
+        for k in range(s, BITS):
+            vk = v[k - s] ^ (v[k - s] >> s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    vk ^= v[k - i]
+            v.append(vk)
+        directions[j] = v
+    return directions
+
+
+def _parity(x):
+    """Parity of the bits of an array of integers"""
+    for shift in (16, 8, 4, 2, 1):
+        x = x ^ (x >> np.uint64(shift))
+    return x & np.uint64(1)
+
+
+def _scramble(directions, rng):
+    """Multiply the direction numbers of every dimension by a random lower triangular bit matrix"""
+    dim = len(directions)
+    bit_values = np.uint64(1) << np.arange(BITS - 1, -1, -1, dtype=np.uint64)
+    # row b of the matrix of a dimension as a mask of the bits r <= b, bit r from the most significant
+    lower = np.tril(rng.integers(0, 2, (dim, BITS, BITS), dtype=np.uint64), -1) + np.eye(BITS, dtype=np.uint64)
+    masks = (lower * bit_values).sum(axis=2, dtype=np.uint64)
+    # bit b of the scrambled direction number k
+    bits = _parity(masks[:, :, None] & directions[:, None, :])
+    return (bits * bit_values[None, :, None]).sum(axis=1, dtype=np.uint64)
+
+
+class SobolSequence:
+    def __init__(self, dim, scramble=True, seed=None):
+        """dim: the number of dimensions, at most MAX_DIM
+        scramble: randomize the sequence by random linear scrambling and digital shift
+        seed: seed of numpy's Generator drawing the scrambling, None for fresh entropy
+        """
+        self.dim = dim
+        self.directions = get_direction_numbers(dim)
+        self.shift = np.zeros(dim, dtype=np.uint64)
+        if scramble:
+            rng = np.random.default_rng(seed)
+            self.directions = _scramble(self.directions, rng)
+            self.shift = rng.integers(0, 1 << BITS, dim, dtype=np.uint64)
+        self.index = 0
+        self.state = np.zeros(dim, dtype=np.uint64)
+
+    def random_integers(self, n):
+        """Return the next n points as an (n, dim) array of BITS bit integers"""
+        assert self.index + n <= 1 << BITS, 'Sobol sequence has at most 2**{} points'.format(BITS)
+        i = np.arange(self.index, self.index + n, dtype=np.uint64)
+        i[i == 0] = 1
+        lowest_bit = i & (~i + np.uint64(1))
+        steps = self.directions[:, np.log2(lowest_bit).astype(int)].T
+        if self.index == 0:
+            steps[0] = self.shift
+        points = np.bitwise_xor.accumulate(steps, axis=0)
+        points ^= self.state
+        self.index += n
+        self.state = points[-1]
+        return points
+
+    def random(self, n):
+        """Return the next n points as an (n, dim) array of floats in (0, 1)"""
+        return (self.random_integers(n) + 0.5) / float(1 << BITS)
+
+
+class BrownianBridge:
+    def __init__(self, times):
+        """times: the increasing positive times t1, ..., tm of the path"""
+        self.times = np.asarray(times, dtype=float)
+        m = len(self.times)
+        t = np.concatenate(([0.], self.times))
+        self.terminal_std = np.sqrt(t[m])
+
+        # (index, left, right, left weight, right weight, std) of every midpoint in construction order,
+        # with index 0 for time 0
+        self.steps = []
+        intervals = [(0, m)]
+        while intervals:
+            left, right = intervals.pop(0)
+            if right - left < 2:
+                continue
+            mid = (left + right) // 2
+            dt = t[right] - t[left]
+            self.steps.append((mid, left, right, (t[right] - t[mid]) / dt, (t[mid] - t[left]) / dt,
+                               np.sqrt((t[mid] - t[left]) * (t[right] - t[mid]) / dt)))
+            intervals += [(left, mid), (mid, right)]
+
+    def build(self, normals):
+        """Turn an (n, m) array of standard normals, the most important first, into an (n, m) array
+        of Brownian motion values W(t1), ..., W(tm)
+        """
+        n, m = normals.shape
+        w = np.zeros((n, m + 1))
+        w[:, m] = self.terminal_std * normals[:, 0]
+        for k, (mid, left, right, a, b, std) in enumerate(self.steps, 1):
+            w[:, mid] = a * w[:, left] + b * w[:, right] + std * normals[:, k]
+        return w[:, 1:]
@@ -1,9 +1,9 @@
 import os
 import sys
+import threading
 import time
-from io import BytesIO
 
-from flask import Flask, render_template, request, send_file
+from flask import Flask, abort, render_template, request
 
 # Force matplotlib to not use any Xwindows backend in Linux.
 if not sys.platform.startswith('win'):
@@ -17,10 +17,21 @@ from options.pricing.binomial_trees import BinomialTreePricer
 from options.plotting.black_scholes_plot import get_bs_plot
 from options.plotting.binomial_trees_plot import get_bt_plot
 from options.plotting.black_scholes_greeks_plot import get_greeks_plot
+from options.plotting.cache import PlotCache
 
 
 app = Flask(__name__)
 
+PLOTS = {'formula': get_bs_plot,
+         'greek': get_greeks_plot,
+         'bitree': get_bt_plot}
+
+# PLOT_CACHE_DIR: a directory shared by the workers for the rendered plots, memory only if unset
+# PLOT_CACHE_WARM_UP: render all plots in the background at startup unless it is 0
+plot_cache = PlotCache(directory=os.environ.get('PLOT_CACHE_DIR'))
+if os.environ.get('PLOT_CACHE_WARM_UP', '1') != '0':
+    threading.Thread(target=plot_cache.warm_up, args=(PLOTS,), daemon=True).start()
+
 
 @app.route('/')
 def index():
@@ -51,10 +62,10 @@ def get_price(otype, method, spot, strike, rate, expiry, vol, coc):
         pricer = BlackScholesPricer()
     elif method == 'bitree':
         num = int(request.form.get('bt_step_num'))
-        pricer = BinomialTreePricer(num)
+        pricer = BinomialTreePricer(num, american=request.form.get('bt_exercise') == 'american')
     else:  # simulation
         num = int(request.form.get('mc_simu_num'))
-        pricer = MonteCarloPricer(num, 0)
+        pricer = MonteCarloPricer(num, 0, vectorized=True)
 
     option = Option(otype, spot, strike, rate, expiry, vol, cost_of_carry=coc)
     price = pricer.price_option(option)
@@ -63,16 +74,18 @@ def get_price(otype, method, spot, strike, rate, expiry, vol, coc):
     return price, t
 
 
-@app.route('/plotting', methods=['POST'])
+@app.route('/plotting', methods=['GET', 'POST'])
 def plotting():
-    selected = request.form.get('view_plot')
-    fig = {'formula': get_bs_plot,
-           'greek': get_greeks_plot,
-           'bitree': get_bt_plot}[selected]()
-    img = BytesIO()
-    fig.savefig(img)
-    img.seek(0)
-    return send_file(img, mimetype='image/png')
+    selected = request.values.get('view_plot')
+    if selected not in PLOTS:
+        abort(404)
+    etag, image = plot_cache.get(selected, PLOTS[selected])
+    # built by hand rather than by send_file, whose etag argument is missing from the vendored Flask 0.12
+    response = app.response_class(image, mimetype='image/png')
+    response.set_etag(etag)
+    response = response.make_conditional(request)
+    response.cache_control.no_cache = True  # revalidate with the ETag
+    return response
 
 
 @app.route('/images')
@@ -0,0 +1,50 @@
+import tempfile
+from unittest import TestCase
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from options.plotting.cache import PlotCache
+
+
+class PlotCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.renders = []
+
+    def render(self, size=1):
+        self.renders.append(size)
+        fig = plt.figure(figsize=(size, size))
+        plt.plot([0, 1], [0, size])
+        return fig
+
+    def test_memory(self):
+        """A plot is rendered once, and the least recently used plots are evicted beyond max_bytes"""
+        cache = PlotCache()
+        key, image = cache.get('line', self.render, {'size': 2})
+        self.assertTrue(image.startswith(b'\x89PNG'))
+        self.assertEqual((key, image), cache.get('line', self.render, {'size': 2}))
+        self.assertEqual([2], self.renders)
+        self.assertNotEqual(key, cache.get('line', self.render, {'size': 3})[0])
+        self.assertNotEqual(key, PlotCache(version=2).get_key('line', {'size': 2}))
+
+        sizes = [len(PlotCache().get('line', self.render, {'size': size})[1]) for size in (2.1, 2.2)]
+        cache = PlotCache(max_bytes=len(image) + max(sizes))
+        for size in (2, 2.1, 2, 2.2):
+            cache.get('line', self.render, {'size': size})
+        # 2.1 was the least recently used
+        self.assertEqual([cache.get_key('line', {'size': size}) for size in (2, 2.2)], list(cache.images))
+        self.assertEqual(sum(len(image) for image in cache.images.values()), cache.size)
+
+    def test_disk(self):
+        """Caches sharing a directory render a plot once, and warm up renders the plots not cached yet"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PlotCache(directory=directory)
+            cache.warm_up({'a': self.render, 'b': self.render})
+            self.assertEqual([1, 1], self.renders)
+
+            other = PlotCache(max_bytes=0, directory=directory)
+            self.assertEqual(cache.get('a', self.render), other.get('a', self.render))
+            other.warm_up({'a': self.render, 'b': self.render})
+            self.assertEqual([1, 1], self.renders)
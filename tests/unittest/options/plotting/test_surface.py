@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.black_scholes_greeks import BlackScholesGreeks
+from options.option import OptionType, Option
+from options.plotting.surface import curve, surface
+from options.pricing.black_scholes import BlackScholesPricer
+
+
+class SurfaceTestCase(TestCase):
+
+    def test_surface(self):
+        """Every point of a surface is the price or greek of the template with the two attributes replaced"""
+        option = Option(OptionType.CALL, 100, 100, 0.07, 1, 0.3, cost_of_carry=0.04)
+        days, spots = np.arange(1, 180, 5), np.arange(50, 150, 2)
+        x, y, z = surface(option, ('expiry', days / 365.0), ('spot', spots), 'delta')
+        self.assertEqual((len(spots), len(days)), z.shape)
+        self.assertEqual(z.shape, x.shape)
+        for i, j in ((0, 0), (10, 20), (-1, -1)):
+            expected = BlackScholesGreeks(Option(OptionType.CALL, spots[i], 100, 0.07, days[j] / 365.0, 0.3,
+                                                 cost_of_carry=0.04)).get_greeks(round_digit=None)['delta']
+            self.assertAlmostEqual(expected, z[i, j], 12)
+            self.assertEqual((days[j] / 365.0, spots[i]), (x[i, j], y[i, j]))
+
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        _, _, z = surface(option, ('strike', [40, 52]), ('vol', [0.1, 0.3]))
+        self.assertAlmostEqual(BlackScholesPricer().price_option(option, None), z[1, 1], 12)
+
+    def test_curve_follows_product(self):
+        """The cost of carry decided by the product follows the rate along a rate axis"""
+        option = Option(OptionType.CALL, 60, 65, 0.08, 0.25, 0.3, product='stock_option')
+        rates = np.array([0.01, 0.08, 0.2])
+        prices = curve(option, ('rate', rates))
+        for rate, price in zip(rates, prices):
+            expected = BlackScholesPricer().price_option(Option(OptionType.CALL, 60, 65, rate, 0.25, 0.3, product='stock_option'), None)
+            self.assertAlmostEqual(expected, price, 12)
+
+        # an explicit cost of carry stays fixed
+        option = Option(OptionType.CALL, 60, 65, 0.08, 0.25, 0.3, cost_of_carry=0.02, product='stock_option')
+        expected = BlackScholesPricer().price_option(Option(OptionType.CALL, 60, 65, 0.2, 0.25, 0.3, cost_of_carry=0.02), None)
+        self.assertAlmostEqual(expected, curve(option, ('rate', [0.2]), 'price')[0], 12)
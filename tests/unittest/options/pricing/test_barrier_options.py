@@ -1,7 +1,11 @@
 from unittest import TestCase
 
-from options.option import OptionType
-from options.pricing.barrier_options import BarrierOption, BarrierType
+import numpy as np
+
+from options.black_scholes_greeks import BlackScholesGreeks
+from options.option import Option, OptionType
+from options.pricing.barrier_options import BarrierOption, BarrierType, BarrierTypeError, get_barrier_greeks, get_barrier_prices
+from options.pricing.black_scholes import BlackScholesPricer
 
 
 class BarrierOptionsTestCase(TestCase):
@@ -35,3 +39,69 @@ class BarrierOptionsTestCase(TestCase):
                         bo = BarrierOption(spot, strike, rate, expiry, vol, coc, rebate, bar)
                         self.assertEqual(bo.get_payoff(otype, btype), values[i])
                         i += 1
+
+        # the same table in one batch
+        cases = [(otype, btype, bar, strike) for otype in opt_types for btype in bar_types for bar in bars for strike in strikes]
+        otypes, btypes, cbars, cstrikes = zip(*cases)
+        prices = get_barrier_prices(otypes, btypes, spot, cstrikes, rate, expiry, vol, coc, rebate, cbars)
+        np.testing.assert_array_equal(values, np.round(prices, 4))
+
+    def test_batch(self):
+        """The batch prices of random up and down, in and out calls and puts are the unrounded prices of BarrierOption"""
+        rng = np.random.default_rng(0)
+        n = 1000
+        spots, strikes, bars = rng.uniform(80, 120, (3, n))
+        rates, expiries, vols, cocs, rebates = (rng.uniform(0, 0.1, n), rng.uniform(0.1, 2, n), rng.uniform(0.1, 0.5, n),
+                                                rng.uniform(-0.05, 0.1, n), rng.uniform(0, 5, n))
+        otypes, btypes = rng.integers(0, 2, (2, n))
+        prices = get_barrier_prices(otypes, btypes, spots, strikes, rates, expiries, vols, cocs, rebates, bars)
+        for i in range(n):
+            bo = BarrierOption(spots[i], strikes[i], rates[i], expiries[i], vols[i], cocs[i], rebates[i], bars[i])
+            self.assertAlmostEqual(bo.get_payoff(OptionType(otypes[i]), btypes[i]), prices[i], delta=5.1e-5)
+
+        # without rebate in + out = vanilla
+        vanilla = BlackScholesPricer().price_options(otypes, spots, strikes, rates, expiries, vols, cocs)
+        knock_in = get_barrier_prices(otypes, BarrierType.IN, spots, strikes, rates, expiries, vols, cocs, 0, bars)
+        knock_out = get_barrier_prices(otypes, BarrierType.OUT, spots, strikes, rates, expiries, vols, cocs, 0, bars)
+        np.testing.assert_allclose(vanilla, knock_in + knock_out, atol=1e-10)
+
+        with self.assertRaises(BarrierTypeError):
+            get_barrier_prices(otypes, 2, spots, strikes, rates, expiries, vols, cocs, rebates, bars)
+
+    def test_greeks(self):
+        """Greeks of random barrier options agree with central differences of the prices,
+        and stay finite and continuous next to the barrier
+        """
+        rng = np.random.default_rng(1)
+        n = 1000
+        spots, strikes, bars = rng.uniform(80, 120, (3, n))
+        bars = np.where(np.abs(spots - bars) < 2, bars + 4, bars)
+        rates, expiries, vols, cocs, rebates = (rng.uniform(0, 0.1, n), rng.uniform(0.1, 2, n), rng.uniform(0.1, 0.5, n),
+                                                rng.uniform(-0.05, 0.1, n), rng.uniform(0, 5, n))
+        otypes, btypes = rng.integers(0, 2, (2, n))
+
+        def price(spots=spots, expiries=expiries, vols=vols):
+            return get_barrier_prices(otypes, btypes, spots, strikes, rates, expiries, vols, cocs, rebates, bars)
+
+        greeks = get_barrier_greeks(otypes, btypes, spots, strikes, rates, expiries, vols, cocs, rebates, bars)
+        h = 1e-3
+        np.testing.assert_allclose(price(), greeks['price'], atol=1e-12)
+        np.testing.assert_allclose((price(spots + h) - price(spots - h)) / (2 * h), greeks['delta'], atol=1e-6)
+        np.testing.assert_allclose((price(spots + h) - 2 * price() + price(spots - h)) / h**2, greeks['gamma'], atol=1e-5)
+        np.testing.assert_allclose((price(vols=vols + 1e-5) - price(vols=vols - 1e-5)) / 2e-5, greeks['vega'], atol=1e-4)
+        np.testing.assert_allclose((price(expiries=expiries - 1e-5) - price(expiries=expiries + 1e-5)) / 2e-5,
+                                   greeks['theta'], atol=1e-4)
+
+        # without barrier the greeks are the Black-Scholes greeks
+        bo = BarrierOption(100, 90, 0.08, 0.5, 0.25, 0.04, 0, 1e-6)
+        expected = BlackScholesGreeks(Option(OptionType.PUT, 100, 90, 0.08, 0.5, 0.25, cost_of_carry=0.04)).get_greeks()
+        greeks = bo.get_greeks(OptionType.PUT, BarrierType.OUT)
+        for name in ('delta', 'gamma', 'vega', 'theta'):
+            self.assertEqual(expected[name], greeks[name])
+
+        # down-and-out calls and puts and down-and-in calls and puts approaching the barrier 95
+        gammas = [get_barrier_greeks((0, 1, 0, 1), (1, 1, 0, 0), 95 * (1 + eps), (90, 100, 90, 100), 0.08, 0.5, 0.25, 0.04, 3, 95)['gamma']
+                  for eps in (1e-6, 1e-9, 1e-12)]
+        self.assertTrue(np.isfinite(gammas).all())
+        np.testing.assert_allclose(gammas[0], gammas[2], rtol=1e-4)
+        np.testing.assert_allclose(gammas[1], gammas[2], rtol=1e-7)
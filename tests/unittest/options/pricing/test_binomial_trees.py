@@ -1,8 +1,13 @@
 
 from unittest import TestCase
 
+import numpy as np
+
+from options.black_scholes_greeks import BlackScholesGreeks
 from options.pricing.binomial_trees import BinomialTreePricer
-from options.option import OptionType, Option
+from options.pricing.black_scholes import BlackScholesPricer
+from options.pricing.finite_difference import FiniteDifferencePricer
+from options.option import OptionType, Option, OptionBook
 
 
 class BinomialTreeTestCase(TestCase):
@@ -15,3 +20,208 @@ class BinomialTreeTestCase(TestCase):
         option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
         result = pricer.price_option(option)
         self.assertEqual(6.7781, result)
+
+    def test_debug_tree(self):
+        """The array lattice gives the same price as the tree of TreeNode objects"""
+        for otype in (OptionType.CALL, OptionType.PUT):
+            option = Option(otype, 50, 52, 0.05, 2, 0.3)
+            pricer = BinomialTreePricer(steps=200, debug=True)
+            self.assertAlmostEqual(BinomialTreePricer(steps=200).price_option(option, 10),
+                                   pricer.price_option(option, 10), 9)
+            self.assertEqual(201, len(pricer.tree))
+            self.assertEqual(50, pricer.tree[-1][0].spot)
+
+    def test_many_steps(self):
+        """The result converges to the Black-Scholes price 6.7601"""
+        pricer = BinomialTreePricer(steps=20000)
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        self.assertAlmostEqual(6.7601, pricer.price_option(option), 3)
+
+    def test_american_put(self):
+        """Hull: 5-step tree of an American put, spot 50, strike 50, risk free rate 10%,
+        5 months to expiry, volatility 40%. The price is 4.49
+        """
+        pricer = BinomialTreePricer(steps=5, american=True)
+        option = Option(OptionType.PUT, 50, 50, 0.1, 5 / 12.0, 0.4)
+        self.assertEqual(4.49, round(pricer.price_option(option), 2))
+
+        debug_pricer = BinomialTreePricer(steps=5, american=True, debug=True)
+        self.assertEqual(pricer.price_option(option, 10), debug_pricer.price_option(option, 10))
+
+    def test_american_call(self):
+        """An American call with cost of carry b >= r is never exercised early;
+        with b < r it is worth more than the European call
+        """
+        european = BinomialTreePricer(steps=200)
+        american = BinomialTreePricer(steps=200, american=True, exercise_boundary=True)
+
+        option = Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, product='stock_option')
+        self.assertEqual(european.price_option(option), american.price_option(option))
+        self.assertTrue(np.isnan(american.exercise_boundary).all())
+
+        option = Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.02)
+        self.assertGreater(american.price_option(option), european.price_option(option))
+        boundary = american.exercise_boundary
+        self.assertEqual(200, len(boundary))
+        # the boundary of a call decreases towards expiry
+        boundary = boundary[~np.isnan(boundary)]
+        self.assertTrue(np.all(boundary > 95))
+        self.assertGreater(boundary[0], boundary[-1])
+
+    def test_exercise_boundary_of_put(self):
+        pricer = BinomialTreePricer(steps=500, american=True, exercise_boundary=True)
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer.price_option(option)
+        boundary = pricer.exercise_boundary
+        self.assertEqual(500, len(boundary))
+        self.assertFalse(np.isnan(boundary[-100:]).any())
+        # the boundary of a put increases towards expiry and stays below the strike
+        boundary = boundary[~np.isnan(boundary)]
+        self.assertTrue(np.all(boundary < 52))
+        self.assertLess(boundary[0], boundary[-1])
+        self.assertGreater(boundary[-1], 50)
+
+    def test_cost_of_carry(self):
+        """European options with cost of carry converge to the generalized Black-Scholes price"""
+        pricer = BinomialTreePricer(steps=2000)
+        option = Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, product='futures_option')
+        self.assertAlmostEqual(BlackScholesPricer().price_option(option), pricer.price_option(option), delta=1e-3)
+        option = Option(OptionType.PUT, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.02)
+        self.assertAlmostEqual(BlackScholesPricer().price_option(option), pricer.price_option(option), delta=1e-3)
+
+    def test_accelerated_methods(self):
+        """Leisen-Reimer and BBS trees with Richardson extrapolation are accurate with 100 steps
+        where the CRR tree is still out by 0.02
+        """
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option')
+        reference = BlackScholesPricer().price_option(option, round_digit=None)
+
+        self.assertGreater(abs(BinomialTreePricer(100).price_option(option, 10) - reference), 1e-2)
+        self.assertAlmostEqual(reference, BinomialTreePricer(100, method='lr').price_option(option, 10), delta=1e-4)
+        self.assertAlmostEqual(reference, BinomialTreePricer(100, method='lr', richardson=True).price_option(option, 10), delta=1e-5)
+        self.assertAlmostEqual(reference, BinomialTreePricer(100, method='bbs', richardson=True).price_option(option, 10), delta=1e-4)
+
+    def test_accelerated_methods_american(self):
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        reference = BinomialTreePricer(10000, american=True).price_option(option, 10)
+        for method in BinomialTreePricer.METHODS:
+            pricer = BinomialTreePricer(200, american=True, method=method, richardson=True)
+            self.assertAlmostEqual(reference, pricer.price_option(option, 10), delta=5e-3, msg=method)
+
+    def test_leisen_reimer_debug_tree(self):
+        """Leisen-Reimer trees use an odd number of steps"""
+        option = Option(OptionType.CALL, 50, 52, 0.05, 2, 0.3)
+        pricer = BinomialTreePricer(50, method='lr', debug=True)
+        self.assertEqual(BinomialTreePricer(51, method='lr').price_option(option, 10), pricer.price_option(option, 10))
+        self.assertEqual(52, len(pricer.tree))
+
+    def test_book(self):
+        """A book of calls and puts with different parameters goes through one lattice sweep
+        and gives the same prices as pricing each option on its own
+        """
+        options = [Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3),
+                   Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, product='futures_option'),
+                   Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.02),
+                   Option(OptionType.PUT, 1.56, 1.6, 0.06, 0.5, 0.12, dividend=0.08, product='currency_option')]
+        book = OptionBook.from_options(options)
+        for american in (False, True):
+            for method in BinomialTreePricer.METHODS:
+                pricer = BinomialTreePricer(101, american=american, exercise_boundary=True, method=method, richardson=True)
+                prices = pricer.price_option(book, 10)
+                if american:
+                    boundaries = pricer.exercise_boundary
+                    self.assertEqual((4, 101), boundaries.shape)
+                for i, option in enumerate(options):
+                    self.assertAlmostEqual(pricer.price_option(option, 10), prices[i], 9)
+                    if american:
+                        np.testing.assert_allclose(pricer.exercise_boundary, boundaries[i], rtol=1e-12)
+
+    def test_book_in_chunks(self):
+        options = [Option(OptionType.PUT, 50, strike, 0.05, 2, 0.3) for strike in range(40, 60)]
+        pricer = BinomialTreePricer(100, american=True)
+        book = OptionBook.from_options(options)
+        coc = book.rate
+        np.testing.assert_allclose(pricer._price_in_chunks(book, coc, 100),
+                                   pricer._price_in_chunks(book, coc, 100, max_nodes=3 * 101), rtol=1e-14)
+
+    def test_greeks(self):
+        """Greeks from the lattice of European options converge to the closed form greeks"""
+        options = [Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option'),
+                   Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.03),
+                   Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, product='futures_option'),
+                   # b = r = 0 still moves with the rate
+                   Option(OptionType.CALL, 100, 100, 0.0, 1, 0.2, product='stock_option')]
+        for option in options:
+            expected = BlackScholesGreeks(option).get_greeks(round_digit=None)
+            for method in ('lr', 'bbs'):
+                greeks = BinomialTreePricer(501, method=method, richardson=True).get_price_and_greeks(option)
+                self.assertAlmostEqual(BlackScholesPricer().price_option(option, None), greeks['price'], delta=1e-4)
+                for name in ('delta', 'gamma', 'theta', 'vega', 'rho'):
+                    self.assertAlmostEqual(expected[name], greeks[name], delta=2e-3 * max(abs(expected[name]), 1),
+                                           msg=(method, name))
+
+            # CRR trees are less accurate, and their vega oscillates as the nodes move with the volatility
+            greeks = BinomialTreePricer(500).get_price_and_greeks(option)
+            for name in ('delta', 'gamma', 'theta', 'rho'):
+                self.assertAlmostEqual(expected[name], greeks[name], delta=1e-2 * max(abs(expected[name]), 1), msg=name)
+            self.assertAlmostEqual(expected['vega'], greeks['vega'], delta=0.02 * expected['vega'])
+
+    def test_american_greeks(self):
+        """Greeks of an American put agree with finite differences and with bump and reprice,
+        and a book gives the greeks of its options one by one
+        """
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer = BinomialTreePricer(1001, american=True, method='bbs', exercise_boundary=True)
+        greeks = pricer.get_price_and_greeks(option)
+        self.assertEqual(pricer.price_option(option, 10), round(greeks['price'], 10))
+        self.assertEqual(1001, len(pricer.exercise_boundary))
+
+        expected = FiniteDifferencePricer(800, 800, american=True).get_price_and_greeks(option)
+        for name in ('price', 'delta', 'gamma', 'theta'):
+            self.assertAlmostEqual(expected[name], greeks[name], delta=2e-3 * max(abs(expected[name]), 1), msg=name)
+        for name, bumps in (('vega', ({'vol': 0.31}, {'vol': 0.29})), ('rho', ({'rate': 0.0501}, {'rate': 0.0499}))):
+            up, down = (Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3) for _ in bumps)
+            up.overwrite(**bumps[0])
+            down.overwrite(**bumps[1])
+            bump = sum(bumps[0].values()) - sum(bumps[1].values())
+            self.assertAlmostEqual((pricer.price_option(up, 10) - pricer.price_option(down, 10)) / bump, greeks[name], 6, msg=name)
+
+        options = [option, Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.02)]
+        pricer = BinomialTreePricer(101, american=True, richardson=True, exercise_boundary=True)
+        book_greeks = pricer.get_price_and_greeks(OptionBook.from_options(options))
+        self.assertEqual((2, 101), pricer.exercise_boundary.shape)
+        for i, option in enumerate(options):
+            greeks = pricer.get_price_and_greeks(option)
+            for name, value in greeks.items():
+                self.assertAlmostEqual(value, book_greeks[name][i], 8, msg=name)
+
+    def test_sweep_steps(self):
+        """The prices of a sweep over the number of steps are the prices of one tree per number of steps,
+        inside their odd/even envelope, and the limit is closer to the Black-Scholes price than the last price
+        """
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option')
+        reference = BlackScholesPricer().price_option(option, round_digit=None)
+        steps_list = list(range(6, 60)) + [100, 201, 400]
+        for method in BinomialTreePricer.METHODS:
+            for richardson in (False, True):
+                pricer = BinomialTreePricer(method=method, richardson=richardson)
+                sweep = pricer.sweep_steps(option, steps_list)
+                expected = [BinomialTreePricer(steps, method=method, richardson=richardson).price_option(option, None)
+                            for steps in steps_list]
+                np.testing.assert_allclose(expected, sweep['price'], rtol=1e-10, atol=1e-12)
+        self.assertTrue((sweep['lower'] <= sweep['price']).all())
+        self.assertTrue((sweep['price'] <= sweep['upper']).all())
+
+        sweep = BinomialTreePricer(method='bbs').sweep_steps(option, range(6, 2001))
+        self.assertEqual(1995, len(sweep['price']))
+        self.assertLess(abs(sweep['limit'] - reference), 1e-5)
+        self.assertLess(abs(sweep['limit'] - reference), abs(sweep['price'][-1] - reference) / 10)
+        sweep = BinomialTreePricer().sweep_steps(option, range(6, 2001))
+        self.assertLess(abs(sweep['limit'] - reference), abs(sweep['price'][-1] - reference))
+
+        # American options, one tree per number of steps in the pool
+        pricer = BinomialTreePricer(american=True)
+        sweep = pricer.sweep_steps(option, range(50, 70), processes=2, chunk_size=5)
+        expected = [BinomialTreePricer(steps, american=True).price_option(option, None) for steps in range(50, 70)]
+        np.testing.assert_allclose(expected, sweep['price'], rtol=1e-12)
+        np.testing.assert_array_equal(sweep['price'], pricer.sweep_steps(option, range(50, 70))['price'])
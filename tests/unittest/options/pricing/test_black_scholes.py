@@ -1,6 +1,8 @@
 from unittest import TestCase
 
-from options.option import OptionType, Option
+import numpy as np
+
+from options.option import OptionType, Option, OptionTypeError
 from options.pricing.black_scholes import BlackScholesPricer
 
 
@@ -82,3 +84,40 @@ class BlackScholesModelTestCase(TestCase):
         option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option')
         result = self.pricer.price_option(option)
         self.assertEqual(6.7601, result)
+
+    def test_price_options(self):
+        """Price the options of the tests above in one call"""
+        types = [OptionType.CALL, OptionType.PUT, OptionType.CALL, OptionType.PUT, OptionType.CALL, OptionType.PUT]
+        spots = [60, 100, 19, 19, 1.56, 50]
+        strikes = [65, 95, 19, 19, 1.6, 52]
+        rates = [0.08, 0.1, 0.1, 0.1, 0.06, 0.05]
+        expiries = [0.25, 0.5, 0.75, 0.75, 0.5, 2]
+        vols = [0.3, 0.2, 0.28, 0.28, 0.12, 0.3]
+        dividends = [0, 0.05, 0.1, 0.1, 0.08, 0]
+        products = ['stock_option', 'stock_option_with_dividend', 'futures_option', 'futures_option',
+                    'currency_option', 'stock_option']
+
+        result = self.pricer.price_options(types, spots, strikes, rates, expiries, vols,
+                                           products=products, dividends=dividends)
+        self.assertEqual([2.1334, 2.4648, 1.7011, 1.7011, 0.0291, 6.7601], list(np.round(result, 4)))
+
+        # cost of carry given per row overrides products, nan falls back to products
+        result = self.pricer.price_options(np.array([0, 1]), [60, 50], [65, 52], [0.08, 0.05], [0.25, 2], [0.3, 0.3],
+                                           cost_of_carry=[np.nan, 0.05], products=['stock_option', 'futures_option'])
+        self.assertEqual([2.1334, 6.7601], list(np.round(result, 4)))
+
+    def test_default_cost_of_carry(self):
+        """Without cost of carry and product, b = r as in the stock option model; an explicit 0 is kept"""
+        self.assertEqual(10.4506, self.pricer.price_option(Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2)))
+        self.assertEqual(10.4506, self.pricer.price_option(Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2, product='stock_option')))
+        self.assertEqual(7.5771, self.pricer.price_option(Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2, cost_of_carry=0)))
+        with self.assertRaises(Exception):
+            self.pricer.price_option(Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2, product=None))
+
+    def test_price_options_errors(self):
+        with self.assertRaises(OptionTypeError):
+            self.pricer.price_options([2], [60], [65], [0.08], [0.25], [0.3], cost_of_carry=[0.08])
+        with self.assertRaises(Exception):
+            self.pricer.price_options([0], [60], [65], [0.08], [0.25], [0.3])
+        with self.assertRaises(Exception):
+            self.pricer.price_options([0], [60], [65], [0.08], [0.25], [0.3], products=['bond_option'])
@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.black_scholes_greeks import BlackScholesGreeks
+from options.option import OptionType, Option
+from options.pricing.barrier_options import BarrierOption, BarrierType
+from options.pricing.binomial_trees import BinomialTreePricer
+from options.pricing.black_scholes import BlackScholesPricer
+from options.pricing.finite_difference import FiniteDifferencePricer, solve_tridiagonal
+
+
+class FiniteDifferenceTestCase(TestCase):
+
+    def setUp(self):
+        self.pricer = FiniteDifferencePricer()
+
+    def test_solve_tridiagonal(self):
+        a = np.array([0, 1.0, 2, 3])
+        b = np.array([4.0, 5, 6, 7])
+        c = np.array([1.0, 1, 1, 0])
+        d = np.array([1.0, 2, 3, 4])
+        matrix = np.diag(b) + np.diag(a[1:], -1) + np.diag(c[:-1], 1)
+        np.testing.assert_allclose(np.linalg.solve(matrix, d), solve_tridiagonal(a, b, c, d))
+
+    def test_european(self):
+        """Prices and greeks agree with the Black-Scholes formula"""
+        options = [Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option'),
+                   Option(OptionType.CALL, 60, 65, 0.08, 0.25, 0.3, product='stock_option'),
+                   Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, product='futures_option'),
+                   Option(OptionType.PUT, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.02)]
+        for option in options:
+            result = self.pricer.get_price_and_greeks(option)
+            greeks = BlackScholesGreeks(option).get_greeks(None)
+            self.assertAlmostEqual(BlackScholesPricer().price_option(option, None), result['price'], delta=1e-3)
+            self.assertAlmostEqual(greeks['delta'], result['delta'], delta=1e-4)
+            self.assertAlmostEqual(greeks['gamma'], result['gamma'], delta=1e-4)
+            self.assertAlmostEqual(greeks['theta'], result['theta'], delta=1e-2)
+
+    def test_american(self):
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer = FiniteDifferencePricer(american=True)
+        reference = BinomialTreePricer(5000, american=True).price_option(option, 10)
+        self.assertAlmostEqual(reference, pricer.price_option(option, 10), delta=2e-3)
+
+        # American calls without dividends are worth the European calls
+        option = Option(OptionType.CALL, 50, 52, 0.05, 2, 0.3)
+        self.assertAlmostEqual(self.pricer.price_option(option, 10), pricer.price_option(option, 10), 6)
+
+    def test_barrier(self):
+        """Same table as test_barrier_options"""
+        values = (9.0246, 6.7924, 4.8759, 3.0, 3.0, 3.0, 2.6789, 2.3580, 2.3453,            # down-and-out call
+                  7.7627, 4.0109, 2.0576, 13.8333, 7.8494, 3.9795, 14.1112, 8.4482, 4.5910, # down-and-in  call
+                  2.2798, 2.2947, 2.6252, 3.0, 3.0, 3.0, 3.7760, 5.4932, 7.5187,            # down-and-out put
+                  2.9586, 6.5677, 11.9752, 2.2845, 5.9085, 11.6465, 1.4653, 3.3721, 7.0846, # down-and-in  put
+                  )
+        i = 0
+        for otype in (OptionType.CALL, OptionType.PUT):
+            for btype in (BarrierType.OUT, BarrierType.IN):
+                for bar in (95, 100, 105):
+                    for strike in (90, 100, 110):
+                        bo = BarrierOption(100, strike, 0.08, 0.5, 0.25, 0.04, 3, bar)
+                        self.assertAlmostEqual(values[i], self.pricer.price_barrier(bo, otype, btype), delta=1e-3)
+                        i += 1
+
+    def test_up_and_out_greeks(self):
+        """Greeks of an up-and-out call agree with finite differences of the analytic price"""
+        def price(spot):
+            return BarrierOption(spot, 100, 0.08, 0.5, 0.25, 0.04, 0, 120).get_payoff(OptionType.CALL, BarrierType.OUT)
+
+        result = self.pricer.get_barrier_price_and_greeks(BarrierOption(100, 100, 0.08, 0.5, 0.25, 0.04, 0, 120),
+                                                          OptionType.CALL, BarrierType.OUT)
+        self.assertAlmostEqual(price(100), result['price'], delta=1e-3)
+        self.assertAlmostEqual((price(100.5) - price(99.5)) / 1, result['delta'], delta=1e-3)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from options.option import OptionType, Option
+from options.pricing.binomial_trees import BinomialTreePricer
+from options.pricing.longstaff_schwartz import LongstaffSchwartzPricer
+
+
+class LongstaffSchwartzTestCase(TestCase):
+
+    def setUp(self):
+        self.t0 = time.time()
+        self.kwargs = dict(steps=25, train_num=50000, simu_num=100000, ps_num=0, seed=1)
+
+    def test_american_put(self):
+        """American put of Longstaff and Schwartz, S = 36, X = 40, r = 6%, vol = 20%, T = 1,
+        against the binomial tree; the policy is slightly suboptimal, so the price is a little low
+        """
+        option = Option(OptionType.PUT, 36, 40, 0.06, 1, 0.2)
+        expected = BinomialTreePricer(1000, american=True).price_option(option)
+        for basis in ('polynomial', 'laguerre'):
+            result = LongstaffSchwartzPricer(basis=basis, **self.kwargs).get_price_and_error(option)
+            self.assertLess(abs(result['price'] - expected), 0.03)
+            self.assertLess(result['std_error'], 0.02)
+            self.assertLess(result['conf_low'], result['price'])
+            self.assertAlmostEqual(expected, result['in_sample_price'], 1)
+
+    def test_custom_basis(self):
+        option = Option(OptionType.PUT, 40, 40, 0.06, 1, 0.2)
+        quadratic = LongstaffSchwartzPricer(basis='polynomial', degree=2, **self.kwargs).get_price_and_error(option)
+        custom = LongstaffSchwartzPricer(basis=lambda x: np.column_stack((np.ones_like(x), x, x * x)),
+                                         **self.kwargs).get_price_and_error(option)
+        self.assertEqual(quadratic, custom)
+
+    def test_memory_map(self):
+        """Training paths beyond max_memory go to a temporary memory mapped file with the same result"""
+        option = Option(OptionType.PUT, 36, 40, 0.06, 1, 0.2)
+        spill_dir = tempfile.mkdtemp()
+        try:
+            spilled = LongstaffSchwartzPricer(max_memory=1000, spill_dir=spill_dir, chunk_size=7000,
+                                              **self.kwargs).get_price_and_error(option)
+            self.assertEqual([], os.listdir(spill_dir))
+        finally:
+            os.rmdir(spill_dir)
+        self.assertEqual(LongstaffSchwartzPricer(chunk_size=7000, **self.kwargs).get_price_and_error(option), spilled)
+
+    def test_bermudan_and_intrinsic(self):
+        """A Bermudan put is worth between the European and the American put,
+        and a deep in the money put is exercised at once
+        """
+        option = Option(OptionType.PUT, 36, 40, 0.06, 1, 0.2)
+        bermudan = LongstaffSchwartzPricer(times=[0.25, 0.5, 0.75, 1], **self.kwargs).price_option(option)
+        self.assertGreater(bermudan, BinomialTreePricer(1000).price_option(option))
+        self.assertLess(bermudan, BinomialTreePricer(1000, american=True).price_option(option))
+
+        option = Option(OptionType.PUT, 20, 40, 0.06, 1, 0.2)
+        self.assertEqual(20, LongstaffSchwartzPricer(**self.kwargs).price_option(option))
+
+    def test_greeks_are_refused(self):
+        """The greeks of MonteCarloPricer are those of the European payoff"""
+        with self.assertRaises(NotImplementedError):
+            LongstaffSchwartzPricer(**self.kwargs).get_greeks(Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3))
+
+    def tearDown(self):
+        print('{} takes {} seconds'.format(self.__str__(), time.time() - self.t0))
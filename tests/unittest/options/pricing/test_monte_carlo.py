@@ -1,8 +1,12 @@
 import time
 from unittest import TestCase
 
+from options.black_scholes_greeks import BlackScholesGreeks
 from options.option import OptionType, Option
-from options.pricing.monte_carlo import MonteCarloPricer
+from options.parallel import get_pool
+from options.pricing.monte_carlo import MonteCarloPricer, RunningMoments
+
+import numpy as np
 
 
 class MonteCarloTestCase(TestCase):
@@ -28,5 +32,137 @@ class MonteCarloTestCase(TestCase):
         result = self.pricer.price_option(option)
         self.assertAlmostEqual(6.7601, result, 1)
 
+    def test_eu_call_opt_vectorized(self):
+        """Run the same test in vectorized mode with chunks smaller than simu_num
+        """
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer = MonteCarloPricer(300000, vectorized=True, chunk_size=65536, seed=1)
+        result = pricer.price_option(option)
+        self.assertAlmostEqual(6.7601, result, 1)
+        # the same seed gives the same price
+        self.assertEqual(result, pricer.price_option(option))
+
+    def test_vectorized_cost_of_carry(self):
+        """Futures option with cost of carry 0, Black-Scholes price 1.7011"""
+        option = Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, product='futures_option')
+        result = MonteCarloPricer(1000000, vectorized=True, seed=2).price_option(option)
+        self.assertAlmostEqual(1.7011, result, 2)
+
+    def test_running_moments(self):
+        """Moments merged chunk by chunk equal the moments of all samples"""
+        rng = np.random.default_rng(3)
+        x = rng.standard_normal(1000) + 1e6
+        y = 2 * x + rng.standard_normal(1000)
+        moments = RunningMoments()
+        for start in range(0, 1000, 300):
+            moments.add(y[start:start + 300], x[start:start + 300])
+        mean, std_error = moments.estimate()
+        self.assertAlmostEqual(y.mean(), mean, 6)
+        self.assertAlmostEqual(y.std(ddof=1) / np.sqrt(1000), std_error, 10)
+        beta = np.cov(x, y)[0, 1] / x.var(ddof=1)
+        mean, std_error = moments.estimate(1e6)
+        self.assertAlmostEqual(y.mean() - beta * (x.mean() - 1e6), mean, 6)
+
+    def test_error_estimate(self):
+        """The confidence interval covers the Black-Scholes price 6.7601"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        result = MonteCarloPricer(200000, seed=4, confidence=0.99).get_price_and_error(option)
+        self.assertEqual(200000, result['paths'])
+        self.assertLess(result['conf_low'], 6.7601)
+        self.assertGreater(result['conf_high'], 6.7601)
+        self.assertAlmostEqual(result['conf_high'] - result['price'], 2.5758 * result['std_error'], 3)
+        self.assertAlmostEqual(6.7601, result['price'], 1)
+
+    def test_variance_reduction(self):
+        """Antithetic variates and the spot control variate reduce the standard error"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        plain = MonteCarloPricer(200000, seed=5, vectorized=True).get_price_and_error(option)
+        antithetic = MonteCarloPricer(200000, seed=5, antithetic=True).get_price_and_error(option)
+        both = MonteCarloPricer(200000, seed=5, antithetic=True, control_variate='spot').get_price_and_error(option)
+        self.assertEqual(200000, antithetic['paths'])
+        self.assertLess(antithetic['std_error'], plain['std_error'])
+        self.assertLess(both['std_error'], antithetic['std_error'] * 0.7)
+        self.assertAlmostEqual(6.7601, both['price'], 1)
+
+        # the Black-Scholes control variate of a plain European option is the closed form price
+        result = MonteCarloPricer(10000, seed=5, control_variate='black_scholes').get_price_and_error(option)
+        self.assertAlmostEqual(6.7601, result['price'], 4)
+        self.assertLess(result['std_error'], 1e-6)
+
+    def test_early_stopping(self):
+        """Stop once the confidence interval is narrow enough, or when the time budget runs out"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        result = MonteCarloPricer(10000000, chunk_size=10000, seed=6, abs_tol=0.05).get_price_and_error(option)
+        self.assertLess(result['paths'], 10000000)
+        self.assertLessEqual(result['conf_high'] - result['price'], 0.05)
+        self.assertAlmostEqual(6.7601, result['price'], 1)
+
+        result = MonteCarloPricer(10000000, chunk_size=10000, seed=6, rel_tol=0.002,
+                                  antithetic=True, control_variate='spot').get_price_and_error(option)
+        self.assertLessEqual(result['conf_high'] - result['price'], 0.002 * result['price'])
+
+        t0 = time.time()
+        result = MonteCarloPricer(10 ** 10, chunk_size=10000, seed=6, time_budget=0.05).get_price_and_error(option)
+        self.assertLess(time.time() - t0, 1)
+        self.assertLess(result['paths'], 10 ** 10)
+
+    def test_qmc(self):
+        """Scrambled Sobol points are much more accurate than pseudo-random numbers with the same paths"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        exact = 6.760140
+        mc = MonteCarloPricer(2 ** 18, seed=7, vectorized=True).get_price_and_error(option)
+        qmc = MonteCarloPricer(2 ** 18, seed=7, qmc=True).get_price_and_error(option)
+        self.assertEqual(2 ** 18, qmc['paths'])
+        self.assertLess(qmc['std_error'] * 100, mc['std_error'])
+        self.assertAlmostEqual(exact, qmc['price'], 3)
+        self.assertLess(qmc['conf_low'], exact)
+        self.assertGreater(qmc['conf_high'], exact)
+        self.assertEqual(qmc['price'], MonteCarloPricer(2 ** 18, seed=7, qmc=True).get_price_and_error(option)['price'])
+
+        # every replication has a power of 2 paths
+        result = MonteCarloPricer(100000, seed=7, qmc=True, replications=8, antithetic=True).get_price_and_error(option)
+        self.assertEqual(8 * 2 * 4096, result['paths'])
+        self.assertAlmostEqual(exact, result['price'], 3)
+
+    def test_mp_reproducible(self):
+        """With a seed, the price doesn't depend on the number of worker processes, and the pool is reused"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer = MonteCarloPricer(300000, 4, chunk_size=30000, seed=8)
+        result = pricer.get_price_and_error(option)
+        self.assertEqual(300000, result['paths'])
+        self.assertAlmostEqual(6.7601, result['price'], 1)
+        pool = get_pool(4)
+        self.assertEqual(result, pricer.get_price_and_error(option))
+        self.assertIs(pool, get_pool(4))
+        self.assertEqual(result, MonteCarloPricer(300000, 3, chunk_size=30000, seed=8).get_price_and_error(option))
+        self.assertEqual(result, MonteCarloPricer(300000, chunk_size=30000, seed=8, vectorized=True).get_price_and_error(option))
+
+        # chunks have independent streams
+        result = MonteCarloPricer(300000, 4, chunk_size=30000, seed=9).get_price_and_error(option)
+        self.assertLess(abs(result['price'] - 6.7601), 4 * result['std_error'])
+
+    def test_greeks(self):
+        """Pathwise and likelihood ratio greeks of one simulation pass agree with the closed form greeks
+        within 4 standard errors, and the pathwise estimators have the smaller errors
+        """
+        for option in (Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3, product='stock_option'),
+                       Option(OptionType.CALL, 100, 95, 0.08, 0.5, 0.25, cost_of_carry=0.03)):
+            expected = BlackScholesGreeks(option).get_greeks(round_digit=None)
+            expected['price'] = MonteCarloPricer(10000, control_variate='black_scholes').get_price_and_error(option)['price']
+            errors = {}
+            for method in ('pathwise', 'likelihood_ratio'):
+                greeks, errors[method] = MonteCarloPricer(200000, 0, seed=10, antithetic=True).get_greeks(option, method)
+                for name in MonteCarloPricer.GREEKS:
+                    self.assertLess(abs(greeks[name] - expected[name]), 4 * errors[method][name], (method, name))
+            for name in ('delta', 'gamma', 'vega'):
+                self.assertLess(errors['pathwise'][name], errors['likelihood_ratio'][name])
+
+        # the same pass in the worker pool, which receives the method with every chunk
+        for method in ('pathwise', 'likelihood_ratio'):
+            pricer = MonteCarloPricer(100000, 2, seed=11, chunk_size=30000)
+            self.assertEqual(MonteCarloPricer(100000, 0, seed=11, chunk_size=30000).get_greeks(option, method),
+                             pricer.get_greeks(option, method))
+            self.assertFalse(hasattr(pricer, 'greek_method'))
+
     def tearDown(self):
         print('{} takes {} seconds'.format(self.__str__(), time.time() - self.t0))
@@ -0,0 +1,91 @@
+import time
+from math import log, sqrt
+from unittest import TestCase
+
+import numpy as np
+
+from options.functions import cdf
+from options.option import OptionType
+from options.pricing.black_scholes import BlackScholesPricer
+from options.pricing.multi_asset import MultiAssetOption, MultiAssetPricer, get_correlation_factor
+
+
+class MultiAssetTestCase(TestCase):
+
+    def setUp(self):
+        self.t0 = time.time()
+        self.kwargs = dict(simu_num=200000, ps_num=0, seed=1)
+        self.correlation = [[1, 0.5], [0.5, 1]]
+
+    def assertWithinError(self, expected, result, errors=4):
+        self.assertLess(abs(result['price'] - expected), errors * result['std_error'])
+
+    def test_exchange_option(self):
+        """A spread option with strike 0 is Margrabe's option to exchange asset 2 for asset 1"""
+        option = MultiAssetOption(OptionType.CALL, [100, 95], 0, 0.05, 1, [0.3, 0.2], self.correlation)
+        vol = sqrt(0.3**2 + 0.2**2 - 2 * 0.5 * 0.3 * 0.2)
+        d1 = (log(100 / 95.) + vol**2 / 2) / vol
+        expected = 100 * cdf(d1) - 95 * cdf(d1 - vol)
+        self.assertWithinError(expected, MultiAssetPricer('spread', **self.kwargs).get_price_and_error(option))
+
+    def test_best_and_worst_of(self):
+        """A call on the max plus a call on the min is a call on each asset, path by path"""
+        option = MultiAssetOption(OptionType.CALL, [100, 105], 100, 0.05, 1, [0.3, 0.2], self.correlation)
+        best = MultiAssetPricer('best_of', **self.kwargs).get_price_and_error(option)
+        worst = MultiAssetPricer('worst_of', **self.kwargs).get_price_and_error(option)
+        calls = [BlackScholesPricer().price_options(OptionType.CALL, spot, 100, 0.05, 1, vol, 0.05)
+                 for spot, vol in ((100, 0.3), (105, 0.2))]
+        self.assertLess(abs(best['price'] + worst['price'] - sum(calls)), 4 * (best['std_error'] + worst['std_error']))
+        self.assertGreater(best['price'], max(calls))
+        self.assertLess(worst['price'], min(calls))
+
+    def test_single_asset_basket(self):
+        """A basket of one asset is the Black-Scholes option, 2-year put price 6.7601"""
+        option = MultiAssetOption(OptionType.PUT, [50], 52, 0.05, 2, [0.3], [[1]], weights=[1])
+        self.assertWithinError(6.7601, MultiAssetPricer(**self.kwargs).get_price_and_error(option))
+        result = MultiAssetPricer(control_variate='black_scholes', **self.kwargs).get_price_and_error(option)
+        self.assertAlmostEqual(6.7601, result['price'], 4)
+
+    def test_large_basket(self):
+        """A basket of 100 assets: the control variates reduce the error and agree with each other"""
+        n = 100
+        rng = np.random.default_rng(0)
+        correlation = np.full((n, n), 0.3)
+        np.fill_diagonal(correlation, 1)
+        option = MultiAssetOption(OptionType.CALL, rng.uniform(90, 110, n), 100, 0.05, 1, rng.uniform(0.1, 0.4, n), correlation)
+        kwargs = dict(self.kwargs, simu_num=50000, chunk_size=20000)
+        plain = MultiAssetPricer(**kwargs).get_price_and_error(option)
+        spot = MultiAssetPricer(control_variate='spot', antithetic=True, **kwargs).get_price_and_error(option)
+        geometric = MultiAssetPricer(control_variate='black_scholes', **kwargs).get_price_and_error(option)
+        self.assertLess(geometric['std_error'] * 5, plain['std_error'])
+        self.assertLess(spot['std_error'] * 2, plain['std_error'])
+        self.assertWithinError(geometric['price'], plain)
+        self.assertWithinError(geometric['price'], spot)
+        # the same seed in a pool of processes
+        self.assertEqual(plain, MultiAssetPricer(**dict(kwargs, ps_num=2)).get_price_and_error(option))
+
+    def test_correlation_factor(self):
+        correlation = np.array([[1, 0.3, 0.2], [0.3, 1, -0.4], [0.2, -0.4, 1]])
+        for method in ('cholesky', 'eigen'):
+            factor = get_correlation_factor(correlation, method)
+            np.testing.assert_allclose(correlation, factor @ factor.T, atol=1e-12)
+
+        # not positive semi-definite: Cholesky fails, the eigen decomposition repairs it
+        invalid = np.array([[1, 0.9, -0.9], [0.9, 1, 0.9], [-0.9, 0.9, 1]])
+        self.assertRaises(np.linalg.LinAlgError, get_correlation_factor, invalid)
+        repaired = get_correlation_factor(invalid, 'eigen')
+        repaired = repaired @ repaired.T
+        np.testing.assert_allclose(np.ones(3), np.diag(repaired))
+        self.assertGreater(np.linalg.eigvalsh(repaired).min(), -1e-12)
+
+        option = MultiAssetOption(OptionType.CALL, [100, 100, 100], 100, 0.05, 1, 0.2, invalid)
+        self.assertGreater(MultiAssetPricer('best_of', factorization='eigen', **self.kwargs).price_option(option), 0)
+
+    def test_greeks_are_refused(self):
+        """The greeks of MonteCarloPricer are those of a single asset European payoff"""
+        option = MultiAssetOption(OptionType.CALL, [100, 105], 100, 0.05, 1, [0.3, 0.2], self.correlation)
+        with self.assertRaises(NotImplementedError):
+            MultiAssetPricer('basket', **self.kwargs).get_greeks(option)
+
+    def tearDown(self):
+        print('{} takes {} seconds'.format(self.__str__(), time.time() - self.t0))
@@ -0,0 +1,118 @@
+import time
+from math import exp, sqrt
+from unittest import TestCase
+
+from options.functions import cdf
+from options.option import OptionType, Option
+from options.pricing.barrier_options import BarrierOption, BarrierType
+from options.pricing.path_dependent import PathDependentPricer
+
+
+def floating_lookback_call(spot, rate, coc, vol, expiry):
+    """Goldman, Sosin and Gatto floating strike lookback call, with the minimum so far equal to spot"""
+    a1 = (coc + vol**2 / 2) * sqrt(expiry) / vol
+    return (spot * exp((coc - rate) * expiry) * cdf(a1) - spot * exp(- rate * expiry) * cdf(a1 - vol * sqrt(expiry)) +
+            spot * exp(- rate * expiry) * vol**2 / (2 * coc) *
+            (cdf(-a1 + 2 * coc / vol * sqrt(expiry)) - exp(coc * expiry) * cdf(-a1)))
+
+
+class PathDependentTestCase(TestCase):
+
+    def setUp(self):
+        self.t0 = time.time()
+        self.kwargs = dict(simu_num=200000, ps_num=0, seed=1)
+
+    def assertWithinError(self, expected, result, errors=4):
+        self.assertLess(abs(result['price'] - expected), errors * result['std_error'])
+
+    def test_continuous_barrier(self):
+        """Brownian bridge correction gives the closed form prices of continuously monitored barriers
+        S = 100, X = 90, H = 95, r = 8%, b = 4%, vol = 25%, T = 0.5, rebate = 3
+        """
+        option = Option(OptionType.CALL, 100, 90, 0.08, 0.5, 0.25, cost_of_carry=0.04)
+        closed_form = BarrierOption(100, 90, 0.08, 0.5, 0.25, 0.04, 3, 95)
+        for bar_type in (BarrierType.OUT, BarrierType.IN):
+            pricer = PathDependentPricer('barrier', steps=25, barrier=95, bar_type=bar_type, rebate=3,
+                                         continuous=True, **self.kwargs)
+            self.assertWithinError(closed_form.get_payoff(OptionType.CALL, bar_type), pricer.get_price_and_error(option))
+
+        option = Option(OptionType.PUT, 100, 100, 0.08, 0.5, 0.25, cost_of_carry=0.04)
+        closed_form = BarrierOption(100, 100, 0.08, 0.5, 0.25, 0.04, 3, 105)
+        pricer = PathDependentPricer('barrier', steps=25, barrier=105, rebate=3, continuous=True, **self.kwargs)
+        self.assertWithinError(closed_form.get_payoff(OptionType.PUT, BarrierType.OUT), pricer.get_price_and_error(option))
+
+    def test_discrete_barrier(self):
+        """A discretely monitored barrier is close to the continuous one shifted away by
+        exp(0.5826 * vol * sqrt(dt)) (Broadie, Glasserman and Kou)
+        """
+        option = Option(OptionType.CALL, 100, 90, 0.08, 0.5, 0.25, cost_of_carry=0.04)
+        shifted = 95 * exp(-0.5826 * 0.25 * sqrt(0.5 / 25))
+        closed_form = BarrierOption(100, 90, 0.08, 0.5, 0.25, 0.04, 0, shifted).get_payoff(OptionType.CALL, BarrierType.OUT)
+        result = PathDependentPricer('barrier', steps=25, barrier=95, **self.kwargs).get_price_and_error(option)
+        self.assertWithinError(closed_form, result)
+        # fewer paths are knocked out than with continuous monitoring
+        continuous = BarrierOption(100, 90, 0.08, 0.5, 0.25, 0.04, 0, 95).get_payoff(OptionType.CALL, BarrierType.OUT)
+        self.assertGreater(result['price'], continuous + 0.5)
+
+    def test_lookback(self):
+        """Continuously monitored floating strike lookback call against its closed form,
+        the discretely monitored one is cheaper
+        """
+        option = Option(OptionType.CALL, 100, 100, 0.1, 0.5, 0.3)
+        expected = floating_lookback_call(100, 0.1, 0.1, 0.3, 0.5)
+        result = PathDependentPricer('lookback', steps=25, continuous=True, **self.kwargs).get_price_and_error(option)
+        self.assertWithinError(expected, result)
+        discrete = PathDependentPricer('lookback', steps=25, **self.kwargs).get_price_and_error(option)
+        self.assertLess(discrete['price'], result['price'] - 1)
+
+        # fixed strike lookback call at the money is the floating strike lookback put by symmetry with b = r
+        option = Option(OptionType.CALL, 100, 100, 0.1, 0.5, 0.3)
+        fixed = PathDependentPricer('fixed_lookback', steps=25, **self.kwargs).get_price_and_error(option)
+        self.assertGreater(fixed['price'], discrete['price'])
+
+    def test_asian(self):
+        """One monitoring date is the European option, Black-Scholes price 6.7601;
+        averaging is cheaper and the European control variate reduces the error
+        """
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        self.assertWithinError(6.7601, PathDependentPricer('asian', steps=1, **self.kwargs).get_price_and_error(option))
+        plain = PathDependentPricer('asian', steps=24, **self.kwargs).get_price_and_error(option)
+        controlled = PathDependentPricer('asian', steps=24, control_variate='black_scholes',
+                                         antithetic=True, **self.kwargs).get_price_and_error(option)
+        self.assertLess(plain['price'], 6.7601 - 1)
+        self.assertLess(controlled['std_error'], plain['std_error'] * 0.7)
+        self.assertLess(abs(plain['price'] - controlled['price']), 4 * plain['std_error'])
+
+    def test_qmc(self):
+        """Sobol paths built by the Brownian bridge agree with pseudo-random paths at a smaller error"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        plain = PathDependentPricer('asian', steps=24, **self.kwargs).get_price_and_error(option)
+        qmc = PathDependentPricer('asian', steps=24, qmc=True, **self.kwargs).get_price_and_error(option)
+        self.assertLess(abs(plain['price'] - qmc['price']), 4 * plain['std_error'])
+        self.assertLess(qmc['std_error'], plain['std_error'] / 3)
+        self.assertEqual(16 * 8192, qmc['paths'])
+
+        # one monitoring date is the European option
+        self.assertWithinError(6.7601, PathDependentPricer('asian', steps=1, qmc=True, **self.kwargs).get_price_and_error(option))
+
+        option = Option(OptionType.CALL, 100, 100, 0.1, 0.5, 0.3)
+        expected = floating_lookback_call(100, 0.1, 0.1, 0.3, 0.5)
+        result = PathDependentPricer('lookback', steps=25, continuous=True, qmc=True, **self.kwargs).get_price_and_error(option)
+        self.assertWithinError(expected, result)
+
+    def test_times_and_rounding(self):
+        """Explicit monitoring dates, and the rounded price of price_option"""
+        option = Option(OptionType.PUT, 50, 52, 0.05, 2, 0.3)
+        pricer = PathDependentPricer('asian', times=[0.5, 1, 1.5, 2], **self.kwargs)
+        price = pricer.price_option(option)
+        self.assertEqual(round(price, 4), price)
+        self.assertEqual(price, round(PathDependentPricer('asian', steps=4, **self.kwargs).get_price_and_error(option)['price'], 4))
+
+    def test_greeks_are_refused(self):
+        """The greeks of MonteCarloPricer are those of the European payoff"""
+        option = Option(OptionType.PUT, 100, 100, 0.05, 1, 0.2)
+        with self.assertRaises(NotImplementedError):
+            PathDependentPricer('barrier', barrier=80, **self.kwargs).get_greeks(option)
+
+    def tearDown(self):
+        print('{} takes {} seconds'.format(self.__str__(), time.time() - self.t0))
@@ -1,7 +1,7 @@
 from unittest import TestCase
 
-from options.black_scholes_greeks import BlackScholesGreeks
-from options.option import OptionType, Option
+from options.black_scholes_greeks import BlackScholesGreeks, GREEKS
+from options.option import OptionType, Option, OptionBook
 from options.pricing.black_scholes import BlackScholesPricer
 
 
@@ -53,3 +53,80 @@ class BlackScholesGreeksTestCase(TestCase):
                                3)
         self.assertEqual(round(opt_price - 1.1273, 4),
                          pricer.price_option(Option(OptionType.CALL, 89, 40, 0.03, 2, 0.2, cost_of_carry=0.09)))
+
+    def test_greeks(self):
+        """
+        Q:  gamma of a 9 month stock option, stock price 55, strike 60, r = b = 10%, volatility 30%
+            theta of a 1 month index put, index 430, strike 405, r = 7%, dividend yield 5%, volatility 20%
+            rho of a 1 year stock call, stock price 72, strike 75, r = b = 9%, volatility 19%
+        A:
+            gamma = 0.0278, theta = -31.1924, rho = 38.7325
+        """
+        greeks = BlackScholesGreeks(Option(OptionType.CALL, 55, 60, 0.1, 0.75, 0.3, product='stock_option')).get_greeks()
+        self.assertEqual(0.0278, greeks['gamma'])
+        greeks = BlackScholesGreeks(Option(OptionType.PUT, 430, 405, 0.07, 0.0833, 0.2, cost_of_carry=0.02)).get_greeks()
+        self.assertEqual(-31.1924, greeks['theta'])
+        greeks = BlackScholesGreeks(Option(OptionType.CALL, 72, 75, 0.09, 1, 0.19, product='stock_option')).get_greeks()
+        self.assertEqual(38.7325, greeks['rho'])
+
+        greeks = BlackScholesGreeks(Option(OptionType.PUT, 105, 100, 0.1, 0.5, 0.36, product='futures_option')).get_greeks()
+        self.assertEqual(sorted(GREEKS), sorted(greeks))
+        self.assertEqual(-0.3566, greeks['delta'])
+
+    def test_greeks_match_finite_differences(self):
+        pricer = BlackScholesPricer()
+
+        def price(otype, spot=100, rate=0.05, expiry=0.8, vol=0.25, coc=0.02, product=''):
+            return pricer.price_option(Option(otype, spot, 95, rate, expiry, vol, cost_of_carry=coc, product=product),
+                                       round_digit=None)
+
+        h = 1e-4
+        for otype in (OptionType.CALL, OptionType.PUT):
+            # b = r - q moves with r; the futures option model keeps b = 0
+            for coc, product, coc_bump in ((0.02, '', h), (0, 'futures_option', 0)):
+                def greeks_at(vol):
+                    return BlackScholesGreeks(Option(otype, 100, 95, 0.05, 0.8, vol, cost_of_carry=coc,
+                                                     product=product)).get_greeks(None)
+                greeks = greeks_at(0.25)
+                numerical = {
+                    'delta': (price(otype, spot=100 + h, coc=coc, product=product) -
+                              price(otype, spot=100 - h, coc=coc, product=product)) / (2 * h),
+                    'gamma': (price(otype, spot=100 + 1e-2, coc=coc, product=product) - 2 * price(otype, coc=coc, product=product) +
+                              price(otype, spot=100 - 1e-2, coc=coc, product=product)) / 1e-4,
+                    'vega': (price(otype, vol=0.25 + h, coc=coc, product=product) -
+                             price(otype, vol=0.25 - h, coc=coc, product=product)) / (2 * h),
+                    'theta': -(price(otype, expiry=0.8 + h, coc=coc, product=product) -
+                               price(otype, expiry=0.8 - h, coc=coc, product=product)) / (2 * h),
+                    'rho': (price(otype, rate=0.05 + h, coc=coc + coc_bump, product=product) -
+                            price(otype, rate=0.05 - h, coc=coc - coc_bump, product=product)) / (2 * h),
+                    'vanna': (greeks_at(0.25 + h)['delta'] - greeks_at(0.25 - h)['delta']) / (2 * h),
+                    'volga': (price(otype, vol=0.25 + 2e-4, coc=coc, product=product) - 2 * price(otype, coc=coc, product=product) +
+                              price(otype, vol=0.25 - 2e-4, coc=coc, product=product)) / 4e-8,
+                }
+                for name in GREEKS:
+                    self.assertAlmostEqual(numerical[name], greeks[name], 4, msg=name)
+
+    def test_rho_at_zero_rate(self):
+        """A stock option at r = 0 has b = 0, but its b still moves with r"""
+        pricer = BlackScholesPricer()
+        h = 1e-4
+        for otype in (OptionType.CALL, OptionType.PUT):
+            option = Option(otype, 100, 100, 0.0, 1, 0.2, product='stock_option')
+            numerical = (pricer.price_option(Option(otype, 100, 100, h, 1, 0.2, product='stock_option'), round_digit=None) -
+                         pricer.price_option(Option(otype, 100, 100, -h, 1, 0.2, product='stock_option'), round_digit=None)) / (2 * h)
+            self.assertAlmostEqual(numerical, BlackScholesGreeks(option).get_greeks(None)['rho'], 4)
+            batch = BlackScholesGreeks(OptionBook.from_options([option])).get_greeks(None)
+            self.assertAlmostEqual(numerical, batch['rho'][0], 4)
+        self.assertEqual(46.0172, BlackScholesGreeks(Option(OptionType.CALL, 100, 100, 0.0, 1, 0.2,
+                                                            product='stock_option')).get_greeks()['rho'])
+
+    def test_greeks_batch(self):
+        options = [Option(OptionType.CALL, 105, 100, 0.1, 0.5, 0.36, product='futures_option'),
+                   Option(OptionType.PUT, 105, 100, 0.1, 0.5, 0.36, product='futures_option'),
+                   Option(OptionType.CALL, 90, 40, 0.03, 2, 0.2, cost_of_carry=0.09),
+                   Option(OptionType.PUT, 430, 405, 0.07, 0.0833, 0.2, cost_of_carry=0.02)]
+        batch = BlackScholesGreeks(OptionBook.from_options(options)).get_greeks()
+        for i, option in enumerate(options):
+            greeks = BlackScholesGreeks(option).get_greeks()
+            for name in GREEKS:
+                self.assertEqual(greeks[name], batch[name][i])
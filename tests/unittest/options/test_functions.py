@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.functions import cdf, cdf_array, norminv, norminv_array
+
+
+class FunctionsTestCase(TestCase):
+
+    def test_cdf_array_matches_cdf(self):
+        """Cover the central region, the continued fraction region (|x| >= 7.07) and beyond 37"""
+        xs = np.concatenate([np.linspace(-40, 40, 2001), [0, 7.07106781186547, -7.07106781186547, 37, -37]])
+        result = cdf_array(xs)
+        self.assertEqual(xs.shape, result.shape)
+        np.testing.assert_allclose(result, [cdf(x) for x in xs], rtol=1e-13, atol=0)
+
+    def test_cdf_array_keeps_shape(self):
+        xs = np.linspace(-3, 3, 12).reshape(3, 4)
+        result = cdf_array(xs)
+        self.assertEqual((3, 4), result.shape)
+        self.assertAlmostEqual(cdf(xs[1, 2]), result[1, 2], 14)
+        self.assertAlmostEqual(cdf(0.3), cdf_array(0.3), 14)
+
+    def test_norminv_array_matches_norminv(self):
+        """Cover the lower tail, the central region and the upper tail"""
+        ps = np.concatenate([np.linspace(1e-10, 0.05, 500), np.linspace(0.05, 0.95, 500), 1 - np.linspace(1e-10, 0.05, 500)])
+        result = norminv_array(ps)
+        np.testing.assert_allclose(result, [norminv(p) for p in ps], rtol=1e-13, atol=0)
+
+        self.assertEqual((2, 2), norminv_array([[0.01, 0.5], [0.7, 0.99]]).shape)
+
+    def test_norminv_array_out_of_range(self):
+        with self.assertRaises(ValueError):
+            norminv_array([0.5, 0])
+        with self.assertRaises(ValueError):
+            norminv_array([[0.5], [1.2]])
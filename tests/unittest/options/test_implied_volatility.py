@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.implied_volatility import ImpliedVolatilitySolver, ImpliedVolatilityStatus
+from options.option import Option, OptionBook, OptionType
+from options.pricing.black_scholes import BlackScholesPricer
+
+
+class ImpliedVolatilityTestCase(TestCase):
+
+    def setUp(self):
+        self.solver = ImpliedVolatilitySolver()
+        self.pricer = BlackScholesPricer()
+
+    def test_round_trip_chain(self):
+        """Price a chain of calls and puts over strikes and expiries, then recover the volatilities"""
+        strikes, expiries = np.meshgrid(np.linspace(70, 140, 15), [0.1, 0.25, 1, 3])
+        strikes, expiries = strikes.ravel(), expiries.ravel()
+        vols = 0.2 + 0.3 * (strikes / 100 - 1) ** 2
+        for otype in (OptionType.CALL, OptionType.PUT):
+            for coc in (0.05, 0.01, 0):
+                prices = self.pricer.price_options(np.full(len(strikes), otype.value), 100, strikes, 0.05, expiries, vols, coc)
+                result, status, iterations = self.solver.solve(prices, otype.value, 100, strikes, 0.05, expiries, coc)
+                self.assertTrue(np.all(status == ImpliedVolatilityStatus.CONVERGED))
+                np.testing.assert_allclose(result, vols, atol=1e-8)
+                self.assertLessEqual(iterations.max(), 10)
+
+    def test_book(self):
+        option = Option(OptionType.CALL, 60, 65, 0.08, 0.25, 0.3, product='stock_option')
+        book = OptionBook.from_options([option, option])
+        vols, status, _ = self.solver.solve_book([2.1334, 2.1334], book)
+        self.assertEqual([0.3, 0.3], list(np.round(vols, 4)))
+
+    def test_out_of_bounds(self):
+        """A call is worth more than its discounted intrinsic value and less than the discounted forward"""
+        vols, status, iterations = self.solver.solve([0.5, 9, 5], [OptionType.CALL] * 3, 100, [95, 90, 100], 0, 1, 0)
+        self.assertEqual([ImpliedVolatilityStatus.BELOW_LOWER_BOUND, ImpliedVolatilityStatus.BELOW_LOWER_BOUND,
+                          ImpliedVolatilityStatus.CONVERGED], list(status))
+        self.assertTrue(np.isnan(vols[:2]).all())
+        self.assertEqual(0, iterations[0])
+
+        vols, status, _ = self.solver.solve([101], [OptionType.CALL], 100, 95, 0, 1, 0)
+        self.assertEqual(ImpliedVolatilityStatus.ABOVE_UPPER_BOUND, status[0])
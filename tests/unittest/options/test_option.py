@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.option import Option, OptionBook, OptionType, resolve_cost_of_carry
+from options.pricing.binomial_trees import BinomialTreePricer
+from options.pricing.black_scholes import BlackScholesPricer
+from options.pricing.finite_difference import FiniteDifferencePricer
+from options.pricing.monte_carlo import MonteCarloPricer
+
+
+class OptionBookTestCase(TestCase):
+
+    def setUp(self):
+        self.options = [Option(OptionType.CALL, 60, 65, 0.08, 0.25, 0.3, product='stock_option'),
+                        Option(OptionType.PUT, 100, 95, 0.1, 0.5, 0.2, dividend=0.05, product='stock_option_with_dividend'),
+                        Option(OptionType.CALL, 19, 19, 0.1, 0.75, 0.28, dividend=0.1, product='futures_option'),
+                        Option(OptionType.CALL, 90, 40, 0.03, 2, 0.2, cost_of_carry=0.09),
+                        ]
+        self.book = OptionBook.from_options(self.options)
+
+    def test_option_has_no_dict(self):
+        self.assertFalse(hasattr(self.options[0], '__dict__'))
+
+    def test_columns(self):
+        self.assertEqual(4, len(self.book))
+        self.assertEqual([0, 1, 0, 0], list(self.book.type))
+        self.assertEqual([1, 2, 3, 0], list(self.book.product))
+        self.assertEqual([0.08, 0.05, 0, 0.09], list(self.book.cost_of_carry))
+        self.assertTrue(self.book.spot.flags['C_CONTIGUOUS'])
+
+    def test_cost_of_carry_from_product(self):
+        book = OptionBook([OptionType.PUT, OptionType.CALL], [100, 1.56], [95, 1.6], [0.1, 0.06], 0.5, [0.2, 0.12],
+                          dividend=[0.05, 0.08], product=['stock_option_with_dividend', 'currency_option'])
+        self.assertEqual([0.1 - 0.05, 0.06 - 0.08], list(book.cost_of_carry))
+        self.assertEqual([0.5, 0.5], list(book.expiry))
+
+    def test_round_trip(self):
+        for option, converted in zip(self.options, self.book.to_options()):
+            for name in OptionBook.COLUMNS:
+                self.assertEqual(getattr(option, name), getattr(converted, name))
+        self.assertEqual(OptionType.PUT, self.book[1].type)
+
+    def test_slicing_is_zero_copy(self):
+        part = self.book[1:3]
+        self.assertEqual(2, len(part))
+        self.assertTrue(np.shares_memory(part.spot, self.book.spot))
+        part.spot[0] = 101
+        self.assertEqual(101, self.book.spot[1])
+
+    def test_filtering(self):
+        calls = self.book[self.book.type == OptionType.CALL.value]
+        self.assertEqual([60, 19, 90], list(calls.spot))
+        self.assertEqual([90, 60], list(self.book[[3, 0]].spot))
+
+    def test_pricers_accept_book(self):
+        self.assertEqual([2.1334, 2.4648, 1.7011], list(BlackScholesPricer().price_option(self.book[:3])))
+        self.assertEqual([BinomialTreePricer(50).price_option(option) for option in self.options],
+                         list(BinomialTreePricer(50).price_option(self.book)))
+
+    def test_unset_cost_of_carry(self):
+        book = OptionBook.from_options([Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2),
+                                        Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2, cost_of_carry=0)])
+        self.assertTrue(np.isnan(book.cost_of_carry[0]))
+        self.assertEqual([None, 0], [option.cost_of_carry for option in book.to_options()])
+        self.assertEqual([0.05, 0], list(resolve_cost_of_carry(book.cost_of_carry, book.rate)))
+
+    def test_pricers_share_the_cost_of_carry_rule(self):
+        # an explicit b = 0 is kept and an unset b is the rate, whichever the pricer
+        for coc, expected in ((0, 7.5771), (None, 10.4506)):
+            option = Option(OptionType.CALL, 100, 100, 0.05, 1, 0.2, cost_of_carry=coc)
+            self.assertEqual(expected, BlackScholesPricer().price_option(option))
+            self.assertAlmostEqual(expected, BinomialTreePricer(500).price_option(option), 2)
+            self.assertAlmostEqual(expected, FiniteDifferencePricer().price_option(option), 2)
+            self.assertAlmostEqual(expected, MonteCarloPricer(1000000, 0, vectorized=True, seed=1).price_option(option), 1)
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.option import OptionBook
+from options.parallel import parallel_map, parallel_price
+from options.pricing.binomial_trees import BinomialTreePricer
+
+
+def sum_and_product(a, b):
+    return np.stack([a + b, a * b], axis=1)
+
+
+class ParallelTestCase(TestCase):
+
+    def test_parallel_map(self):
+        """Results come back in the order of the rows, in the calling process or in a pool"""
+        a = np.arange(1000.)
+        b = np.arange(1000) % 7
+        expected = sum_and_product(a, b)
+        for processes, chunk_size in ((0, None), (0, 33), (2, None), (3, 33)):
+            result = parallel_map(sum_and_product, [a, b], out_shape=(2,), processes=processes, chunk_size=chunk_size)
+            np.testing.assert_array_equal(expected, result)
+
+    def test_parallel_price(self):
+        """Slices of a book priced by a pool of processes give the same prices as the whole book"""
+        rng = np.random.default_rng(0)
+        n = 50
+        book = OptionBook(rng.choice([1, -1], n), rng.uniform(80, 120, n), 100, 0.05,
+                          rng.uniform(0.1, 2, n), rng.uniform(0.1, 0.5, n), product='stock_option')
+        pricer = BinomialTreePricer(100, american=True)
+        np.testing.assert_array_equal(pricer.price_option(book, round_digit=6),
+                                      parallel_price(pricer, book, processes=2, chunk_size=7, round_digit=6))
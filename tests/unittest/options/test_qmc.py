@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+import numpy as np
+
+from options.qmc import BrownianBridge, SobolSequence, MAX_DIM
+
+
+class SobolSequenceTestCase(TestCase):
+
+    def test_unscrambled_points(self):
+        """The first points of the first three dimensions of the Sobol sequence"""
+        points = SobolSequence(3, scramble=False).random_integers(8) / 2. ** 32
+        expected = [[0, 0, 0], [.5, .5, .5], [.75, .25, .25], [.25, .75, .75],
+                    [.375, .375, .625], [.875, .875, .125], [.625, .125, .875], [.125, .625, .375]]
+        np.testing.assert_array_equal(expected, points)
+
+    def test_continuation(self):
+        """Drawing the points in pieces gives the same sequence as drawing them at once"""
+        sobol = SobolSequence(MAX_DIM, seed=1)
+        pieces = np.vstack([sobol.random(100), sobol.random(1), sobol.random(923)])
+        np.testing.assert_array_equal(SobolSequence(MAX_DIM, seed=1).random(1024), pieces)
+
+    def test_scrambled_stratification(self):
+        """Every dimension of 2**k scrambled points has exactly one point in each of the 2**k cells,
+        and every pair of the first dimensions one point in each of the 4**(k/2) squares"""
+        k = 12
+        points = SobolSequence(8, seed=2).random(2 ** k)
+        self.assertTrue(((points > 0) & (points < 1)).all())
+        for j in range(8):
+            self.assertEqual(2 ** k, len(np.unique(np.floor(points[:, j] * 2 ** k))))
+        cells = np.floor(points[:, :2] * 2 ** (k // 2))
+        self.assertEqual(2 ** k, len(np.unique(cells[:, 0] * 2 ** k + cells[:, 1])))
+
+    def test_seed(self):
+        np.testing.assert_array_equal(SobolSequence(4, seed=3).random(16), SobolSequence(4, seed=3).random(16))
+        self.assertFalse(np.array_equal(SobolSequence(4, seed=3).random(16), SobolSequence(4, seed=4).random(16)))
+
+
+class BrownianBridgeTestCase(TestCase):
+
+    def test_covariance(self):
+        """The bridge gives Brownian motion: cov(W(s), W(t)) = min(s, t), and W(T) = sqrt(T) * z0"""
+        times = np.array([0.1, 0.25, 0.5, 0.6, 1.0, 1.3, 2.0])
+        normals = np.random.default_rng(5).standard_normal((200000, len(times)))
+        paths = BrownianBridge(times).build(normals)
+        np.testing.assert_allclose(np.minimum.outer(times, times), np.cov(paths.T), atol=0.02)
+        np.testing.assert_allclose(np.sqrt(2) * normals[:, 0], paths[:, -1])
+
+    def test_single_step(self):
+        paths = BrownianBridge([0.5]).build(np.array([[1.], [-2.]]))
+        np.testing.assert_allclose([[np.sqrt(0.5)], [-2 * np.sqrt(0.5)]], paths)
@@ -0,0 +1,46 @@
+import os
+from unittest import TestCase, mock
+
+os.environ.setdefault('PLOT_CACHE_WARM_UP', '0')
+
+import matplotlib.pyplot as plt
+
+import run
+from options.plotting.cache import PlotCache
+
+
+def get_line_plot():
+    fig = plt.figure(figsize=(1, 1))
+    plt.plot([0, 1], [0, 1])
+    return fig
+
+
+class PlottingTestCase(TestCase):
+
+    def setUp(self):
+        self.client = run.app.test_client()
+        self.patches = [mock.patch.dict(run.PLOTS, {'line': get_line_plot}),
+                        mock.patch.object(run, 'plot_cache', PlotCache())]
+        for patch in self.patches:
+            patch.start()
+
+    def test_plot_and_revalidation(self):
+        response = self.client.get('/plotting?view_plot=line')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('image/png', response.mimetype)
+        self.assertTrue(response.data.startswith(b'\x89PNG'))
+        etag = response.headers['ETag']
+        self.assertEqual(run.plot_cache.get_key('line'), etag.strip('"'))
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        response = self.client.get('/plotting?view_plot=line', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.data)
+
+    def test_unknown_plot(self):
+        self.assertEqual(404, self.client.get('/plotting?view_plot=unknown').status_code)
+        self.assertEqual(404, self.client.get('/plotting').status_code)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()